@@ -10,17 +10,22 @@ from __future__ import annotations
 
 import logging
 import os
+import threading
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Optional
+from typing import ContextManager, Optional
 
 import numpy as np
 
-from polyclash.ai.core.mcts import MCTS
+from polyclash.ai.core.control import SearchControl, allocate_time
+from polyclash.ai.core.evaluator import BatchedEvaluator
+from polyclash.ai.core.mcts import MCTS, ParallelMCTS
+from polyclash.ai.core.tree import SearchTree
 from polyclash.ai.core.utils import dotdict
 from polyclash.ai.nn import NNetWrapper
 from polyclash.ai.polyclash.game_adapter import PolyclashGame
 from polyclash.ai.polyclash.state import PolyclashState
-from polyclash.ai.polyclash.topology import PASS_ACTION
+from polyclash.ai.polyclash.topology import NUM_POINTS, PASS_ACTION
 
 log = logging.getLogger(__name__)
 
@@ -76,24 +81,77 @@ def board_to_state(board: object) -> PolyclashState:
         consecutive_passes=getattr(board, "consecutive_passes", 0),
         move_count=move_count,
         zobrist_hash=zobrist_hash,
-        history_hashes=frozenset(history_hashes_set),
+        history_hashes=history_hashes_set,
     )
 
 
 class HRMPlayer:
-    """HRM+MCTS AI player that can be plugged into polyclash."""
+    """HRM+MCTS AI player that can be plugged into polyclash.
+
+    The search tree is kept between moves: when the position to play is
+    already in a recent tree (after the player's own move and the opponent's
+    reply), its subtree becomes the new root and only the simulations
+    missing from ``num_mcts_sims`` are run. Up to ``tree_cache_size`` trees
+    are kept so that one player can serve several games; 0 disables reuse.
+
+    With ``eval_batch_size`` above 1 the search evaluates that many leaves
+    per network forward (see ``MCTS``), and with ``num_threads`` above 1
+    that many workers search the tree together (see ``ParallelMCTS``).
+
+    The search of a move stops at the first of ``num_mcts_sims`` simulations,
+    ``time_ms`` milliseconds or ``max_nodes`` tree nodes (None disables a
+    limit). ``time_ms`` is an average: ``allocate_time`` gives midgame moves
+    more of it than the opening and endgame. With ``early_stop`` the search
+    also ends once no remaining simulation could change the chosen move.
+
+    ``genmove`` may be called from several threads at once, e.g. by a server
+    with many game rooms: every call runs its own search, and with
+    ``max_batch_size`` above 1 the network calls of all running searches go
+    through one ``BatchedEvaluator``, which merges them into batches of up
+    to that size, waiting at most ``max_wait_us`` microseconds for a batch
+    to fill.
+
+    ``backend`` selects how the network runs (see
+    ``NNetWrapper.use_backend``): ``"torchscript"`` or ``"torchscript-int8"``
+    use an exported artefact, read from ``backend_path`` or exported from
+    the loaded weights. With ``halt_threshold`` the eager network stops
+    the HRM recurrence of a position once an L step barely changes its
+    state (see ``NNetWrapper.use_halting``), between ``min_steps`` and
+    ``max_steps`` L steps.
+    """
 
     def __init__(
         self,
         checkpoint_dir: Optional[str] = None,
         checkpoint_file: str = "best.safetensors",
-        num_mcts_sims: int = 50,
+        num_mcts_sims: Optional[int] = 50,
         cpuct: float = 1.0,
         temp: float = 0.0,
         min_moves_before_pass: int = 40,
         auto_download: bool = True,
+        symmetry_keys: bool = True,
+        tree_cache_size: int = 4,
+        eval_batch_size: int = 1,
+        num_threads: int = 1,
+        time_ms: Optional[float] = None,
+        max_nodes: Optional[int] = None,
+        early_stop: bool = True,
+        max_batch_size: int = 1,
+        max_wait_us: int = 1000,
+        backend: str = "eager",
+        backend_path: Optional[str] = None,
+        halt_threshold: Optional[float] = None,
+        min_steps: int = 1,
+        max_steps: Optional[int] = None,
     ) -> None:
+        if num_mcts_sims is None and time_ms is None and max_nodes is None:
+            raise ValueError("HRMPlayer needs num_mcts_sims, time_ms or max_nodes")
         self.temp = temp
+        self.num_mcts_sims = num_mcts_sims
+        self.time_ms = time_ms
+        self.max_nodes = max_nodes
+        self.early_stop = early_stop
+        self.tree_cache_size = tree_cache_size
         self.min_moves_before_pass = min_moves_before_pass
 
         self.game = PolyclashGame(sym_samples=0)
@@ -116,29 +174,69 @@ class HRMPlayer:
             log.info("HRMPlayer loaded from Hub cache: %s", weights_path)
         else:
             log.warning("HRMPlayer: no checkpoint loaded (no dir, auto_download=False)")
+        if backend != "eager":
+            self.nnet.use_backend(backend, backend_path)
+        if halt_threshold is not None:
+            self.nnet.use_halting(halt_threshold, min_steps, max_steps)
 
-        self.args = dotdict({"numMCTSSims": num_mcts_sims, "cpuct": cpuct})
-        self.mcts = MCTS(self.game, self.nnet, self.args)
+        self.args = dotdict(
+            {
+                "numMCTSSims": num_mcts_sims,
+                "cpuct": cpuct,
+                "symmetryKeys": symmetry_keys,
+                "evalBatchSize": eval_batch_size,
+                "numThreads": num_threads,
+            }
+        )
+        self.evaluator: Optional[BatchedEvaluator] = None
+        if max_batch_size > 1 or num_threads > 1:
+            self.evaluator = BatchedEvaluator(
+                self.nnet, max(max_batch_size, num_threads), max_wait_us
+            )
+        self._lock = threading.Lock()
+        self._trees: list[SearchTree] = []
+        # The search of the latest move, and searches not currently running
+        self.mcts: MCTS = self._new_search()
+        self._idle: list[MCTS] = [self.mcts]
 
-        log.info("HRMPlayer ready: %d MCTS sims", num_mcts_sims)
+        log.info(
+            "HRMPlayer ready: %s MCTS sims, %s ms per move", num_mcts_sims, time_ms
+        )
 
-    def genmove(self, board: object, player: int) -> Optional[int]:
+    def genmove(
+        self, board: object, player: int, time_ms: Optional[float] = None
+    ) -> Optional[int]:
         """Generate a move for the given polyclash Board and player side.
 
         Args:
             board: polyclash Board object (mutable)
             player: BLACK (1) or WHITE (-1)
+            time_ms: time budget for this move, used as given in place of
+                the player's ``time_ms`` average
 
         Returns:
             Point index (0..301) to play, or None if pass is chosen.
         """
         state = board_to_state(board)
-        canonical = self.game.canonical_form(state, player)
 
-        self.mcts.reset()
-        pi = np.array(
-            self.mcts.action_prob(canonical, temp=self.temp), dtype=np.float64
-        )
+        mcts = self._acquire_search()
+        try:
+            reused = self._reuse_tree(mcts, state, player)
+            control = self._control(state, reused, time_ms)
+            with self._searching(mcts):
+                pi = np.array(
+                    mcts.action_prob(
+                        state, temp=self.temp, control=control, player=player
+                    ),
+                    dtype=np.float64,
+                )
+        finally:
+            with self._lock:
+                if self.tree_cache_size > 0:
+                    self._trees.insert(0, mcts.tree)
+                    del self._trees[self.tree_cache_size :]
+                self.mcts = mcts
+                self._idle.append(mcts)
 
         # Suppress pass in early game to force real play
         if state.move_count < self.min_moves_before_pass:
@@ -155,3 +253,64 @@ class HRMPlayer:
 
         log.info("HRMPlayer: point %d (p=%.3f)", action, pi[action])
         return action
+
+    def _control(
+        self, state: PolyclashState, reused: int, time_ms: Optional[float]
+    ) -> SearchControl:
+        """Search limits for one move, given the visits already in the tree."""
+        max_sims = None
+        if self.num_mcts_sims is not None:
+            max_sims = max(self.num_mcts_sims - reused, 0)
+        if time_ms is None and self.time_ms is not None:
+            stones = int(np.count_nonzero(state.stones))
+            time_ms = allocate_time(self.time_ms, stones, NUM_POINTS)
+        return SearchControl(
+            max_sims=max_sims,
+            time_ms=time_ms,
+            max_nodes=self.max_nodes,
+            early_stop=self.early_stop,
+        )
+
+    def close(self) -> None:
+        """Stop the shared evaluator thread, if any."""
+        if self.evaluator is not None:
+            self.evaluator.close()
+
+    def _new_search(self) -> MCTS:
+        if self.args.numThreads > 1:
+            assert self.evaluator is not None
+            return ParallelMCTS(self.game, self.nnet, self.args, self.evaluator)
+        return MCTS(self.game, self.evaluator or self.nnet, self.args)
+
+    def _searching(self, mcts: MCTS) -> ContextManager[object]:
+        """Declare the threads of ``mcts`` to the shared evaluator while it
+        searches, so a lone room's evaluations are not held back waiting
+        for other rooms."""
+        if self.evaluator is None:
+            return nullcontext()
+        return self.evaluator.clients(getattr(mcts, "num_threads", 1))
+
+    def _acquire_search(self) -> MCTS:
+        """Take an idle search, or make one if all are running."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._new_search()
+
+    def _reuse_tree(self, mcts: MCTS, state: PolyclashState, player: int) -> int:
+        """Point ``mcts`` at the cached tree holding ``state``.
+
+        The tree is cut down to the subtree under ``state`` and taken out
+        of the cache; without a match the search starts from an empty tree.
+        Returns the number of visits the root already has.
+        """
+        with self._lock:
+            for i, tree in enumerate(self._trees):
+                mcts.tree = tree
+                reused: Optional[int] = mcts.reroot(state, player)
+                if reused is not None:
+                    del self._trees[i]
+                    log.info("HRMPlayer: reusing %d visits", reused)
+                    return reused
+        mcts.reset()
+        return 0
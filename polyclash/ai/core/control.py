@@ -0,0 +1,86 @@
+import math
+import time
+
+import numpy as np
+
+
+class SearchControl:
+    """
+    Decides when an MCTS search stops.
+
+    The search stops at the first limit reached: ``max_sims`` simulations,
+    ``time_ms`` milliseconds of wall-clock time, or ``max_nodes`` nodes in
+    the tree. With ``early_stop`` it also stops once the most visited root
+    move leads the runner-up by more visits than the remaining simulations
+    could add: at most ``max_sims`` minus those done, and, under a time
+    limit, what the search rate so far would fit in the time left.
+
+    ``stop()`` ends the search at the next check whatever the limits say.
+    """
+
+    def __init__(self, max_sims=None, time_ms=None, max_nodes=None, early_stop=True):
+        if max_sims is None and time_ms is None and max_nodes is None:
+            raise ValueError("SearchControl needs at least one limit")
+        self.max_sims = max_sims
+        self.time_ms = time_ms
+        self.max_nodes = max_nodes
+        self.early_stop = early_stop
+        self.sims = 0
+        self.stopped = False
+        self._started = None
+
+    def start(self):
+        self.sims = 0
+        self.stopped = False
+        self._started = time.perf_counter()
+
+    def stop(self):
+        self.stopped = True
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self._started) * 1000.0
+
+    def remaining_sims(self):
+        """Upper bound on the simulations the limits still allow."""
+        remaining = math.inf
+        if self.max_sims is not None:
+            remaining = self.max_sims - self.sims
+        if self.time_ms is not None and self.sims > 0:
+            elapsed = self.elapsed_ms()
+            rate = self.sims / max(elapsed, 1e-3)
+            remaining = min(remaining, (self.time_ms - elapsed) * rate)
+        return remaining
+
+    def should_stop(self, tree, root):
+        """Check the limits before the next simulation."""
+        if self.stopped:
+            return True
+        if self.max_sims is not None and self.sims >= self.max_sims:
+            return True
+        if self.time_ms is not None and self.elapsed_ms() >= self.time_ms:
+            return True
+        if self.max_nodes is not None and len(tree) >= self.max_nodes:
+            return True
+        if tree.edge_count[root] == 0:
+            return True  # terminal: nothing to search
+        if not self.early_stop:
+            return False
+
+        edges = tree.edges(root)
+        visits = tree.visits[edges]
+        if len(visits) == 1:
+            return True
+        second, best = np.partition(visits, -2)[-2:]
+        return best - second > self.remaining_sims()
+
+
+def allocate_time(time_ms, stones, num_points):
+    """Share a per-move time budget across the phases of a game.
+
+    ``time_ms`` is the average budget per move. Moves get up to 1.5x of it
+    in the midgame, when about 40% of the points are taken, and down to
+    0.5x in the opening and once the board is 80% full, where the choice is
+    usually obvious.
+    """
+    filled = min(stones / num_points / 0.8, 1.0)
+    return time_ms * (0.5 + math.sin(math.pi * filled))
@@ -0,0 +1,122 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+
+class BatchedEvaluator:
+    """
+    Funnels ``predict`` calls from many threads into ``predict_batch`` calls.
+
+    Requests are queued and a background thread evaluates them in batches of
+    up to ``max_batch_size``, waiting at most ``max_wait_us`` microseconds
+    for a batch to fill. It offers the same ``predict``/``predict_batch``
+    interface as the network, so an MCTS can use it in place of ``nnet``.
+
+    Callers may declare how many threads are searching with ``clients``.
+    Once a batch holds as many requests as there are declared threads,
+    nobody else is expected to submit, so it is evaluated without waiting
+    out ``max_wait_us``; a lone search never waits. Without declared
+    clients the full wait applies.
+    """
+
+    def __init__(self, nnet, max_batch_size=8, max_wait_us=1000):
+        self.nnet = nnet
+        self.max_batch_size = max_batch_size
+        self.max_wait_us = max_wait_us
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._clients = 0
+
+    @contextmanager
+    def clients(self, threads=1):
+        """Declare ``threads`` searching threads for the enclosed block."""
+        with self._lock:
+            self._clients += threads
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._clients -= threads
+
+    def submit(self, board, valids=None):
+        """Queue ``board`` for evaluation; the future resolves to (pi, v)."""
+        future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="batched-evaluator", daemon=True
+                )
+                self._thread.start()
+        self._queue.put((board, valids, future))
+        return future
+
+    def predict(self, board, valids=None):
+        return self.submit(board, valids).result()
+
+    def predict_batch(self, boards, valids=None):
+        if valids is None:
+            valids = [None] * len(boards)
+        futures = [self.submit(board, mask) for board, mask in zip(boards, valids)]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """Stop the background thread once the queued requests are done."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _next_batch(self):
+        item = self._queue.get()
+        if item is None:
+            return None
+        batch = [item]
+        deadline = time.perf_counter() + self.max_wait_us / 1e6
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if 0 < self._clients <= len(batch):
+                timeout = 0  # take what is queued, wait for nobody
+            try:
+                item = (
+                    self._queue.get(timeout=timeout)
+                    if timeout > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            boards = [board for board, _, _ in batch]
+            valids = [mask for _, mask, _ in batch]
+            try:
+                predict_batch = getattr(self.nnet, "predict_batch", None)
+                if predict_batch is None:
+                    results = [
+                        self.nnet.predict(board, mask)
+                        for board, mask in zip(boards, valids)
+                    ]
+                else:
+                    results = predict_batch(boards, valids)
+            except Exception as e:
+                log.exception("Batched evaluation failed")
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, _, future), result in zip(batch, results):
+                future.set_result(result)
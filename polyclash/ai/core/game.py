@@ -28,6 +28,10 @@ class Game:
     def game_ended(self, board, player):
         pass
 
+    def is_terminal(self, board):
+        """Cheap check whether the game is over, ahead of ``game_ended``."""
+        return self.game_ended(board, 1) != 0
+
     def canonical_form(self, board, player):
         pass
 
@@ -36,3 +40,26 @@ class Game:
 
     def representation(self, board):
         pass
+
+    def symmetry_key(self, board):
+        """Return (key, action_perm) for symmetry-aware transposition tables.
+
+        ``key`` is the same for all symmetric variants of ``board`` and
+        ``action_perm[a]`` is the action of ``board`` that corresponds to
+        action ``a`` of the shared entry. Games without symmetries keep this
+        default: the plain representation and no permutation.
+        """
+        return self.representation(board), None
+
+    def pack_board(self, board):
+        """Return ``board`` in the form a search tree keeps it in.
+
+        Games whose boards carry caches or bulky arrays can return a smaller
+        record here, which ``unpack_board`` turns back into a board. The
+        default keeps the board as it is.
+        """
+        return board
+
+    def unpack_board(self, packed):
+        """Inverse of ``pack_board``."""
+        return packed
@@ -1,50 +1,156 @@
 import logging
-import math
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 
 import numpy as np
 
-EPS = 1e-8
+from polyclash.ai.core.control import SearchControl
+from polyclash.ai.core.evaluator import BatchedEvaluator
+from polyclash.ai.core.tree import SearchTree
 
 log = logging.getLogger(__name__)
 
+_OTHER_PLAYER = b"\xff"
+
 
 class MCTS:
     """
-    This class handles the MCTS tree.
+    This class handles the MCTS tree, stored in a ``SearchTree`` node pool.
+
+    Nodes keep boards as played, without flipping colours: a simulation walks
+    down an explicit path, carrying the sign of the player to move, and only
+    the leaf handed to the network is put in canonical form.
+
+    With ``args.evalBatchSize`` above 1, simulations run in rounds: each
+    round descends up to that many times, steering later descents away from
+    earlier ones with a virtual loss of ``args.virtualLoss`` (default 1) per
+    pending visit, evaluates all new leaves in one ``nnet.predict_batch``
+    call and then backs them up.
+
+    With ``args.symmetryKeys`` set, nodes are keyed by ``game.symmetry_key``
+    so all symmetric variants of a position share one node; its statistics
+    are indexed by the actions of that shared entry and mapped back through
+    the returned action permutation.
     """
 
     def __init__(self, game, nnet, args):
         self.game = game
         self.nnet = nnet
         self.args = args
-        self.Qsa = {}
-        self.Nsa = {}
-        self.Ns = {}
-        self.Ps = {}
-        self.Vs = {}
+        self.symmetry_keys = getattr(args, "symmetryKeys", False)
+        self.batch_size = getattr(args, "evalBatchSize", 1)
+        self.virtual_loss = getattr(args, "virtualLoss", 1.0)
+        self.tree = SearchTree()
 
     def reset(self):
-        self.Qsa = {}
-        self.Nsa = {}
-        self.Ns = {}
-        self.Ps = {}
-        self.Vs = {}
+        self.tree = SearchTree()
+
+    def reroot(self, board, player=1):
+        """Keep only the subtree under ``board`` for the next search.
+
+        Returns the number of visits the kept root already has, or None (and
+        leaves the tree alone) if the position is not in the tree.
+        """
+        s, _ = self._key(board, player)
+        node = self.tree.index.get(s)
+        if node is None:
+            return None
+        self.tree = self.tree.subtree(node)
+        return int(self.tree.node_visits[0])
 
     def update_network(self, nnet):
         self.nnet = nnet
 
-    def action_prob(self, canonicalBoard, temp=1):
-        for i in range(self.args.numMCTSSims):
-            self.search(canonicalBoard)
+    def _key(self, board, player):
+        """Return (s, perm): the node key and the node-to-board action map.
 
-        s = self.game.representation(canonicalBoard)
-        counts = [
-            self.Nsa[(s, a)] if (s, a) in self.Nsa else 0
-            for a in range(self.game.action_size())
-        ]
+        Nodes hold boards as given, with ``player`` to move; keys of
+        positions where -1 is to move carry a trailing marker byte.
+        """
+        if self.symmetry_keys:
+            s, perm = self.game.symmetry_key(board)
+        else:
+            s, perm = self.game.representation(board), None
+        if player != 1:
+            s += _OTHER_PLAYER
+        return s, perm
+
+    def _terminal(self, board, player):
+        """Result of ``board`` for ``player``, or 0 if the game goes on."""
+        if not self.game.is_terminal(board):
+            return 0
+        return self.game.game_ended(self.game.canonical_form(board, player), 1)
+
+    def _expand(self, board, player, s, perm):
+        """Add the node for ``board``; return (node, value for ``player``)."""
+        r = self._terminal(board, player)
+        if r != 0:
+            node = self.tree.add_node(s, self.game.pack_board(board), perm, terminal=r)
+            return node, r
+
+        # Legal moves first: the canonical board then shares what the game
+        # cached on ``board`` while computing them, and the network reuses
+        # the mask
+        valids = self.game.valid_moves(board, player)
+        ps, v = self.nnet.predict(self.game.canonical_form(board, player), valids)
+        return self._add_evaluated(board, s, perm, ps, valids), v
+
+    def _add_evaluated(self, board, s, perm, ps, valids):
+        """Add a non-terminal node with the network policy ``ps``."""
+        ps = np.asarray(ps, dtype=np.float64)
+        if perm is not None:
+            ps = ps[perm]
+            valids = valids[perm]
+        ps = ps * valids
+        sum_ps = np.sum(ps)
+        if sum_ps > 0:
+            ps /= sum_ps
+        else:
+            log.error("All valid moves were masked, doing a workaround.")
+            ps = ps + valids
+            ps /= np.sum(ps)
+
+        actions = np.flatnonzero(valids)
+        packed = self.game.pack_board(board)
+        return self.tree.add_node(s, packed, perm, actions, ps[actions])
+
+    def _predict_batch(self, boards, valids):
+        predict_batch = getattr(self.nnet, "predict_batch", None)
+        if predict_batch is None:
+            return [
+                self.nnet.predict(board, mask) for board, mask in zip(boards, valids)
+            ]
+        return predict_batch(boards, valids)
+
+    def action_prob(self, board, temp=1, num_sims=None, control=None, player=1):
+        """Search from ``board`` and return the move distribution.
+
+        ``player`` is the side to move; the default suits canonical boards.
+        The search runs ``num_sims`` simulations (``args.numMCTSSims`` by
+        default), or as long as ``control``, a ``SearchControl``, allows.
+        """
+        if control is None:
+            if num_sims is None:
+                num_sims = self.args.numMCTSSims
+            control = SearchControl(max_sims=num_sims, early_stop=False)
+        control.start()
+        root = self._root(board, player, control)
+        if root is not None:
+            self._simulate(root, player, control)
+
+        s, perm = self._key(board, player)
+        counts = np.zeros(self.game.action_size(), dtype=np.int64)
+        node = self.tree.index.get(s)
+        if node is not None:
+            node_counts = self.tree.action_visits(node, len(counts))
+            if perm is None:
+                counts = node_counts
+            else:
+                counts[perm] = node_counts
+        counts = counts.tolist()
 
         if temp == 0:
-            valids = self.game.valid_moves(canonicalBoard, 1)
+            valids = self.game.valid_moves(board, player)
             masked_counts = np.array(counts) * valids
 
             bestAs = np.array(
@@ -61,7 +167,7 @@ class MCTS:
         if counts_sum > 0:
             probs = [x / counts_sum for x in counts]
         else:
-            valids = self.game.valid_moves(canonicalBoard, 1)
+            valids = self.game.valid_moves(board, player)
             valid_sum = np.sum(valids)
             if valid_sum > 0:
                 probs = [v / valid_sum for v in valids]
@@ -73,69 +179,237 @@ class MCTS:
 
     _MAX_SEARCH_DEPTH = 64
 
-    def search(self, canonicalBoard, depth=0):
-        if depth >= self._MAX_SEARCH_DEPTH:
-            return 0
+    def _simulate(self, root, player, control):
+        if self.batch_size > 1:
+            self._search_batched(root, player, control)
+            return
+        while not control.should_stop(self.tree, root):
+            self._search(root, player)
+            control.sims += 1
 
-        r = self.game.game_ended(canonicalBoard, 1)
-        if r != 0:
-            return -r
+    def _root(self, board, player, control):
+        """Return the root node for ``board``, expanding it if new.
 
-        s = self.game.representation(canonicalBoard)
+        Expanding the root counts as the first simulation; returns None if
+        ``control`` allows none.
+        """
+        s, perm = self._key(board, player)
+        root = self.tree.index.get(s)
+        if root is not None:
+            return root
+        if control.max_sims is not None and control.max_sims <= 0:
+            return None
+        root, _ = self._expand(board, player, s, perm)
+        control.sims += 1
+        return root
 
-        if s not in self.Ps:
-            self.Ps[s], v = self.nnet.predict(canonicalBoard)
-            valids = self.game.valid_moves(canonicalBoard, 1)
-            self.Ps[s] = self.Ps[s] * valids
-            sum_Ps_s = np.sum(self.Ps[s])
-            if sum_Ps_s > 0:
-                self.Ps[s] /= sum_Ps_s
-            else:
-                log.error("All valid moves were masked, doing a workaround.")
-                self.Ps[s] = self.Ps[s] + valids
-                self.Ps[s] /= np.sum(self.Ps[s])
-
-            self.Vs[s] = valids
-            self.Ns[s] = 0
+    def search(self, board, player=1):
+        """Run one simulation from ``board``; return the value for the
+        player who moved into it."""
+        s, perm = self._key(board, player)
+        node = self.tree.index.get(s)
+        if node is None:
+            _, v = self._expand(board, player, s, perm)
             return -v
+        return self._search(node, player)
 
-        valids = self.Vs[s]
-        cur_best = -float("inf")
-        best_act = -1
-
-        for a in range(self.game.action_size()):
-            if valids[a]:
-                if (s, a) in self.Qsa:
-                    u = self.Qsa[(s, a)] + self.args.cpuct * self.Ps[s][a] * math.sqrt(
-                        self.Ns[s]
-                    ) / (1 + self.Nsa[(s, a)])
-                else:
-                    u = self.args.cpuct * self.Ps[s][a] * math.sqrt(self.Ns[s] + EPS)
+    def _step(self, node, edge, player):
+        """Play ``edge`` from ``node``; return (board, key, perm) reached."""
+        tree = self.tree
+        a = int(tree.actions[edge])
+        perm = tree.perms[node]
+        move = a if perm is None else int(perm[a])
+        board = self.game.unpack_board(tree.states[node])
+        board, _ = self.game.next_state(board, player, move)
+        s, next_perm = self._key(board, -player)
+        return board, s, next_perm
 
-                if u > cur_best:
-                    cur_best = u
-                    best_act = a
+    def _search(self, node, player):
+        """One simulation from ``node``: select down to a leaf, expand it and
+        back the result up the path. Returns the value for the player who
+        moved into ``node``."""
+        tree = self.tree
+        cpuct = self.args.cpuct
+        nodes, edges = [], []
+        # What the walk's last node hands back to its parent
+        value = 0.0
+        for _ in range(self._MAX_SEARCH_DEPTH):
+            r = tree.terminal[node]
+            if r != 0:
+                value = -r
+                break
+            edge = tree.select(node, cpuct)
+            if edge == -1:
+                break
+            nodes.append(node)
+            edges.append(edge)
 
-        if best_act == -1:
-            return 0
-        a = best_act
+            child = tree.children[edge]
+            if child == -1:
+                board, s, perm = self._step(node, edge, player)
+                child = tree.index.get(s)
+                if child is None:
+                    child, v = self._expand(board, -player, s, perm)
+                    tree.children[edge] = child
+                    value = -v
+                    break
+                tree.children[edge] = child
+            node = child
+            player = -player
 
-        next_s, next_player = self.game.next_state(canonicalBoard, 1, a)
-        next_s = self.game.canonical_form(next_s, next_player)
-        if self.game.representation(next_s) == s:
-            return 0
+        tree.backup_walk(nodes, edges, value)
+        return value if len(edges) % 2 == 0 else -value
 
-        v = self.search(next_s, depth + 1)
+    def _search_batched(self, root, player, control):
+        """Run simulations in rounds of up to ``evalBatchSize`` leaves."""
+        while not control.should_stop(self.tree, root):
+            rounds = self.batch_size
+            if control.max_sims is not None:
+                rounds = min(rounds, control.max_sims - control.sims)
+            control.sims += rounds
+            pending = {}
+            for _ in range(rounds):
+                self._descend(root, player, pending)
+            if not pending:
+                continue
 
-        if (s, a) in self.Qsa:
-            self.Qsa[(s, a)] = (self.Nsa[(s, a)] * self.Qsa[(s, a)] + v) / (
-                self.Nsa[(s, a)] + 1
+            leaves = list(pending.values())
+            results = self._predict_batch(
+                [self.game.canonical_form(leaf[1], leaf[2]) for leaf in leaves],
+                [leaf[4] for leaf in leaves],
             )
-            self.Nsa[(s, a)] += 1
+            for leaf, (ps, v) in zip(leaves, results):
+                self._complete(leaf, ps, v)
 
-        else:
-            self.Qsa[(s, a)] = v
-            self.Nsa[(s, a)] = 1
+    def _complete(self, leaf, ps, v):
+        """Add an evaluated leaf from ``_descend`` and back its paths up."""
+        s, board, player, perm, valids, paths = leaf
+        child = self._add_evaluated(board, s, perm, ps, valids)
+        for nodes, edges in paths:
+            self.tree.children[edges[-1]] = child
+            self.tree.backup_path(nodes, edges, -v, self.virtual_loss)
+
+    def _abandon(self, leaf):
+        """Drop a pending leaf, taking the virtual loss off its paths."""
+        for nodes, edges in leaf[5]:
+            self.tree.revert_virtual_loss(nodes, edges, self.virtual_loss)
+
+    def _descend(self, node, player, pending):
+        """Walk from ``node`` to a leaf under virtual loss.
+
+        A new non-terminal leaf is returned as (key, board, player, perm,
+        valids, paths) and registered in ``pending`` under its key for evaluation,
+        ``paths`` holding the (nodes, edges) of the walk. A walk that reaches
+        a leaf already pending joins its ``paths`` and is backed up with it.
+        Terminal leaves and depth-limited walks are backed up on the spot.
+        Returns None when there is nothing new to evaluate.
+        """
+        tree = self.tree
+        loss = self.virtual_loss
+        cpuct = self.args.cpuct
+        nodes, edges = [], []
+        value = 0.0
+        for _ in range(self._MAX_SEARCH_DEPTH):
+            r = tree.terminal[node]
+            if r != 0:
+                value = -r
+                break
+            edge = tree.select(node, cpuct)
+            if edge == -1:
+                break
+            nodes.append(node)
+            edges.append(edge)
+            tree.add_virtual_loss([node], [edge], loss)
+
+            child = tree.children[edge]
+            if child == -1:
+                board, s, perm = self._step(node, edge, player)
+                child = tree.index.get(s)
+                if child is None:
+                    if s in pending:
+                        pending[s][5].append((nodes, edges))
+                        return None
+                    r = self._terminal(board, -player)
+                    if r != 0:
+                        child = tree.add_node(
+                            s, self.game.pack_board(board), perm, terminal=r
+                        )
+                        tree.children[edge] = child
+                        tree.backup_path(nodes, edges, -r, loss)
+                        return None
+                    valids = self.game.valid_moves(board, -player)
+                    leaf = (s, board, -player, perm, valids, [(nodes, edges)])
+                    pending[s] = leaf
+                    return leaf
+                tree.children[edge] = child
+            node = child
+            player = -player
+
+        tree.backup_path(nodes, edges, value, loss)
+        return None
+
+
+class ParallelMCTS(MCTS):
+    """
+    MCTS with ``args.numThreads`` workers searching one shared tree.
+
+    Each worker repeatedly takes the tree lock to descend to a leaf under
+    virtual loss, releases it while the leaf is evaluated, and takes it
+    again to add the leaf and back up. The network calls of all workers go
+    through a ``BatchedEvaluator``, so concurrent leaves share a forward
+    pass and the workers overlap tree work with evaluation.
+    """
+
+    def __init__(self, game, nnet, args, evaluator=None):
+        super().__init__(game, nnet, args)
+        self.num_threads = max(getattr(args, "numThreads", 1), 1)
+        self.evaluator = evaluator or BatchedEvaluator(
+            nnet, max_batch_size=self.num_threads
+        )
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def update_network(self, nnet):
+        super().update_network(nnet)
+        self.evaluator.nnet = nnet
+
+    def _simulate(self, root, player, control):
+        pending = {}
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.num_threads, thread_name_prefix="mcts"
+            )
+        workers = [
+            self._executor.submit(self._work, root, player, control, pending)
+            for _ in range(self.num_threads)
+        ]
+        # On the first failure, stop the other workers and let them finish
+        # before raising: the tree must not be in use once this returns.
+        _, running = wait(workers, return_when=FIRST_EXCEPTION)
+        if running:
+            control.stop()
+            wait(running)
+        for worker in workers:
+            worker.result()
 
-        self.Ns[s] += 1
-        return -v
+    def _work(self, root, player, control, pending):
+        while True:
+            with self._lock:
+                if control.should_stop(self.tree, root):
+                    return
+                control.sims += 1
+                leaf = self._descend(root, player, pending)
+            if leaf is None:
+                continue
+            try:
+                ps, v = self.evaluator.predict(
+                    self.game.canonical_form(leaf[1], leaf[2]), leaf[4]
+                )
+            except BaseException:
+                with self._lock:
+                    del pending[leaf[0]]
+                    self._abandon(leaf)
+                raise
+            with self._lock:
+                del pending[leaf[0]]
+                self._complete(leaf, ps, v)
@@ -12,7 +12,12 @@ class NeuralNet:
     def train(self, examples):
         pass
 
-    def predict(self, board):
+    def predict(self, board, valids=None):
+        """Return (pi, v) for ``board``.
+
+        ``valids`` is the legal-move mask of ``board`` if the caller already
+        has it, so the network need not compute it again.
+        """
         pass
 
     def save_checkpoint(self, folder, filename):
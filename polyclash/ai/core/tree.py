@@ -0,0 +1,243 @@
+import math
+
+import numpy as np
+
+EPS = 1e-8
+
+
+def _gather(starts, counts):
+    """Return (new starts, indices) packing the slabs ``starts``/``counts``."""
+    new_starts = np.cumsum(counts) - counts
+    indices = np.repeat(starts - new_starts, counts) + np.arange(counts.sum())
+    return new_starts, indices
+
+
+class SearchTree:
+    """
+    Node pool for MCTS, stored in flat numpy arrays.
+
+    Every node owns a contiguous slab of priors, one per legal action, and
+    gets a matching slab of edges the first time the search looks into it
+    (``edges``). An edge holds the action, its visit count, value sum and
+    child node (-1 until the child is reached). Most nodes of a search are
+    leaves that are never looked into, so they only pay for their priors.
+
+    Nodes are found by key through ``index``, so transpositions share one
+    node, and keep the state they were created from so the search can
+    descend without replaying moves.
+
+    Terminal nodes have no edges and a non-zero ``terminal`` value.
+    """
+
+    def __init__(self, node_capacity=256, prior_capacity=16384, edge_capacity=4096):
+        self.index = {}
+        self.keys = []
+        self.states = []
+        self.perms = []
+        self.size = 0
+        self.num_priors = 0
+        self.num_edges = 0
+
+        self.node_visits = np.zeros(node_capacity, dtype=np.int64)
+        self.terminal = np.zeros(node_capacity, dtype=np.float64)
+        self.prior_start = np.zeros(node_capacity, dtype=np.int64)
+        self.edge_start = np.full(node_capacity, -1, dtype=np.int64)
+        self.edge_count = np.zeros(node_capacity, dtype=np.int64)
+
+        # 4 bytes per legal action of every node
+        self.prior_actions = np.zeros(prior_capacity, dtype=np.int16)
+        self.priors = np.zeros(prior_capacity, dtype=np.float16)
+
+        # 14 bytes per legal action of the nodes looked into
+        self.actions = np.zeros(edge_capacity, dtype=np.int16)
+        self.visits = np.zeros(edge_capacity, dtype=np.int32)
+        self.value_sums = np.zeros(edge_capacity, dtype=np.float32)
+        self.children = np.full(edge_capacity, -1, dtype=np.int32)
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def _grow(self, names, needed):
+        for name in names:
+            array = getattr(self, name)
+            if needed > len(array):
+                grown = np.full(
+                    max(needed, len(array) * 3 // 2),
+                    -1 if name in ("edge_start", "children") else 0,
+                    dtype=array.dtype,
+                )
+                grown[: len(array)] = array
+                setattr(self, name, grown)
+
+    def add_node(self, key, state, perm, actions=(), priors=(), terminal=0.0):
+        """Add a node with one prior per entry of ``actions``; return its index."""
+        node = self.size
+        count = len(actions)
+        start = self.num_priors
+        self._grow(
+            ("node_visits", "terminal", "prior_start", "edge_start", "edge_count"),
+            node + 1,
+        )
+        self._grow(("prior_actions", "priors"), start + count)
+
+        self.index[key] = node
+        self.keys.append(key)
+        self.states.append(state)
+        self.perms.append(perm)
+        self.terminal[node] = terminal
+        self.prior_start[node] = start
+        self.edge_count[node] = count
+        self.prior_actions[start : start + count] = actions
+        self.priors[start : start + count] = priors
+        self.size += 1
+        self.num_priors += count
+        return node
+
+    def edges(self, node):
+        """Slice of the edge arrays that belongs to ``node``.
+
+        The edges are allocated on the first call, which may replace the edge
+        arrays: take the slice before reading them.
+        """
+        start = self.edge_start[node]
+        if start < 0:
+            start = self._open(node)
+        return slice(start, start + self.edge_count[node])
+
+    def _open(self, node):
+        """Allocate the edges of ``node``; return the first one."""
+        start = self.num_edges
+        count = int(self.edge_count[node])
+        self._grow(("actions", "visits", "value_sums", "children"), start + count)
+        first = self.prior_start[node]
+        self.actions[start : start + count] = self.prior_actions[first : first + count]
+        self.edge_start[node] = start
+        self.num_edges += count
+        return start
+
+    def select(self, node, cpuct):
+        """Return the edge of ``node`` with the highest PUCT score, or -1.
+
+        Unvisited edges score by their prior alone; ties go to the lowest
+        action.
+        """
+        edges = self.edges(node)
+        if edges.start == edges.stop:
+            return -1
+        visits = self.visits[edges]
+        first = self.prior_start[node]
+        priors = self.priors[first : first + edges.stop - edges.start]
+        priors = priors.astype(np.float32)
+        n = self.node_visits[node]
+        explored = visits > 0
+        q = self.value_sums[edges] / np.maximum(visits, 1)
+        u = np.where(
+            explored,
+            q + cpuct * priors * math.sqrt(n) / (1 + visits),
+            cpuct * priors * math.sqrt(n + EPS),
+        )
+        return edges.start + int(np.argmax(u))
+
+    def backup(self, node, edge, value):
+        """Record one visit of ``edge`` from ``node`` with result ``value``."""
+        self.visits[edge] += 1
+        self.value_sums[edge] += value
+        self.node_visits[node] += 1
+
+    def backup_walk(self, nodes, edges, value):
+        """Record one visit of every (node, edge) of a path.
+
+        ``value`` is the result for the player to move at the last node of
+        the path; the sign alternates towards the root.
+        """
+        visits, value_sums, node_visits = self.visits, self.value_sums, self.node_visits
+        for i in range(len(edges) - 1, -1, -1):
+            visits[edges[i]] += 1
+            value_sums[edges[i]] += value
+            node_visits[nodes[i]] += 1
+            value = -value
+
+    def add_virtual_loss(self, nodes, edges, loss):
+        """Count a pending visit on every (node, edge) of a path as a loss.
+
+        Later selections in the same batch then steer away from the path
+        until ``backup_path`` replaces the loss with the real value.
+        """
+        np.add.at(self.visits, edges, 1)
+        np.add.at(self.value_sums, edges, -loss)
+        np.add.at(self.node_visits, nodes, 1)
+
+    def revert_virtual_loss(self, nodes, edges, loss):
+        """Undo ``add_virtual_loss`` for a path that is not backed up."""
+        np.add.at(self.visits, edges, -1)
+        np.add.at(self.value_sums, edges, loss)
+        np.add.at(self.node_visits, nodes, -1)
+
+    def backup_path(self, nodes, edges, value, loss):
+        """Back up a path that carries virtual loss.
+
+        ``value`` is the result for the player to move at the last node of
+        the path; the sign alternates towards the root. The visits were
+        already counted by ``add_virtual_loss``.
+        """
+        signs = np.where(np.arange(len(edges))[::-1] % 2 == 0, 1.0, -1.0)
+        np.add.at(self.value_sums, edges, loss + signs * value)
+
+    def subtree(self, root):
+        """Return a new tree holding only the nodes reachable from ``root``.
+
+        ``root`` becomes node 0; the statistics of the kept nodes are copied
+        and everything else is dropped.
+        """
+        order = [root]
+        new_index = {root: 0}
+        for node in order:
+            if self.edge_start[node] < 0:
+                continue
+            children = self.children[self.edges(node)]
+            for child in children[children >= 0].tolist():
+                if child not in new_index:
+                    new_index[child] = len(order)
+                    order.append(child)
+
+        nodes = np.array(order, dtype=np.int64)
+        counts = self.edge_count[nodes]
+        prior_starts, priors = _gather(self.prior_start[nodes], counts)
+        opened = self.edge_start[nodes] >= 0
+        edge_counts = np.where(opened, counts, 0)
+        edge_starts, edges = _gather(self.edge_start[nodes], edge_counts)
+        remap = np.full(self.size, -1, dtype=np.int32)
+        remap[nodes] = np.arange(len(nodes))
+
+        tree = SearchTree(len(nodes), max(len(priors), 1), max(len(edges), 1))
+        tree.keys = [self.keys[node] for node in order]
+        tree.states = [self.states[node] for node in order]
+        tree.perms = [self.perms[node] for node in order]
+        tree.index = {key: node for node, key in enumerate(tree.keys)}
+        tree.size = len(nodes)
+        tree.num_priors = len(priors)
+        tree.num_edges = len(edges)
+        tree.node_visits[: tree.size] = self.node_visits[nodes]
+        tree.terminal[: tree.size] = self.terminal[nodes]
+        tree.prior_start[: tree.size] = prior_starts
+        tree.edge_start[: tree.size] = np.where(opened, edge_starts, -1)
+        tree.edge_count[: tree.size] = counts
+        for name in ("prior_actions", "priors"):
+            getattr(tree, name)[: tree.num_priors] = getattr(self, name)[priors]
+        for name in ("actions", "visits", "value_sums"):
+            getattr(tree, name)[: tree.num_edges] = getattr(self, name)[edges]
+        children = self.children[edges]
+        tree.children[: tree.num_edges] = np.where(
+            children >= 0, remap[np.maximum(children, 0)], -1
+        )
+        return tree
+
+    def action_visits(self, node, action_size):
+        """Visit counts of ``node`` as a dense per-action array."""
+        counts = np.zeros(action_size, dtype=np.int64)
+        edges = self.edges(node)
+        counts[self.actions[edges]] = self.visits[edges]
+        return counts
@@ -0,0 +1,236 @@
+"""TorchScript export of the network for CPU inference.
+
+The board topology never changes, so the export bakes the graph tensors of
+``NNetWrapper`` into a traced and frozen copy of ``GraphHRMModel``: the
+artefact takes the (B, 302) stones alone and returns (policy_logits,
+value). With ``quantize=True`` every linear layer, including the HRM
+backbone's ``LinearInit`` ones, is dynamically quantized to int8.
+
+``NNetWrapper.use_backend`` loads or builds these artefacts. From the
+command line:
+
+    python -m polyclash.ai.nn.export CHECKPOINT_DIR best.safetensors model.pt \\
+        --int8 --check 200
+
+exports a checkpoint and compares the artefact's policy and value with the
+eager model on a seeded suite of positions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import logging
+import warnings
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, Sequence
+
+import numpy as np
+import torch
+from torch import nn
+
+from polyclash.ai.nn.layers import LinearInit
+from polyclash.ai.polyclash.state import PolyclashState
+
+if TYPE_CHECKING:
+    from polyclash.ai.nn.nnet import NNetWrapper
+
+log = logging.getLogger(__name__)
+
+
+class _FixedGraph(nn.Module):
+    """Wraps the model so the graph tensors become constants of the trace."""
+
+    def __init__(
+        self,
+        model: nn.Module,
+        edge_index: torch.Tensor,
+        node_type: torch.Tensor,
+        coords: torch.Tensor,
+        area_weight: torch.Tensor,
+    ) -> None:
+        super().__init__()
+        self.model = model
+        self.register_buffer("edge_index", edge_index)
+        self.register_buffer("node_type", node_type)
+        self.register_buffer("coords", coords)
+        self.register_buffer("area_weight", area_weight)
+
+    def forward(self, stones: torch.Tensor):
+        return self.model(
+            stones, self.edge_index, self.node_type, self.coords, self.area_weight
+        )
+
+
+def _plain_linears(module: nn.Module) -> None:
+    """Replace every ``LinearInit`` under ``module`` by an equivalent
+    ``nn.Linear``, which ``quantize_dynamic`` knows how to convert."""
+    for name, child in module.named_children():
+        if isinstance(child, LinearInit):
+            out_features, in_features = child.weight.shape
+            linear = nn.Linear(in_features, out_features, bias=child.bias is not None)
+            linear.weight = child.weight
+            if child.bias is not None:
+                linear.bias = child.bias
+            setattr(module, name, linear)
+        else:
+            _plain_linears(child)
+
+
+def export_model(nnet: "NNetWrapper", quantize: bool = False) -> torch.jit.ScriptModule:
+    """Trace a CPU copy of ``nnet``'s current weights into a frozen module.
+
+    The artefact is a snapshot: later changes to the weights of ``nnet``
+    do not reach it.
+    """
+    if nnet.torch_model is None:
+        raise RuntimeError("export needs torch and a model")
+    cpu = torch.device("cpu")
+    model = copy.deepcopy(nnet.torch_model).to(cpu).eval()
+    if quantize:
+        _plain_linears(model)
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {nn.Linear}, dtype=torch.qint8
+        )
+    wrapped = _FixedGraph(
+        model,
+        nnet._edge_index_t.to(cpu),
+        nnet._node_type_t.to(cpu),
+        nnet._coords_t.to(cpu),
+        nnet._area_weight_t.to(cpu),
+    ).eval()
+
+    example = torch.zeros((2, nnet._node_type_t.numel()), dtype=torch.long)
+    with torch.no_grad(), warnings.catch_warnings():
+        # The tracer notes the graph check in GraphEncoder; it is meant to be
+        # frozen into the trace, as is the rest of the topology.
+        warnings.simplefilter("ignore")
+        traced = torch.jit.trace(wrapped, example)
+        frozen: torch.jit.ScriptModule = torch.jit.freeze(traced)
+    return frozen
+
+
+def save_model(module: torch.jit.ScriptModule, path: str) -> None:
+    torch.jit.save(module, path)
+
+
+def load_model(path: str) -> torch.jit.ScriptModule:
+    module: torch.jit.ScriptModule = torch.jit.load(path, map_location="cpu")
+    module.eval()
+    return module
+
+
+def sample_positions(
+    game, count: int, seed: int = 0, max_moves: int = 200
+) -> list[PolyclashState]:
+    """Positions along seeded random games, from the opening to the endgame."""
+    rng = np.random.default_rng(seed)
+    positions: list[PolyclashState] = []
+    while len(positions) < count:
+        board, player = game.init_board(), 1
+        for _ in range(int(rng.integers(0, max_moves))):
+            valids = game.valid_moves(board, player)
+            valids[-1] = 0  # no passes, so the games actually fill the board
+            if not valids.any():
+                break
+            action = int(rng.choice(np.flatnonzero(valids)))
+            board, player = game.next_state(board, player, action)
+        positions.append(game.canonical_form(board, player))
+    return positions
+
+
+@dataclass
+class AccuracyReport:
+    """How far an exported model's predictions are from the eager model's."""
+
+    positions: int
+    max_policy_diff: float
+    mean_kl: float
+    max_value_diff: float
+    top1_agreement: float
+
+    def __str__(self) -> str:
+        return (
+            f"{self.positions} positions: max |dpi| {self.max_policy_diff:.2e}, "
+            f"mean KL {self.mean_kl:.2e}, max |dv| {self.max_value_diff:.2e}, "
+            f"top-1 agreement {self.top1_agreement:.1%}"
+        )
+
+
+def check_accuracy(
+    reference: "NNetWrapper",
+    candidate: "NNetWrapper",
+    positions: Sequence[PolyclashState],
+    batch_size: int = 32,
+) -> AccuracyReport:
+    """Compare the masked policies and values of two networks.
+
+    The KL divergence is that of ``candidate``'s policy from
+    ``reference``'s, over the legal moves.
+    """
+    policy_diff = value_diff = kl_sum = 0.0
+    agree = 0
+    for start in range(0, len(positions), batch_size):
+        chunk = positions[start : start + batch_size]
+        for (pi, v), (qi, w) in zip(
+            reference.predict_batch(chunk), candidate.predict_batch(chunk)
+        ):
+            policy_diff = max(policy_diff, float(np.abs(pi - qi).max()))
+            value_diff = max(value_diff, abs(v - w))
+            legal = pi > 0
+            kl_sum += float(
+                np.sum(pi[legal] * (np.log(pi[legal]) - np.log(qi[legal] + 1e-12)))
+            )
+            agree += int(np.argmax(pi) == np.argmax(qi))
+    count = len(positions)
+    return AccuracyReport(
+        positions=count,
+        max_policy_diff=policy_diff,
+        mean_kl=kl_sum / max(count, 1),
+        max_value_diff=value_diff,
+        top1_agreement=agree / max(count, 1),
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    from polyclash.ai.nn.nnet import NNetWrapper
+    from polyclash.ai.polyclash.game_adapter import PolyclashGame
+
+    parser = argparse.ArgumentParser(
+        description="Export a checkpoint as a TorchScript artefact for CPU inference"
+    )
+    parser.add_argument("checkpoint_dir")
+    parser.add_argument("checkpoint_file")
+    parser.add_argument("output", help="path of the TorchScript artefact")
+    parser.add_argument(
+        "--int8", action="store_true", help="quantize linear layers to int8"
+    )
+    parser.add_argument(
+        "--check",
+        type=int,
+        default=100,
+        metavar="N",
+        help="compare with the eager model on N positions (0 to skip)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    game = PolyclashGame(sym_samples=0)
+    eager = NNetWrapper(game)
+    eager.load_checkpoint(args.checkpoint_dir, args.checkpoint_file)
+    module = export_model(eager, quantize=args.int8)
+    save_model(module, args.output)
+    log.info("Saved %s", args.output)
+
+    if args.check > 0:
+        exported = NNetWrapper(game)
+        exported.use_backend(
+            "torchscript-int8" if args.int8 else "torchscript", args.output
+        )
+        positions = sample_positions(game, args.check, seed=args.seed)
+        print(check_accuracy(eager, exported, positions))
+
+
+if __name__ == "__main__":
+    main()
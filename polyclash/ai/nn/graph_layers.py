@@ -1,16 +1,34 @@
 """Lightweight graph message-passing layers for spherical Go.
 
-Uses precomputed edge_index in COO format. No external GNN library needed.
-The graph is small (302 nodes, ~1200 edges) so scatter-based ops are fine.
+The graph is given as an edge_index in COO format. No external GNN library
+needed: the graph is small (302 nodes, 1200 edges), so mean aggregation over
+neighbours is a matmul with a dense, degree-normalised (N, N) adjacency,
+which ``GraphEncoder`` builds once for its graph.
 """
 
 from __future__ import annotations
 
+from typing import Optional
+
 import torch
 import torch.nn.functional as F
 from torch import nn
 
 
+def normalized_adjacency(edge_index: torch.Tensor, num_nodes: int) -> torch.Tensor:
+    """Dense (N, N) mean-aggregation operator of a COO edge list.
+
+    Row i holds 1/deg(i) at every source j of an edge j -> i (repeated
+    edges count repeatedly); nodes without incoming edges get a zero row.
+    """
+    src, dst = edge_index.to(torch.long)
+    adjacency = torch.zeros(num_nodes, num_nodes, device=edge_index.device)
+    adjacency.index_put_(
+        (dst, src), torch.ones(src.shape[0], device=edge_index.device), accumulate=True
+    )
+    return adjacency / adjacency.sum(dim=1, keepdim=True).clamp(min=1.0)
+
+
 class GraphConvBlock(nn.Module):
     """Simple message-passing block with residual connection.
 
@@ -26,39 +44,17 @@ class GraphConvBlock(nn.Module):
         self.linear_upd = nn.Linear(hidden_size * 2, hidden_size)
         self.norm = nn.LayerNorm(hidden_size)
 
-    def forward(
-        self, x: torch.Tensor, edge_index: torch.Tensor, num_nodes: int
-    ) -> torch.Tensor:
+    def forward(self, x: torch.Tensor, adjacency: torch.Tensor) -> torch.Tensor:
         """
         Args:
             x: (B, N, D) node features
-            edge_index: (2, E) int64 COO edge list (same for all items in batch)
-            num_nodes: N
+            adjacency: (N, N) operator from ``normalized_adjacency``
         Returns:
             (B, N, D) updated node features
         """
-        src, dst = edge_index  # (E,), (E,)
-        B, N, D = x.shape
-
-        # Gather source node features: (B, E, D)
-        x_src = x[:, src]
-
-        # Transform messages
-        msgs = self.linear_msg(x_src)  # (B, E, D)
-
-        # Aggregate by destination (mean pooling)
-        # Use scatter_add then divide by degree
-        agg = torch.zeros(B, N, D, device=x.device, dtype=x.dtype)
-        dst_expanded = dst.unsqueeze(0).unsqueeze(-1).expand(B, -1, D)
-        agg.scatter_add_(1, dst_expanded, msgs)
-
-        # Degree normalization
-        deg = torch.zeros(N, device=x.device, dtype=x.dtype)
-        deg.scatter_add_(
-            0, dst, torch.ones(dst.shape[0], device=x.device, dtype=x.dtype)
-        )
-        deg = deg.clamp(min=1.0)
-        agg = agg / deg.unsqueeze(0).unsqueeze(-1)
+        # Transform messages per node, then average them over the neighbours
+        msgs = self.linear_msg(x)  # (B, N, D)
+        agg = torch.matmul(adjacency.to(msgs.dtype), msgs)  # (B, N, D)
 
         # Update: concat aggregated + self, project, residual
         combined = torch.cat([agg, x], dim=-1)  # (B, N, 2D)
@@ -69,17 +65,50 @@ class GraphConvBlock(nn.Module):
 
 
 class GraphEncoder(nn.Module):
-    """Stack of GraphConvBlocks for encoding the spherical board."""
+    """Stack of GraphConvBlocks for encoding the spherical board.
+
+    With ``edge_index`` and ``num_nodes`` given, the adjacency of that graph
+    is built once and kept as a (non-persistent) buffer; ``forward`` uses it
+    whenever it is called with the same graph and builds the adjacency of
+    any other graph on the fly.
+    """
+
+    edge_index: Optional[torch.Tensor]
+    adjacency: Optional[torch.Tensor]
 
-    def __init__(self, hidden_size: int, num_layers: int = 2) -> None:
+    def __init__(
+        self,
+        hidden_size: int,
+        num_layers: int = 2,
+        edge_index: Optional[torch.Tensor] = None,
+        num_nodes: Optional[int] = None,
+    ) -> None:
         super().__init__()
         self.layers = nn.ModuleList(
             [GraphConvBlock(hidden_size) for _ in range(num_layers)]
         )
+        adjacency = None
+        if edge_index is not None and num_nodes is not None:
+            edge_index = edge_index.to(torch.long)
+            adjacency = normalized_adjacency(edge_index, num_nodes)
+        self.register_buffer("edge_index", edge_index, persistent=False)
+        self.register_buffer("adjacency", adjacency, persistent=False)
+
+    def _adjacency(self, edge_index: torch.Tensor, num_nodes: int) -> torch.Tensor:
+        if (
+            self.adjacency is not None
+            and self.edge_index is not None
+            and self.adjacency.shape[0] == num_nodes
+            and self.edge_index.shape == edge_index.shape
+            and torch.equal(self.edge_index, edge_index.to(self.edge_index.device))
+        ):
+            return self.adjacency
+        return normalized_adjacency(edge_index, num_nodes)
 
     def forward(
         self, x: torch.Tensor, edge_index: torch.Tensor, num_nodes: int
     ) -> torch.Tensor:
+        adjacency = self._adjacency(edge_index, num_nodes)
         for layer in self.layers:
-            x = layer(x, edge_index, num_nodes)
+            x = layer(x, adjacency)
         return x
@@ -15,6 +15,22 @@ class HierarchicalReasoningModelCache:
     L: List[List[Cache]]
 
 
+@dataclass
+class HierarchicalReasoningModelHalting:
+    """Adaptive halting of the HRM recurrence, for inference.
+
+    Halting is decided after every L step. A sample stops, from step
+    ``min_steps`` on, once the L block's output is within ``threshold`` of
+    its input, measured as 1 - cosine similarity, and after ``max_steps``
+    (default: the model's ``H_cycles * L_cycles``) at the latest. A halted
+    sample still takes its H update, on the z_L it has reached.
+    """
+
+    min_steps: int = 1
+    max_steps: Optional[int] = None
+    threshold: float = 1e-2
+
+
 class HierarchicalReasoningModelConfig(TransformerConfig):
     H_cycles: int
     L_cycles: int
@@ -74,7 +90,11 @@ class HierarchicalReasoningModel(nn.Module):
         x: torch.Tensor,
         carry: HierarchicalReasoningModelCarry,
         cache: Optional[HierarchicalReasoningModelCache] = None,
+        halting: Optional[HierarchicalReasoningModelHalting] = None,
     ) -> Tuple[HierarchicalReasoningModelCarry, torch.Tensor]:
+        if halting is not None:
+            return self._forward_halting(x, carry, halting, cache)
+
         # Forward iterations
         with torch.no_grad():
             z_H, z_L = carry["z_H"], carry["z_L"]
@@ -104,3 +124,63 @@ class HierarchicalReasoningModel(nn.Module):
             HierarchicalReasoningModelCarry(z_H=z_H.detach(), z_L=z_L.detach()),
             z_H,
         )  # Ensure no gradient moves across carry
+
+    def _forward_halting(
+        self,
+        x: torch.Tensor,
+        carry: HierarchicalReasoningModelCarry,
+        halting: HierarchicalReasoningModelHalting,
+        cache: Optional[HierarchicalReasoningModelCache],
+    ) -> Tuple[HierarchicalReasoningModelCarry, torch.Tensor]:
+        """Run the L and H steps until every sample has halted.
+
+        Halted samples drop out of the batch, so the later steps only
+        compute the rest. The returned carry also holds ``steps``, the
+        number of L steps each sample ran.
+        """
+        if self.training or cache is not None:
+            raise ValueError("Adaptive halting is for inference without a cache")
+        max_steps = halting.max_steps or self.H_cycles * self.L_cycles
+
+        with torch.no_grad():
+            z_H, z_L = carry["z_H"], carry["z_L"]
+            steps = torch.zeros(x.shape[0], dtype=torch.long, device=x.device)
+            active = torch.arange(x.shape[0], device=x.device)
+            high, low, injection = z_H, z_L, x
+
+            for step in range(1, max_steps + 1):
+                block_input = low + high + injection
+                low = self.L_level(low, high + injection)
+                steps[active] = step
+
+                if step == max_steps:
+                    halt = torch.ones_like(active, dtype=torch.bool)
+                elif step >= halting.min_steps:
+                    similarity = torch.cosine_similarity(
+                        block_input.flatten(1), low.flatten(1), dim=1
+                    )
+                    halt = 1 - similarity < halting.threshold
+                else:
+                    halt = torch.zeros_like(active, dtype=torch.bool)
+                halting_any = bool(halt.any())
+
+                if step % self.L_cycles == 0:
+                    high = self.H_level(high, low)
+                elif halting_any:
+                    rows = halt.nonzero().squeeze(1)
+                    high = high.index_copy(0, rows, self.H_level(high[rows], low[rows]))
+
+                if halting_any:
+                    done = active[halt]
+                    z_H = z_H.index_copy(0, done, high[halt])
+                    z_L = z_L.index_copy(0, done, low[halt])
+                    keep = ~halt
+                    active = active[keep]
+                    if active.numel() == 0:
+                        break
+                    high, low, injection = high[keep], low[keep], injection[keep]
+
+        return (
+            HierarchicalReasoningModelCarry(z_H=z_H, z_L=z_L, steps=steps),
+            z_H,
+        )
@@ -15,12 +15,14 @@ from huggingface_hub import PyTorchModelHubMixin
 from torch import nn
 
 from polyclash.ai.polyclash.topology import NUM_POINTS
+from polyclash.ai.polyclash.topology import edge_index as board_edges
 
 from .graph_layers import GraphEncoder
 from .hrm import (
     HierarchicalReasoningModel,
     HierarchicalReasoningModelCarry,
     HierarchicalReasoningModelConfig,
+    HierarchicalReasoningModelHalting,
 )
 
 
@@ -68,7 +70,12 @@ class GraphHRMModel(
         self.cls_token = nn.Parameter(torch.zeros(1, 1, hidden))
 
         # Graph encoder (local message passing)
-        self.graph_encoder = GraphEncoder(hidden, num_layers=graph_layers)
+        self.graph_encoder = GraphEncoder(
+            hidden,
+            num_layers=graph_layers,
+            edge_index=torch.as_tensor(board_edges),
+            num_nodes=NUM_POINTS,
+        )
 
         # HRM backbone (global reasoning)
         # Use pos_emb_type="none" since we handle positions via graph structure
@@ -137,6 +144,7 @@ class GraphHRMModel(
         coords: torch.Tensor,
         area_w: torch.Tensor,
         return_aux: bool = False,
+        halting: HierarchicalReasoningModelHalting | None = None,
     ) -> tuple[torch.Tensor, ...]:
         """
         Args:
@@ -146,12 +154,16 @@ class GraphHRMModel(
             coords: (302, 3) float32 3D coordinates
             area_w: (302,) float32 per-point area weights
             return_aux: if True, also return score and ownership predictions
+            halting: stop the HRM recurrence early (inference only, see
+                ``HierarchicalReasoningModelHalting``)
         Returns:
             logits: (B, 303) policy logits
             v:      (B, 1)   value in [-1, 1]
             (if return_aux)
             score:  (B, 1)   predicted score diff in [-1, 1]
             own:    (B, 302) ownership logits per point
+            (if halting)
+            steps:  (B,)     L steps run per sample, always last
         """
         # Embed
         x = self._embed(stones, node_type, coords, area_w)  # (B, 302, D)
@@ -166,7 +178,8 @@ class GraphHRMModel(
 
         # HRM backbone
         carry = self._init_carry(x)
-        _, z = self.backbone(x, carry, cache=None)  # z: (B, 303, D)
+        # z: (B, 303, D)
+        carry, z = self.backbone(x, carry, cache=None, halting=halting)
         z = self.head_norm(z)
 
         cls_tok = z[:, 0]  # (B, D)
@@ -178,9 +191,11 @@ class GraphHRMModel(
 
         v = torch.tanh(self.value_head(cls_tok))  # (B, 1)
 
-        if not return_aux:
-            return logits, v
-
-        score = torch.tanh(self.score_head(cls_tok))  # (B, 1)
-        own = self.ownership_head(board_tok).squeeze(-1)  # (B, 302)
-        return logits, v, score, own
+        out: tuple[torch.Tensor, ...] = (logits, v)
+        if return_aux:
+            score = torch.tanh(self.score_head(cls_tok))  # (B, 1)
+            own = self.ownership_head(board_tok).squeeze(-1)  # (B, 302)
+            out += (score, own)
+        if halting is not None:
+            out += (carry["steps"],)
+        return out
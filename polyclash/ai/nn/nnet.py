@@ -8,7 +8,7 @@ from __future__ import annotations
 
 import logging
 import os
-from typing import List, Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
 
 import numpy as np
 
@@ -27,6 +27,7 @@ try:
     from torch import nn
     from torch.nn import functional as F
 
+    from polyclash.ai.nn.hrm import HierarchicalReasoningModelHalting
     from polyclash.ai.nn.model import GraphHRMModel
 except Exception as e:
     print(f"WARNING: Failed to import torch dependencies: {e}")
@@ -35,6 +36,18 @@ except Exception as e:
 
 log = logging.getLogger(__name__)
 
+BACKENDS = ("eager", "torchscript", "torchscript-int8")
+
+
+def _masked_softmax(logits: "torch.Tensor", legal: "torch.Tensor") -> "torch.Tensor":
+    """Row-wise softmax over the legal entries, in float64.
+
+    Rows without a legal entry get a uniform distribution over all entries.
+    """
+    logits = logits.double().masked_fill(~legal, float("-inf"))
+    logits[~legal.any(dim=1)] = 0.0
+    return torch.softmax(logits, dim=1)
+
 
 class NNetWrapper(NeuralNet):
     """Spherical Go NNet wrapper — device-agnostic, graph-aware."""
@@ -44,6 +57,12 @@ class NNetWrapper(NeuralNet):
         self.action_size_val = game.action_size()
         self.device = None
         self.torch_model: Optional[nn.Module] = None
+        self.backend = "eager"
+        self.exported: Optional["torch.jit.ScriptModule"] = None
+        self.halting: Optional["HierarchicalReasoningModelHalting"] = None
+        # Positions evaluated with halting, and the L steps they took
+        self.halted_positions = 0
+        self.halted_steps = 0
 
         # Precompute graph tensors (shared across all forward passes)
         self._edge_index_np = edge_index
@@ -82,6 +101,81 @@ class NNetWrapper(NeuralNet):
 
             log.info(f"NeuralNet on device: {self.device}")
 
+    def use_backend(self, backend: str, path: Optional[str] = None) -> None:
+        """Choose what runs the forward pass of ``predict``/``predict_batch``.
+
+        ``"eager"`` runs ``torch_model``. ``"torchscript"`` and
+        ``"torchscript-int8"`` run an artefact of ``polyclash.ai.nn.export``
+        (the latter with int8 linear layers), loaded from ``path`` or else
+        exported from the current weights. The artefact is a snapshot:
+        switch backends again after loading or training new weights.
+        Exported backends run on the CPU only. ``train`` always uses
+        ``torch_model``.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}; expected one of {BACKENDS}")
+        if backend == "eager":
+            self.backend, self.exported = backend, None
+            return
+        if self.torch_model is None or self.device is None:
+            raise RuntimeError(f"Backend {backend!r} needs torch")
+        if self.device.type != "cpu":
+            raise ValueError(f"Backend {backend!r} runs on the CPU, not {self.device}")
+
+        from polyclash.ai.nn.export import export_model, load_model
+
+        if path is not None:
+            self.exported = load_model(path)
+        else:
+            self.exported = export_model(self, quantize=backend == "torchscript-int8")
+        self.backend = backend
+        log.info("NeuralNet backend: %s", backend)
+
+    def use_halting(
+        self,
+        threshold: Optional[float] = 1e-2,
+        min_steps: int = 1,
+        max_steps: Optional[int] = None,
+    ) -> None:
+        """Let each position stop its HRM recurrence early; None turns it off.
+
+        See ``HierarchicalReasoningModelHalting`` for the parameters. Only
+        the eager backend halts. ``mean_steps`` reports the L steps taken.
+        """
+        if threshold is None:
+            self.halting = None
+            return
+        self.halting = HierarchicalReasoningModelHalting(
+            min_steps=min_steps, max_steps=max_steps, threshold=threshold
+        )
+        self.halted_positions = self.halted_steps = 0
+
+    def mean_steps(self) -> float:
+        """Average L steps per position evaluated with halting."""
+        mean: float = self.halted_steps / max(self.halted_positions, 1)
+        return mean
+
+    def _forward(self, stones: "torch.Tensor"):
+        """(policy_logits, value) of the selected backend."""
+        if self.exported is not None:
+            return self.exported(stones)
+        assert self.torch_model is not None
+        self.torch_model.eval()
+        out = self.torch_model(
+            stones,
+            self._edge_index_t,
+            self._node_type_t,
+            self._coords_t,
+            self._area_weight_t,
+            halting=self.halting,
+        )
+        if self.halting is None:
+            return out
+        logits, v, steps = out
+        self.halted_positions += len(steps)
+        self.halted_steps += int(steps.sum())
+        return logits, v
+
     def _state_to_stones(self, state: PolyclashState) -> np.ndarray:
         """Extract stones array from a PolyclashState."""
         return np.array(state.stones, dtype=np.int64)
@@ -193,50 +287,61 @@ class NNetWrapper(NeuralNet):
             avg_loss = total_loss / max(num_batches, 1)
             log.info(f"  Epoch {epoch + 1}/{epochs} avg_loss={avg_loss:.4f}")
 
-    def predict(self, board: PolyclashState):
+    def predict(self, board: PolyclashState, valids: Optional[np.ndarray] = None):
+        """Return (pi, v) for ``board``; see ``predict_batch`` for ``valids``."""
         if self.torch_model is not None and self.device is not None:
-            self.torch_model.eval()
-            with torch.no_grad():
-                stones = self._state_to_stones(board)
-                stones_t = torch.tensor(
-                    stones, dtype=torch.long, device=self.device
-                ).unsqueeze(0)
-
-                logits, v = self.torch_model(
-                    stones_t,
-                    self._edge_index_t,
-                    self._node_type_t,
-                    self._coords_t,
-                    self._area_weight_t,
-                )
-                logits = logits[0]
-                v = v[0, 0].item()
-
-                # Mask invalid moves
-                valids = self.game.valid_moves(board, 1).astype(np.float64)
-                logits_np = logits.detach().cpu().numpy().astype(np.float64)
-                max_logit = np.max(logits_np)
-                exp_logits = np.exp(logits_np - max_logit) * valids
-                if exp_logits.sum() <= 0:
-                    if valids.sum() > 0:
-                        pi = valids / valids.sum()
-                    else:
-                        pi = np.ones_like(valids) / len(valids)
-                else:
-                    pi = exp_logits / exp_logits.sum()
-                return pi, float(v)
+            return self.predict_batch([board], [valids])[0]
 
         # Dummy path
-        valids = self.game.valid_moves(board, 1)
+        if valids is None:
+            valids = self.game.valid_moves(board, 1)
         if np.sum(valids) == 0:
             pi = np.ones(self.action_size_val, dtype=np.float64) / float(
                 self.action_size_val
             )
         else:
-            pi = valids.astype(np.float64)
-            pi /= np.sum(pi)
+            pi = np.asarray(valids, dtype=np.float64)
+            pi = pi / np.sum(pi)
         return pi, 0.0
 
+    def predict_batch(
+        self,
+        boards: Sequence[PolyclashState],
+        valids: Optional[Sequence[Optional[np.ndarray]]] = None,
+    ):
+        """Evaluate several positions with one forward pass.
+
+        ``valids`` optionally holds the legal-move mask of each board, for
+        callers that have already computed it; a None entry (or no
+        ``valids`` at all) is computed here. The masked softmax runs in
+        torch over the whole batch.
+
+        Returns a list of (pi, v) pairs; pi is a float64 array of move
+        probabilities over the legal moves (uniform over all actions if
+        there are none).
+        """
+        if not boards:
+            return []
+        if valids is None:
+            valids = [None] * len(boards)
+        if self.torch_model is None or self.device is None:
+            return [self.predict(board, mask) for board, mask in zip(boards, valids)]
+
+        masks = np.stack(
+            [
+                self.game.valid_moves(board, 1) if mask is None else mask
+                for board, mask in zip(boards, valids)
+            ]
+        )
+        with torch.no_grad():
+            stones_t = torch.from_numpy(np.stack([board.stones for board in boards]))
+            logits, v = self._forward(stones_t.to(device=self.device, dtype=torch.long))
+            legal = torch.from_numpy(masks).to(self.device) > 0
+            pi = _masked_softmax(logits, legal).cpu().numpy()
+            values = v[:, 0].double().cpu().numpy()
+
+        return [(pi[i], float(values[i])) for i in range(len(boards))]
+
     def save_checkpoint(self, folder="checkpoint", filename="checkpoint.pkl"):
         os.makedirs(folder, exist_ok=True)
         filepath = os.path.join(folder, filename)
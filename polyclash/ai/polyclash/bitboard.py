@@ -0,0 +1,100 @@
+"""Compact bitboard form of a spherical Go position.
+
+A position is two 302-bit masks (black, white) held as Python ints: bit ``p``
+is set when point ``p`` carries a stone of that colour. Packed, a position is
+2 × 38 = 76 bytes, against 302 bytes for an int8 stones array. The rules
+engines keep working on stones arrays; this is a conversion and storage
+format, used for the transposition keys and the boards an MCTS tree keeps.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from polyclash.ai.polyclash.topology import NUM_POINTS
+
+BLACK = 1
+WHITE = -1
+
+MASK_BYTES: int = (NUM_POINTS + 7) // 8
+
+
+def iter_points(mask: int) -> list[int]:
+    """Return the indices of the set bits of ``mask`` in ascending order."""
+    points: list[int] = np.flatnonzero(_bools_from_mask(mask)).tolist()
+    return points
+
+
+def _mask_from_bools(flags: np.ndarray) -> int:
+    packed = np.packbits(flags.astype(np.uint8), bitorder="little")
+    return int.from_bytes(packed.tobytes(), "little")
+
+
+def _bools_from_mask(mask: int) -> np.ndarray:
+    packed = np.frombuffer(mask.to_bytes(MASK_BYTES, "little"), dtype=np.uint8)
+    return np.unpackbits(packed, bitorder="little")[:NUM_POINTS].astype(bool)
+
+
+class Bitboard:
+    """Immutable pair of black/white 302-bit masks.
+
+    Attributes:
+        black: int, bit p set iff point p holds a BLACK stone
+        white: int, bit p set iff point p holds a WHITE stone
+    """
+
+    __slots__ = ("black", "white")
+
+    black: int
+    white: int
+
+    def __init__(self, black: int = 0, white: int = 0) -> None:
+        assert not black & white, "a point cannot hold two stones"
+        object.__setattr__(self, "black", black)
+        object.__setattr__(self, "white", white)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError("Bitboard is immutable")
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Bitboard):
+            return NotImplemented
+        return self.black == other.black and self.white == other.white
+
+    def __hash__(self) -> int:
+        return hash((self.black, self.white))
+
+    def __repr__(self) -> str:
+        return (
+            f"Bitboard(black={self.black.bit_count()} stones, "
+            f"white={self.white.bit_count()} stones)"
+        )
+
+    @staticmethod
+    def from_stones(stones: np.ndarray) -> Bitboard:
+        """Build from a (302,) array with values in {-1, 0, 1}."""
+        stones = np.asarray(stones)[:NUM_POINTS]
+        return Bitboard(
+            _mask_from_bools(stones == BLACK), _mask_from_bools(stones == WHITE)
+        )
+
+    def to_stones(self) -> np.ndarray:
+        """Return the position as a (302,) int8 array."""
+        stones = np.zeros(NUM_POINTS, dtype=np.int8)
+        stones[_bools_from_mask(self.black)] = BLACK
+        stones[_bools_from_mask(self.white)] = WHITE
+        return stones
+
+    def to_bytes(self) -> bytes:
+        """Pack into 76 bytes (black mask then white mask, little-endian)."""
+        return self.black.to_bytes(MASK_BYTES, "little") + self.white.to_bytes(
+            MASK_BYTES, "little"
+        )
+
+    @staticmethod
+    def from_bytes(data: bytes) -> Bitboard:
+        """Inverse of ``to_bytes``."""
+        return Bitboard(
+            int.from_bytes(data[:MASK_BYTES], "little"),
+            int.from_bytes(data[MASK_BYTES:], "little"),
+        )
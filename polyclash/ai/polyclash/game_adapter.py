@@ -9,15 +9,19 @@ from __future__ import annotations
 import numpy as np
 
 from polyclash.ai.core.game import Game
+from polyclash.ai.polyclash.bitboard import Bitboard
+from polyclash.ai.polyclash.history import EMPTY_HISTORY, HashHistory
 from polyclash.ai.polyclash.rules import (
     BLACK,
     WHITE,
     apply_move,
+    is_terminal,
     score,
     terminal_result,
     valid_moves,
 )
 from polyclash.ai.polyclash.state import PolyclashState
+from polyclash.ai.polyclash.symmetry import ACTION_PERMS, canonical_key
 from polyclash.ai.polyclash.topology import (
     ACTION_SIZE,
     NUM_POINTS,
@@ -25,6 +29,10 @@ from polyclash.ai.polyclash.topology import (
     symmetry_perms,
 )
 
+# (bitboard bytes, ko_point, consecutive_passes, move_count, zobrist_hash,
+# history_hashes), see PolyclashGame.pack_board
+PackedState = tuple[bytes, int, int, int, int, HashHistory]
+
 
 class PolyclashGame(Game):
     """Spherical Go on a snub dodecahedron (302 vertices).
@@ -79,6 +87,9 @@ class PolyclashGame(Game):
         """
         return terminal_result(board)
 
+    def is_terminal(self, board: PolyclashState) -> bool:
+        return is_terminal(board)
+
     def canonical_form(self, board: PolyclashState, player: int) -> PolyclashState:
         """Return board from current player's perspective.
 
@@ -123,7 +134,7 @@ class PolyclashGame(Game):
                 consecutive_passes=board.consecutive_passes,
                 move_count=board.move_count,
                 zobrist_hash=0,
-                history_hashes=frozenset(),
+                history_hashes=EMPTY_HISTORY,
             )
 
             # Permute policy: new_pi[i] = old_pi[perm[i]]
@@ -138,6 +149,37 @@ class PolyclashGame(Game):
     def representation(self, board: PolyclashState) -> bytes:
         return board.representation()
 
+    def symmetry_key(self, board: PolyclashState) -> tuple[bytes, np.ndarray]:
+        """Rotation-invariant key, see ``symmetry.canonical_key``."""
+        key, k = canonical_key(board)
+        return key, ACTION_PERMS[k]
+
+    def pack_board(self, board: PolyclashState) -> PackedState:
+        """Keep the stones as the 76 bytes of their Bitboard.
+
+        The tree keeps every node's board; this drops the stones array and
+        the cached group index, and shares the hash history.
+        """
+        return (
+            board.bitboard().to_bytes(),
+            board.ko_point,
+            board.consecutive_passes,
+            board.move_count,
+            board.zobrist_hash,
+            board.history_hashes,
+        )
+
+    def unpack_board(self, packed: PackedState) -> PolyclashState:
+        data, ko_point, passes, move_count, zobrist_hash, history = packed
+        return PolyclashState.from_bitboard(
+            Bitboard.from_bytes(data),
+            ko_point=ko_point,
+            consecutive_passes=passes,
+            move_count=move_count,
+            zobrist_hash=zobrist_hash,
+            history_hashes=history,
+        )
+
     def score_board(self, board: PolyclashState) -> tuple[float, float, float]:
         """Score under area rules. Returns (black_ratio, white_ratio, unclaimed_ratio)."""
         return score(board)
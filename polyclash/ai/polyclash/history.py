@@ -0,0 +1,157 @@
+"""Persistent position-hash history for positional superko.
+
+Every ``PolyclashState`` carries the Zobrist hashes of all positions seen so
+far. Copying a frozenset on each move makes a game of n moves cost O(n^2)
+insertions and gives every state in a search tree its own O(n) set.
+
+``HashHistory`` is instead a parent-linked chain: appending a hash allocates
+one node that points at the previous history, so a child state shares all of
+its parent's history. The chain is cut into segments of ``SEGMENT`` hashes:
+
+- the hashes before the current segment sit in one frozenset, built once when
+  the segment starts and shared by every node of the segment (and by every
+  branch that grows from it);
+- the hashes of the current segment are summarised by a small Bloom filter,
+  so a lookup only walks the (at most ``SEGMENT``) segment nodes on a Bloom
+  hit.
+
+A membership test is therefore a Bloom check, rarely a short walk, and one
+frozenset lookup; ``push`` is O(1) apart from the frozenset built every
+``SEGMENT`` moves.
+
+    >>> history = HashHistory().push(h1).push(h2)
+    >>> h1 in history, len(history)
+    (True, 2)
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Set
+
+SEGMENT = 32
+_BLOOM_SHIFT = 9  # 512-bit filter per segment
+_BLOOM_INDEX = (1 << _BLOOM_SHIFT) - 1
+
+
+def _bloom_bits(value: int) -> int:
+    """Three filter bits taken from disjoint slices of a 64-bit hash."""
+    return (
+        (1 << (value & _BLOOM_INDEX))
+        | (1 << ((value >> _BLOOM_SHIFT) & _BLOOM_INDEX))
+        | (1 << ((value >> 2 * _BLOOM_SHIFT) & _BLOOM_INDEX))
+    )
+
+
+class HashHistory(Set[int]):
+    """Immutable set of position hashes with O(1) ``push``.
+
+    Behaves as a read-only ``Set[int]`` (``in``, ``len``, iteration newest
+    first, comparison with other sets). ``push`` returns a new history and
+    leaves this one untouched; nodes are never modified after ``push``, which
+    is what makes sharing them between states safe. The one exception is
+    ``_next_base``, a memo of the base that children starting a new segment
+    get: it is built by the first such child and reused by its siblings.
+    """
+
+    __slots__ = (
+        "_head",
+        "_parent",
+        "_bloom",
+        "_depth",
+        "_base",
+        "_next_base",
+        "_length",
+    )
+
+    _head: int
+    _parent: HashHistory | None
+    _bloom: int  # Bloom filter of the current segment
+    _depth: int  # number of nodes of the current segment, this one included
+    _base: frozenset[int]  # every hash before the current segment
+    _next_base: frozenset[int] | None  # _base plus this segment, once built
+    _length: int
+
+    def __init__(self) -> None:
+        self._head = 0
+        self._parent = None
+        self._bloom = 0
+        self._depth = 0
+        self._base = frozenset()
+        self._next_base = None
+        self._length = 0
+
+    @classmethod
+    def _from_iterable(  # type: ignore[override]
+        cls, values: Iterable[int]
+    ) -> HashHistory:
+        history = cls()
+        for value in values:
+            if value not in history:
+                history = history.push(value)
+        return history
+
+    @classmethod
+    def of(cls, values: Iterable[int]) -> HashHistory:
+        """Return ``values`` as a HashHistory, without copying if it is one."""
+        if isinstance(values, HashHistory):
+            return values
+        return cls._from_iterable(values)
+
+    def _segment(self) -> Iterator[int]:
+        """Hashes of the current segment, newest first."""
+        node = self
+        for _ in range(self._depth):
+            yield node._head
+            assert node._parent is not None
+            node = node._parent
+
+    def push(self, value: int) -> HashHistory:
+        """Return this history extended by ``value``.
+
+        ``value`` must not already be in the history (``apply_move`` checks
+        for superko before pushing); it is not checked again here.
+        """
+        node = HashHistory.__new__(HashHistory)
+        node._head = value
+        node._parent = self
+        node._next_base = None
+        node._length = self._length + 1
+        if self._depth < SEGMENT:
+            node._bloom = self._bloom | _bloom_bits(value)
+            node._depth = self._depth + 1
+            node._base = self._base
+        else:
+            node._bloom = _bloom_bits(value)
+            node._depth = 1
+            base = self._next_base
+            if base is None:
+                # Built once per parent; every sibling starts from it
+                base = self._next_base = self._base.union(self._segment())
+            node._base = base
+        return node
+
+    def __contains__(self, value: object) -> bool:
+        if not isinstance(value, int):
+            return False
+        bits = _bloom_bits(value)
+        if self._bloom & bits == bits and value in self._segment():
+            return True
+        return value in self._base
+
+    def __iter__(self) -> Iterator[int]:
+        node = self
+        while node._parent is not None:
+            yield node._head
+            node = node._parent
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __hash__(self) -> int:
+        return self._hash()
+
+    def __repr__(self) -> str:
+        return f"HashHistory({self._length} hashes)"
+
+
+EMPTY_HISTORY = HashHistory()
@@ -20,17 +20,13 @@ from collections import deque
 
 import numpy as np
 
+from polyclash.ai.polyclash.scoring import score_batch
 from polyclash.ai.polyclash.state import PolyclashState
 from polyclash.ai.polyclash.topology import (
     ACTION_SIZE,
     NUM_POINTS,
     PASS_ACTION,
     neighbor_tuple,
-    polylarge_area,
-    polylarges,
-    polysmall_area,
-    polysmalls,
-    total_area,
 )
 
 BLACK = 1
@@ -52,6 +48,15 @@ def _init_zobrist() -> tuple[list[int], list[int]]:
 
 ZOBRIST_BLACK, ZOBRIST_WHITE = _init_zobrist()
 
+# Neighbour table padded to degree 5; the padding points at an extra slot
+# (index NUM_POINTS) that holds neither a colour nor EMPTY.
+_MAX_DEGREE = max(len(nbs) for nbs in neighbor_tuple)
+_NEIGHBORS = np.array(
+    [list(nbs) + [NUM_POINTS] * (_MAX_DEGREE - len(nbs)) for nbs in neighbor_tuple],
+    dtype=np.intp,
+)
+_PAD = 2
+
 
 def find_group(stones: np.ndarray, point: int) -> tuple[set[int], set[int]]:
     """Find the connected group and its liberties starting from point.
@@ -111,6 +116,74 @@ def _has_liberty(stones: np.ndarray, point: int) -> bool:
     return False
 
 
+def _place_with_groups(
+    stones: np.ndarray,
+    groups: tuple[np.ndarray, np.ndarray],
+    player: int,
+    action: int,
+) -> tuple[np.ndarray, list[int]] | None:
+    """Place a stone using the group index: O(degree) plus the captures.
+
+    Opponent groups whose last liberty is the action are captured; the stone
+    keeps a liberty if it has an empty neighbour, captures, or joins a group
+    with a liberty elsewhere.
+
+    Returns:
+        (new_stones, captured points), or None for suicide.
+    """
+    labels, liberties = groups
+    captured_groups: set[int] = set()
+    has_liberty = False
+    for nb in neighbor_tuple[action]:
+        value = stones[nb]
+        if value == EMPTY:
+            has_liberty = True
+        elif value == player:
+            if liberties[nb] > 1:
+                has_liberty = True
+        elif liberties[nb] == 1:
+            captured_groups.add(int(labels[nb]))
+
+    if not has_liberty and not captured_groups:
+        return None
+
+    new_stones = np.array(stones, dtype=np.int8)
+    new_stones[action] = player
+    captured: list[int] = []
+    if captured_groups:
+        captured = np.flatnonzero(np.isin(labels, list(captured_groups))).tolist()
+        new_stones[captured] = EMPTY
+    return new_stones, captured
+
+
+def _place_with_flood_fill(
+    stones: np.ndarray, player: int, action: int
+) -> tuple[np.ndarray, list[int]] | None:
+    """Place a stone by flood-filling the neighbouring groups.
+
+    Cheaper than building the group index for a state that is only moved
+    from once. Same contract as ``_place_with_groups``.
+    """
+    new_stones = np.array(stones, dtype=np.int8)
+    new_stones[action] = player
+
+    # Capture opponent groups with zero liberties
+    captured: list[int] = []
+    opponent = -player
+    for nb in neighbor_tuple[action]:
+        if new_stones[nb] == opponent:
+            group, liberties = find_group(new_stones, nb)
+            if not liberties:
+                for p in group:
+                    new_stones[p] = EMPTY
+                    captured.append(p)
+
+    # Check suicide (fast early-exit version)
+    if not _has_liberty(new_stones, action):
+        return None
+    return new_stones, captured
+
+
 def apply_move(
     state: PolyclashState, player: int, action: int
 ) -> PolyclashState | None:
@@ -139,23 +212,14 @@ def apply_move(
     if state.stones[action] != EMPTY:
         return None
 
-    new_stones = np.array(state.stones, dtype=np.int8)
-    new_stones[action] = player
-
-    # Capture opponent groups with zero liberties
-    captured: list[int] = []
-    opponent = -player
-    for nb in neighbor_tuple[action]:
-        if new_stones[nb] == opponent:
-            group, liberties = find_group(new_stones, nb)
-            if not liberties:
-                for p in group:
-                    new_stones[p] = EMPTY
-                    captured.append(p)
-
-    # Check suicide (fast early-exit version)
-    if not _has_liberty(new_stones, action):
+    groups = state.cached_groups()
+    if groups is not None:
+        placed = _place_with_groups(state.stones, groups, player, action)
+    else:
+        placed = _place_with_flood_fill(state.stones, player, action)
+    if placed is None:
         return None  # suicide forbidden
+    new_stones, captured = placed
 
     # Compute Zobrist hash for the new position
     new_hash = state.zobrist_hash
@@ -169,7 +233,7 @@ def apply_move(
     if new_hash in state.history_hashes:
         return None
 
-    new_history = state.history_hashes | {new_hash}
+    new_history = state.history_hashes.push(new_hash)
 
     return state.with_stones(
         stones=new_stones,
@@ -181,104 +245,39 @@ def apply_move(
 
 
 def valid_moves(state: PolyclashState, player: int) -> np.ndarray:
-    """Return binary vector of size ACTION_SIZE (303). 1 = legal, 0 = illegal."""
+    """Return binary vector of size ACTION_SIZE (303). 1 = legal, 0 = illegal.
+
+    An empty point is legal unless it is suicide: it needs an empty
+    neighbour, an own neighbouring group with another liberty, or an
+    opponent neighbouring group whose last liberty it takes. All three are
+    read off the cached group liberty counts, for every point at once.
+    """
     valids = np.zeros(ACTION_SIZE, dtype=np.int32)
     stones = state.stones
-    opponent = -player
-
-    # Single mutable copy reused for all points
-    stones_sim = np.array(stones, dtype=np.int8)
-
-    for point in range(NUM_POINTS):
-        if stones[point] != EMPTY:
-            continue
-
-        # Simulate placement (mutate in place, revert after)
-        stones_sim[point] = player
-
-        # Check if any adjacent opponent group is captured (has no liberty)
-        captures_any = False
-        for nb in neighbor_tuple[point]:
-            if stones_sim[nb] == opponent:
-                if not _has_liberty(stones_sim, nb):
-                    captures_any = True
-                    break
-
-        if captures_any:
-            valids[point] = 1
-            stones_sim[point] = EMPTY  # revert
-            continue
-
-        # No captures — check if own group has liberties (suicide check)
-        if _has_liberty(stones_sim, point):
-            valids[point] = 1
-
-        stones_sim[point] = EMPTY  # revert
+    _, liberties = state.groups()
+
+    nb_stones = np.append(stones, np.int8(_PAD))[_NEIGHBORS]
+    nb_liberties = np.append(liberties, np.int16(0))[_NEIGHBORS]
+    breathes = (
+        (nb_stones == EMPTY)
+        | ((nb_stones == player) & (nb_liberties > 1))
+        | ((nb_stones == -player) & (nb_liberties == 1))
+    )
+    valids[:NUM_POINTS] = (stones == EMPTY) & breathes.any(axis=1)
 
     # Pass is always legal
     valids[PASS_ACTION] = 1
     return valids
 
 
-def _calculate_face_area(
-    stones: np.ndarray, face: np.ndarray, area: float
-) -> tuple[float, float, float]:
-    """Calculate area contribution of a single face (polysmall or polylarge).
-
-    Each face is defined by its vertex indices. The area is divided among
-    the colors present at those vertices.
-    """
-    parties = stones[face]
-    parties_set = set(parties.tolist())
-
-    has_black = BLACK in parties_set
-    has_white = WHITE in parties_set
-
-    if not has_black and not has_white:
-        return 0.0, 0.0, area  # unclaimed
-    if has_black and not has_white:
-        return area, 0.0, 0.0  # all black
-    if has_white and not has_black:
-        return 0.0, area, 0.0  # all white
-
-    # Mixed: divide proportionally
-    black_count = int(np.sum(parties == BLACK))
-    white_count = int(np.sum(parties == WHITE))
-    total_colored = black_count + white_count
-    return (
-        area * black_count / total_colored,
-        area * white_count / total_colored,
-        0.0,
-    )
-
-
 def score(state: PolyclashState) -> tuple[float, float, float]:
     """Calculate area-based score.
 
     Returns:
         (black_ratio, white_ratio, unclaimed_ratio): each in [0, 1], summing to 1.
     """
-    total_black = 0.0
-    total_white = 0.0
-    total_unclaimed = 0.0
-
-    for row in polysmalls:
-        b, w, u = _calculate_face_area(state.stones, row, polysmall_area)
-        total_black += b
-        total_white += w
-        total_unclaimed += u
-
-    for row in polylarges:
-        b, w, u = _calculate_face_area(state.stones, row, polylarge_area)
-        total_black += b
-        total_white += w
-        total_unclaimed += u
-
-    return (
-        total_black / total_area,
-        total_white / total_area,
-        total_unclaimed / total_area,
-    )
+    black, white, unclaimed = score_batch(state.stones).tolist()
+    return black, white, unclaimed
 
 
 def is_terminal(state: PolyclashState) -> bool:
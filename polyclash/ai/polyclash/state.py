@@ -8,17 +8,56 @@ The state is designed to be:
 Superko is tracked via Zobrist hashing: ``zobrist_hash`` stores the
 current position hash and ``history_hashes`` accumulates all past
 position hashes so that positional superko can be enforced in the
-rules engine.
+rules engine. The history is a persistent ``HashHistory``, shared between
+a state and the states derived from it.
 """
 
 from __future__ import annotations
 
 import struct
+from collections.abc import Iterable
 from typing import Final
 
 import numpy as np
 
-from polyclash.ai.polyclash.topology import NUM_POINTS
+from polyclash.ai.polyclash.bitboard import Bitboard
+from polyclash.ai.polyclash.history import EMPTY_HISTORY, HashHistory
+from polyclash.ai.polyclash.topology import NUM_POINTS, neighbor_tuple
+
+
+def _label_groups(stones: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Label the groups of a position in one pass.
+
+    Returns:
+        (labels, liberties): int16 arrays of shape (302,). labels[p] is the
+        lowest point of the group containing p and liberties[p] the number of
+        liberties of that group; both are -1 and 0 for empty points.
+    """
+    values = stones.tolist()
+    labels = [-1] * NUM_POINTS
+    liberties = [0] * NUM_POINTS
+    for point in range(NUM_POINTS):
+        color = values[point]
+        if color == 0 or labels[point] != -1:
+            continue
+        labels[point] = point
+        members = [point]
+        libs: set[int] = set()
+        for member in members:
+            for nb in neighbor_tuple[member]:
+                value = values[nb]
+                if value == 0:
+                    libs.add(nb)
+                elif value == color and labels[nb] == -1:
+                    labels[nb] = point
+                    members.append(nb)
+        for member in members:
+            liberties[member] = len(libs)
+    label_array = np.array(labels, dtype=np.int16)
+    liberty_array = np.array(liberties, dtype=np.int16)
+    label_array.flags.writeable = False
+    liberty_array.flags.writeable = False
+    return label_array, liberty_array
 
 
 class PolyclashState:
@@ -31,7 +70,11 @@ class PolyclashState:
         consecutive_passes: int, number of consecutive passes (game ends at 2)
         move_count: int, total moves played so far
         zobrist_hash: int, Zobrist hash of the current position
-        history_hashes: frozenset[int], all past position hashes (for superko)
+        history_hashes: HashHistory, all past position hashes (for superko);
+                        any iterable of ints is accepted and converted
+
+    Derived views of the position (``bitboard()``, ``groups()``) are built on
+    first use and cached on the state.
     """
 
     __slots__ = (
@@ -41,6 +84,8 @@ class PolyclashState:
         "move_count",
         "zobrist_hash",
         "history_hashes",
+        "_bitboard",
+        "_groups",
     )
 
     stones: Final[np.ndarray]  # type: ignore[misc]
@@ -48,7 +93,9 @@ class PolyclashState:
     consecutive_passes: Final[int]  # type: ignore[misc]
     move_count: Final[int]  # type: ignore[misc]
     zobrist_hash: Final[int]  # type: ignore[misc]
-    history_hashes: Final[frozenset[int]]  # type: ignore[misc]
+    history_hashes: Final[HashHistory]  # type: ignore[misc]
+    _bitboard: Bitboard | None
+    _groups: tuple[np.ndarray, np.ndarray] | None
 
     def __init__(
         self,
@@ -57,7 +104,7 @@ class PolyclashState:
         consecutive_passes: int = 0,
         move_count: int = 0,
         zobrist_hash: int = 0,
-        history_hashes: frozenset[int] = frozenset(),
+        history_hashes: Iterable[int] = EMPTY_HISTORY,
     ) -> None:
         stones = np.asarray(stones, dtype=np.int8)
         assert stones.shape == (NUM_POINTS,)
@@ -68,7 +115,9 @@ class PolyclashState:
         object.__setattr__(self, "consecutive_passes", consecutive_passes)
         object.__setattr__(self, "move_count", move_count)
         object.__setattr__(self, "zobrist_hash", zobrist_hash)
-        object.__setattr__(self, "history_hashes", history_hashes)
+        object.__setattr__(self, "history_hashes", HashHistory.of(history_hashes))
+        object.__setattr__(self, "_bitboard", None)
+        object.__setattr__(self, "_groups", None)
 
     def __setattr__(self, name: str, value: object) -> None:
         raise AttributeError("PolyclashState is immutable")
@@ -82,16 +131,62 @@ class PolyclashState:
             consecutive_passes=0,
             move_count=0,
             zobrist_hash=0,
-            history_hashes=frozenset(),
+            history_hashes=EMPTY_HISTORY,
+        )
+
+    @staticmethod
+    def from_bitboard(
+        bitboard: Bitboard,
+        ko_point: int = -1,
+        consecutive_passes: int = 0,
+        move_count: int = 0,
+        zobrist_hash: int = 0,
+        history_hashes: Iterable[int] = EMPTY_HISTORY,
+    ) -> PolyclashState:
+        """Create a state from a Bitboard position."""
+        state = PolyclashState(
+            stones=bitboard.to_stones(),
+            ko_point=ko_point,
+            consecutive_passes=consecutive_passes,
+            move_count=move_count,
+            zobrist_hash=zobrist_hash,
+            history_hashes=history_hashes,
         )
+        object.__setattr__(state, "_bitboard", bitboard)
+        return state
+
+    def bitboard(self) -> Bitboard:
+        """Return the position as a Bitboard (built on first use, then cached)."""
+        bitboard = self._bitboard
+        if bitboard is None:
+            bitboard = Bitboard.from_stones(self.stones)
+            object.__setattr__(self, "_bitboard", bitboard)
+        return bitboard
+
+    def groups(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return (labels, liberties) of the groups, see ``_label_groups``.
+
+        Lets the rules engine decide captures and suicide from the liberty
+        counts of the neighbouring groups without a flood fill.
+        """
+        groups = self._groups
+        if groups is None:
+            groups = _label_groups(self.stones)
+            object.__setattr__(self, "_groups", groups)
+        return groups
+
+    def cached_groups(self) -> tuple[np.ndarray, np.ndarray] | None:
+        """Return ``groups()`` if it has already been built, else None."""
+        return self._groups
 
     def representation(self) -> bytes:
         """Unique hashable representation for MCTS transposition table.
 
         Includes stones, zobrist_hash, ko_point, and consecutive_passes to
-        avoid false transpositions.
+        avoid false transpositions. The stones take the 76 bytes of their
+        Bitboard.
         """
-        return self.stones.tobytes() + struct.pack(
+        return self.bitboard().to_bytes() + struct.pack(
             "<QhB", self.zobrist_hash, self.ko_point, self.consecutive_passes
         )
 
@@ -102,7 +197,7 @@ class PolyclashState:
         consecutive_passes: int = 0,
         move_count: int | None = None,
         zobrist_hash: int | None = None,
-        history_hashes: frozenset[int] | None = None,
+        history_hashes: Iterable[int] | None = None,
     ) -> PolyclashState:
         """Create a new state with updated fields."""
         return PolyclashState(
@@ -120,7 +215,7 @@ class PolyclashState:
 
     def flip(self) -> PolyclashState:
         """Flip stone colors (for canonical form). BLACK <-> WHITE."""
-        return PolyclashState(
+        flipped = PolyclashState(
             stones=-self.stones,
             ko_point=self.ko_point,
             consecutive_passes=self.consecutive_passes,
@@ -128,3 +223,6 @@ class PolyclashState:
             zobrist_hash=self.zobrist_hash,
             history_hashes=self.history_hashes,
         )
+        # Group shapes do not depend on colour
+        object.__setattr__(flipped, "_groups", self._groups)
+        return flipped
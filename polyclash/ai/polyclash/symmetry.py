@@ -0,0 +1,119 @@
+"""Symmetry-canonical positions for transposition keys and evaluation caches.
+
+The 60 rotations in ``topology.symmetry_perms`` map a position onto up to 60
+equivalent ones. ``canonicalize`` picks one representative per orbit — the
+rotation whose stones array is lexicographically smallest — so searches and
+caches keyed on it see all rotations of a position as the same entry:
+
+    >>> canonical, k = canonicalize(state)
+    >>> pi = policy_from_canonical(nnet_policy(canonical), k)
+
+Conventions follow ``symmetry_perms`` (``perm[new] = old``): point ``i`` of the
+canonical position is point ``ACTION_PERMS[k][i]`` of the original one, and
+PASS_ACTION maps to itself.
+"""
+
+from __future__ import annotations
+
+import struct
+
+import numpy as np
+
+from polyclash.ai.polyclash.bitboard import Bitboard
+from polyclash.ai.polyclash.rules import ZOBRIST_BLACK, ZOBRIST_WHITE
+from polyclash.ai.polyclash.state import PolyclashState
+from polyclash.ai.polyclash.topology import (
+    ACTION_SIZE,
+    NUM_POINTS,
+    PASS_ACTION,
+    symmetry_perms,
+)
+
+NUM_SYMMETRIES = len(symmetry_perms)
+
+
+def _action_perms() -> tuple[np.ndarray, np.ndarray]:
+    perms = np.empty((NUM_SYMMETRIES, ACTION_SIZE), dtype=np.intp)
+    perms[:, :NUM_POINTS] = symmetry_perms
+    perms[:, PASS_ACTION] = PASS_ACTION
+    inverse = np.empty_like(perms)
+    np.put_along_axis(
+        inverse, perms, np.broadcast_to(np.arange(ACTION_SIZE), perms.shape), axis=1
+    )
+    perms.flags.writeable = False
+    inverse.flags.writeable = False
+    return perms, inverse
+
+
+# ACTION_PERMS[k][i]: action of the original position for canonical action i;
+# INVERSE_ACTION_PERMS[k] undoes it.
+ACTION_PERMS, INVERSE_ACTION_PERMS = _action_perms()
+_POINT_PERMS = np.ascontiguousarray(ACTION_PERMS[:, :NUM_POINTS])
+_ZOBRIST = np.array([ZOBRIST_WHITE, [0] * NUM_POINTS, ZOBRIST_BLACK], dtype=np.uint64)
+
+
+def canonical_index(stones: np.ndarray) -> int:
+    """Index of the rotation that maps ``stones`` to its orbit representative.
+
+    Ties (positions with a non-trivial stabiliser, e.g. the empty board) go to
+    the lowest index, so the result is deterministic.
+    """
+    rotated = (np.asarray(stones, dtype=np.int8) + 1).astype(np.uint8)[_POINT_PERMS]
+    data = rotated.tobytes()
+    return min(
+        range(NUM_SYMMETRIES), key=lambda k: data[k * NUM_POINTS : (k + 1) * NUM_POINTS]
+    )
+
+
+def canonicalize(state: PolyclashState) -> tuple[PolyclashState, int]:
+    """Return (canonical_state, k) for the orbit of ``state``.
+
+    The canonical state carries the rotated stones and ko point, its own
+    Zobrist hash and the same pass and move counters. Position hashes do not
+    rotate, so its superko history is empty: it is meant for keys and
+    evaluation, not for continuing the game.
+    """
+    k = canonical_index(state.stones)
+    if k == 0:
+        return state, 0
+    stones = state.stones[_POINT_PERMS[k]]
+    ko_point = state.ko_point
+    if ko_point >= 0:
+        ko_point = int(INVERSE_ACTION_PERMS[k][ko_point])
+    zobrist = np.bitwise_xor.reduce(_ZOBRIST[stones + 1, np.arange(NUM_POINTS)])
+    canonical = PolyclashState(
+        stones=stones,
+        ko_point=ko_point,
+        consecutive_passes=state.consecutive_passes,
+        move_count=state.move_count,
+        zobrist_hash=int(zobrist),
+    )
+    return canonical, k
+
+
+def canonical_key(state: PolyclashState) -> tuple[bytes, int]:
+    """Return (key, k): a rotation-invariant transposition key and the
+    rotation index that produced it.
+
+    Cheaper than ``canonicalize`` since it skips building the canonical state
+    and its hash; the key covers the stones, ko point and pass count.
+    """
+    k = canonical_index(state.stones)
+    ko_point = state.ko_point
+    if ko_point >= 0:
+        ko_point = int(INVERSE_ACTION_PERMS[k][ko_point])
+    key = Bitboard.from_stones(state.stones[_POINT_PERMS[k]]).to_bytes()
+    key += struct.pack("<hB", ko_point, state.consecutive_passes)
+    return key, k
+
+
+def policy_to_canonical(pi: np.ndarray, k: int) -> np.ndarray:
+    """Map a (303,) per-action vector of a position onto its canonical form."""
+    mapped: np.ndarray = np.asarray(pi)[ACTION_PERMS[k]]
+    return mapped
+
+
+def policy_from_canonical(pi: np.ndarray, k: int) -> np.ndarray:
+    """Inverse of ``policy_to_canonical``."""
+    mapped: np.ndarray = np.asarray(pi)[INVERSE_ACTION_PERMS[k]]
+    return mapped
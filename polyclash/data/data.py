@@ -1519,6 +1519,24 @@ axis[6] = -axis[2]
 axis[7] = -axis[3]
 axis = axis / np.linalg.norm(axis, axis=1)[:, np.newaxis]
 
+# Pairwise distances between all points, indexed [point1, point2]: Euclidean
+# between cities, and geodesic as the great-circle angle (in radians) between
+# their directions from the centre. inverse_distances is 1 / distances with 0
+# on the diagonal.
+distances = np.linalg.norm(cities[:, np.newaxis, :] - cities[np.newaxis, :, :], axis=-1)
+# arctan2 of |a x b| and a . b is accurate for small angles, unlike arccos
+geodesic_distances = np.arctan2(
+    np.linalg.norm(
+        np.cross(cities[:, np.newaxis, :], cities[np.newaxis, :, :]), axis=-1
+    ),
+    cities @ cities.T,
+)
+inverse_distances = np.divide(
+    1.0, distances, out=np.zeros_like(distances), where=distances > 0
+)
+for _table in (distances, geodesic_distances, inverse_distances):
+    _table.flags.writeable = False
+
 
 def get_areas():
     phi = (1 + np.sqrt(5)) / 2
@@ -1,19 +1,29 @@
+import atexit
 import hashlib
 import math
+import multiprocessing
 import os
+import random
+import threading
+import time
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
 from random import sample
+from typing import Iterable, Iterator, MutableSet
 
 import numpy as np
 
+from polyclash.ai.polyclash.bitboard import iter_points
+from polyclash.ai.polyclash.scoring import FACES, NUM_SMALL_FACES, face_counts
 from polyclash.data.data import (
-    cities,
+    distances,
     encoder,
+    inverse_distances,
     neighbors,
     polylarge_area,
-    polylarges,
     polysmall_area,
-    polysmalls,
     total_area,
 )
 
@@ -24,6 +34,14 @@ WHITE = -1
 # Override with POLYCLASH_KOMI environment variable.
 DEFAULT_KOMI: float = float(os.environ.get("POLYCLASH_KOMI", "0.025"))
 
+# Parallel move ranking: number of worker processes (0 or 1 = serial), and the
+# minimum number of candidate points before the work is fanned out.
+# Override with POLYCLASH_RANK_WORKERS / POLYCLASH_RANK_MIN_CANDIDATES.
+DEFAULT_RANK_WORKERS: int = int(os.environ.get("POLYCLASH_RANK_WORKERS", "0"))
+DEFAULT_RANK_MIN_CANDIDATES: int = int(
+    os.environ.get("POLYCLASH_RANK_MIN_CANDIDATES", "32")
+)
+
 
 def _init_zobrist() -> tuple[list[int], list[int]]:
     """Generate Zobrist random numbers deterministically from a seed."""
@@ -39,6 +57,194 @@ def _init_zobrist() -> tuple[list[int], list[int]]:
 
 ZOBRIST_BLACK, ZOBRIST_WHITE = _init_zobrist()
 
+# Incremental scoring works on the faces (polysmalls then polylarges, in the
+# order of polyclash.ai.polyclash.scoring.FACES) that touch each point. A face
+# is split among the colours on its vertices, so its share is tracked in
+# integer units of 1/12 of its area (exact for 1..4 stones) and converted to
+# an area ratio only in Board.score().
+_FACE_UNITS = 12
+_NUM_SMALL = NUM_SMALL_FACES
+_FACES: list[list[int]] = FACES.tolist()
+_FACES_OF: list[list[int]] = [[] for _ in range(302)]
+for _ix, _face in enumerate(_FACES):
+    for _v in _face:
+        _FACES_OF[_v].append(_ix)
+_FACE_SPLIT = [
+    [
+        (
+            (0, 0, _FACE_UNITS)
+            if b + w == 0
+            else (_FACE_UNITS * b // (b + w), _FACE_UNITS * w // (b + w), 0)
+        )
+        for w in range(5)
+    ]
+    for b in range(5)
+]
+
+
+@dataclass
+class MoveRecord:
+    """Everything ``Board.pop_move`` needs to take back one move.
+
+    ``gid`` is the group the placed stone ended up in. If it joined existing
+    groups, ``base_len`` is the length of the base group before the move and
+    ``merged`` lists the ``(gid, size)`` of the other groups appended to it,
+    in order; ``liberties`` keeps the liberty sets those groups had before.
+    """
+
+    point: int
+    player: int
+    zobrist_hash: int
+    latest_player: int | None
+    gid: int = -1
+    base_len: int = -1
+    merged: list[tuple[int, int]] = field(default_factory=list)
+    liberties: dict[int, set[int]] = field(default_factory=dict)
+    enemies: list[int] = field(default_factory=list)
+    captured: list[tuple[int, list[int]]] = field(default_factory=list)
+    # (player, point, added) changes to the suicide caches, in order
+    suicides: list[tuple[int, int, bool]] = field(default_factory=list)
+
+
+def _search_schedule() -> Iterator[tuple[int, int]]:
+    """(max_depth, trail) of the successive anytime re-rankings.
+
+    Deepens and widens the sampled replies, then keeps widening at depth 2
+    until the caller's deadline stops it.
+    """
+    yield from ((2, 2), (2, 4), (3, 2), (2, 8), (3, 4))
+    trail = 16
+    while True:
+        yield 2, trail
+        trail *= 2
+
+
+# Process pools for rank_moves, one per pool size, created on first use;
+# server requests may ask for one concurrently, so creation is locked
+_rank_pools: dict[int, ProcessPoolExecutor] = {}
+_rank_pools_lock = threading.Lock()
+_worker_board: "SimulatedBoard | None" = None
+
+
+def _init_rank_worker() -> None:
+    # Importing this module has already loaded the topology and distance
+    # tables; keep one simulator per worker process for all its shards.
+    global _worker_board
+    _worker_board = SimulatedBoard()
+
+
+def _simulate_shard(
+    data: dict, points: list[int], player: int, seed: int, max_depth: int, trail: int
+) -> list[tuple[float, float]]:
+    """Worker side of the parallel rank_moves: simulate_score for ``points``."""
+    assert _worker_board is not None
+    random.seed(seed)
+    _worker_board.redirect(Board.from_dict(data))
+    return [
+        _worker_board.simulate_score(0, point, player, max_depth, trail)
+        for point in points
+    ]
+
+
+def _get_rank_pool(workers: int) -> ProcessPoolExecutor:
+    with _rank_pools_lock:
+        pool = _rank_pools.get(workers)
+        if pool is None:
+            # Spawn rather than fork: the server process runs threads (and may
+            # hold torch state) that a forked child would inherit mid-flight.
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_rank_worker,
+            )
+            _rank_pools[workers] = pool
+    return pool
+
+
+def _discard_rank_pool(workers: int, pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool, unless another request has replaced it already."""
+    with _rank_pools_lock:
+        if _rank_pools.get(workers) is pool:
+            del _rank_pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_rank_pools() -> None:
+    """Shut down the worker processes used by parallel rank_moves."""
+    with _rank_pools_lock:
+        pools = list(_rank_pools.values())
+        _rank_pools.clear()
+    for pool in pools:
+        pool.shutdown(cancel_futures=True)
+
+
+atexit.register(shutdown_rank_pools)
+
+
+class _StoneArray(np.ndarray):
+    """The ``Board.board`` array: flags its Board when written to directly.
+
+    Index assignments on the array or on views of it set the Board's
+    ``_dirty`` flag, so the incremental index is rebuilt before its next
+    use. Arithmetic on it gives plain arrays.
+    """
+
+    _owner: "Board | None"
+
+    def __array_finalize__(self, obj) -> None:
+        owner = getattr(obj, "_owner", None)
+        self._owner = owner if np.may_share_memory(self, obj) else None
+
+    def __array_wrap__(self, arr, context=None, return_scalar=False):
+        return arr[()] if return_scalar else arr.view(np.ndarray)
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        if self._owner is not None:
+            self._owner._dirty = True
+
+
+class _SuicideSet(MutableSet[int]):
+    """A mutable set of points that also keeps them as a bitmask, ``mask``.
+
+    Every mutation goes through ``add``/``discard``, so the mask never needs
+    rebuilding.
+    """
+
+    __slots__ = ("_points", "mask")
+
+    def __init__(self, points: Iterable[int] = ()) -> None:
+        self._points: set[int] = set()
+        self.mask = 0
+        self.update(points)
+
+    def __contains__(self, point: object) -> bool:
+        return point in self._points
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._points)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({sorted(self._points)})"
+
+    def add(self, point: int) -> None:
+        self._points.add(point)
+        self.mask |= 1 << point
+
+    def discard(self, point: int) -> None:
+        self._points.discard(point)
+        self.mask &= ~(1 << point)
+
+    def update(self, points: Iterable[int]) -> None:
+        for point in points:
+            self.add(point)
+
+    def copy(self) -> set[int]:
+        return set(self._points)
+
 
 def calculate_area(boarddata, piece, area):
     black_area, white_area, unclaimed_area = 0, 0, 0
@@ -63,19 +269,23 @@ def calculate_area(boarddata, piece, area):
 
 
 def calculate_distance(point1, point2):
-    city1 = cities[point1]
-    city2 = cities[point2]
-    return np.linalg.norm(city1 - city2)
+    return distances[point1, point2]
+
+
+def calculate_potentials(board, points, counter) -> np.ndarray:
+    """Potential of every point in ``points`` in one matrix-vector product.
+
+    The potential of a point is the sum of inverse distances to all stones on
+    the board, scaled by a factor that shrinks as the game goes on.
+    """
+    occupied = (np.asarray(board)[: len(inverse_distances)] != 0).astype(np.float64)
+    scale = float(np.tanh(0.5 - counter / 302))
+    potentials: np.ndarray = inverse_distances[points] @ occupied
+    return potentials * scale
 
 
 def calculate_potential(board, point, counter):
-    potential = 0
-    for i, stone in enumerate(board):
-        if stone != 0:
-            distance = calculate_distance(point, i)
-            if distance > 0:
-                potential += (1 / distance) * np.tanh(0.5 - counter / 302)
-    return potential
+    return float(calculate_potentials(board, [point], counter)[0])
 
 
 class Board:
@@ -86,12 +296,13 @@ class Board:
         self.neighbors = neighbors
         self.latest_player: int | None = None
         self.latest_removes: list[list[int]] = [[]]
-        self.black_suicides: set[int] = set()
-        self.white_suicides: set[int] = set()
+        self.black_suicides = set()
+        self.white_suicides = set()
 
         self.turns: OrderedDict[int, tuple[int, ...]] = OrderedDict()
 
         self._observers: list[object] = []
+        self._per_stone_observers: list[object] = []
         self.notification_enabled = True
 
         self.simulator: "SimulatedBoard | None" = None
@@ -100,17 +311,98 @@ class Board:
         self.history_hashes: set[int] = set()
         self.komi: float = DEFAULT_KOMI
         self.consecutive_passes: int = 0
+        self.rank_workers: int = DEFAULT_RANK_WORKERS
+        self.rank_min_candidates: int = DEFAULT_RANK_MIN_CANDIDATES
+
+        # Incremental group index, see _rebuild()
+        self._group_of: list[int] = []
+        self._group_stones: dict[int, list[int]] = {}
+        self._group_libs: dict[int, set[int]] = {}
+        # Incremental score: stones per face and area units per face kind
+        self._face_black: list[int] = []
+        self._face_white: list[int] = []
+        self._area_units: list[list[int]] = []
+        # Empty points: swap-remove list with positions, and a bitmask
+        self._empty_points: list[int] = []
+        self._empty_pos: list[int] = []
+        self._empty_mask: int = 0
+        self._undo: list[MoveRecord] = []
+        self._last_move: MoveRecord | None = None
+        self._rebuild()
+
+    @property
+    def board(self) -> np.ndarray:
+        """The stones, one entry per point.
+
+        Writing to it directly (``board.board[p] = color`` or assigning a
+        new array) is allowed; the incremental index is rebuilt lazily.
+        """
+        return self._board
+
+    @board.setter
+    def board(self, value) -> None:
+        stones = np.array(value, copy=True).view(_StoneArray)
+        stones._owner = self
+        self._board = stones
+        # Plain view for the writes of play and friends, which keep the
+        # index up to date themselves
+        self._stones = stones.view(np.ndarray)
+        self._dirty = True
+
+    def __getstate__(self) -> dict:
+        # _board and _stones are two views of one array, tied to this Board;
+        # copy the stones once and rebuild the views in __setstate__.
+        state = self.__dict__.copy()
+        del state["_board"], state["_stones"]
+        state["board"] = self._stones.copy()
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        state = state.copy()
+        stones = state.pop("board")
+        dirty = state.pop("_dirty")
+        self.__dict__.update(state)
+        self.board = stones
+        self._dirty = dirty
+
+    @property
+    def black_suicides(self) -> _SuicideSet:
+        """Points known to be suicide for BLACK; they may be edited directly."""
+        return self._black_suicides
+
+    @black_suicides.setter
+    def black_suicides(self, points) -> None:
+        self._black_suicides = _SuicideSet(points)
+
+    @property
+    def white_suicides(self) -> _SuicideSet:
+        """Points known to be suicide for WHITE; they may be edited directly."""
+        return self._white_suicides
+
+    @white_suicides.setter
+    def white_suicides(self, points) -> None:
+        self._white_suicides = _SuicideSet(points)
 
     @property
     def counter(self):
         return len(self.turns)
 
-    def register_observer(self, observer):
+    def register_observer(self, observer, per_stone: bool = False):
+        """Register an observer for board notifications.
+
+        Captures are reported as a single ``captures`` event listing every
+        removed point. Observers registered with ``per_stone=True`` get one
+        ``remove_stone`` event per removed stone instead.
+        """
         if observer not in self._observers:
             self._observers.append(observer)
+            if per_stone:
+                self._per_stone_observers.append(observer)
 
     def unregister_observer(self, observer):
         self._observers.remove(observer)
+        if observer in self._per_stone_observers:
+            self._per_stone_observers.remove(observer)
 
     def enable_notification(self):
         self.notification_enabled = True
@@ -123,6 +415,23 @@ class Board:
             if self.notification_enabled:
                 observer.handle_notification(message, **kwargs)
 
+    def _notify_captures(self, points, score):
+        # One event for the whole capture, sent to batched observers only
+        if not self.notification_enabled:
+            return
+        for observer in self._observers:
+            if observer not in self._per_stone_observers:
+                observer.handle_notification("captures", points=points, score=score)
+
+    def _notify_removed(self, point):
+        # Per-stone event, sent only to observers that opted in
+        if not self.notification_enabled:
+            return
+        for observer in self._per_stone_observers:
+            observer.handle_notification(
+                "remove_stone", point=point, score=self.score()
+            )
+
     def has_liberty(self, point, color=None, visited=None):
         if color is None:
             color = self.board[point]
@@ -146,22 +455,150 @@ class Board:
         # 如果所有路径都检查完毕，仍然没有发现有气，返回False
         return False
 
-    def remove_stone(self, point: int) -> None:
-        color = self.board[point]
-        if color == BLACK:
-            self.zobrist_hash ^= ZOBRIST_BLACK[point]
-        elif color == WHITE:
-            self.zobrist_hash ^= ZOBRIST_WHITE[point]
-        self.board[point] = 0
-        self.latest_removes[-1].append(point)
-        # Removing a stone may open liberties, so clear cached suicide sets
-        self.black_suicides.discard(point)
-        self.white_suicides.discard(point)
-        self.notify_observers("remove_stone", point=point, score=self.score())
+    def _rebuild(self) -> None:
+        """Rebuild the group index and score counters from ``self.board``.
 
-        for neighbor in self.neighbors[point]:
-            if self.board[neighbor] == color:
-                self.remove_stone(neighbor)
+        ``_group_of[p]`` is the id of the group occupying ``p`` (-1 if empty),
+        ``_group_stones[gid]`` its stones and ``_group_libs[gid]`` its liberties.
+        ``_face_black``/``_face_white`` count the stones on each face and
+        ``_area_units[kind]`` holds the black/white/unclaimed units of the small
+        (0) and large (1) faces. ``_empty_points`` lists the empty points in no
+        particular order, ``_empty_pos[p]`` is the index of ``p`` in it (-1 if
+        occupied) and ``_empty_mask`` has bit ``p`` set for every empty point.
+        ``play`` and ``remove_stone`` keep all of these up to date
+        incrementally; direct writes to ``board`` set ``_dirty`` instead.
+
+        Pending ``push_move`` records refer to the old index and are dropped.
+        """
+        self._undo = []
+        self._dirty = False
+        stones = self._stones.tolist()
+        self._group_of = [-1] * self.board_size
+        self._group_stones = {}
+        self._group_libs = {}
+        for point in range(self.board_size):
+            color = stones[point]
+            if color == 0 or self._group_of[point] != -1:
+                continue
+            members = [point]
+            liberties: set[int] = set()
+            self._group_of[point] = point
+            for member in members:
+                for neighbor in self.neighbors[member]:
+                    if stones[neighbor] == 0:
+                        liberties.add(neighbor)
+                    elif stones[neighbor] == color and self._group_of[neighbor] == -1:
+                        self._group_of[neighbor] = point
+                        members.append(neighbor)
+            self._group_stones[point] = members
+            self._group_libs[point] = liberties
+
+        self._empty_points = [p for p in range(self.board_size) if stones[p] == 0]
+        self._empty_pos = [-1] * self.board_size
+        self._empty_mask = 0
+        for ix, point in enumerate(self._empty_points):
+            self._empty_pos[point] = ix
+            self._empty_mask |= 1 << point
+
+        face_black, face_white = face_counts(self._stones[: self.board_size])
+        self._face_black = face_black.tolist()
+        self._face_white = face_white.tolist()
+        self._area_units = [[0, 0, 0], [0, 0, 0]]
+        for ix, (black, white) in enumerate(zip(self._face_black, self._face_white)):
+            units = self._area_units[ix >= _NUM_SMALL]
+            for k, u in enumerate(_FACE_SPLIT[black][white]):
+                units[k] += u
+
+    def _sync(self) -> None:
+        # self.board is public and may be assigned or written to directly
+        # (from_dict, SimulatedBoard.redirect, tests); resync the index if so.
+        if self._dirty:
+            self._rebuild()
+
+    def _set_point(self, point: int, color: int) -> None:
+        """Set one point and update the empties and score counters."""
+        old = self._stones[point]
+        self._stones[point] = color
+        if old == 0 and color != 0:
+            # Swap-remove from the empty list
+            ix = self._empty_pos[point]
+            last = self._empty_points.pop()
+            if last != point:
+                self._empty_points[ix] = last
+                self._empty_pos[last] = ix
+            self._empty_pos[point] = -1
+            self._empty_mask &= ~(1 << point)
+        elif old != 0 and color == 0:
+            self._empty_pos[point] = len(self._empty_points)
+            self._empty_points.append(point)
+            self._empty_mask |= 1 << point
+        face_black, face_white = self._face_black, self._face_white
+        for ix in _FACES_OF[point]:
+            black, white = face_black[ix], face_white[ix]
+            before = _FACE_SPLIT[black][white]
+            if old == BLACK:
+                black -= 1
+            elif old == WHITE:
+                white -= 1
+            if color == BLACK:
+                black += 1
+            elif color == WHITE:
+                white += 1
+            after = _FACE_SPLIT[black][white]
+            face_black[ix], face_white[ix] = black, white
+            units = self._area_units[ix >= _NUM_SMALL]
+            units[0] += after[0] - before[0]
+            units[1] += after[1] - before[1]
+            units[2] += after[2] - before[2]
+
+    def _add_suicide(self, player: int, point: int) -> None:
+        suicides = self.black_suicides if player == BLACK else self.white_suicides
+        if point not in suicides:
+            suicides.add(point)
+            if self._undo:
+                self._undo[-1].suicides.append((player, point, True))
+
+    def _remove_group(self, gid: int, record: MoveRecord | None = None) -> None:
+        members = self._group_stones.pop(gid)
+        del self._group_libs[gid]
+        color = self._stones[gid]
+        keys = ZOBRIST_BLACK if color == BLACK else ZOBRIST_WHITE
+        for point in members:
+            self._group_of[point] = -1
+            self.zobrist_hash ^= keys[point]
+            self._set_point(point, 0)
+            self.latest_removes[-1].append(point)
+            # Removing a stone may open liberties, so clear cached suicide sets
+            for side, suicides in (
+                (BLACK, self.black_suicides),
+                (WHITE, self.white_suicides),
+            ):
+                if point in suicides:
+                    suicides.discard(point)
+                    if record is not None:
+                        record.suicides.append((side, point, False))
+            if self._per_stone_observers:
+                self._notify_removed(point)
+
+        for point in members:
+            for neighbor in self.neighbors[point]:
+                group = self._group_of[neighbor]
+                if group != -1:
+                    self._group_libs[group].add(point)
+
+    def remove_stone(self, point: int) -> None:
+        self._sync()
+        gid = self._group_of[point]
+        if gid == -1:
+            return
+        # Remove the requested stone first, then the rest of its group
+        members = self._group_stones[gid]
+        members.remove(point)
+        members.insert(0, point)
+        removed = list(members)
+        self._remove_group(gid)
+        if self.notification_enabled and self._observers:
+            self._notify_captures(removed, self.score())
 
     def reset(self) -> None:
         self.board = np.zeros([self.board_size])
@@ -173,6 +610,7 @@ class Board:
         self.zobrist_hash = 0
         self.history_hashes = set()
         self.consecutive_passes = 0
+        self._rebuild()
         self.notify_observers("reset", **{})
 
     def switch_player(self):
@@ -183,7 +621,7 @@ class Board:
         if self.latest_player and self.latest_player == player:
             return
 
-        if self.board[point] != 0:
+        if self._stones[point] != 0:
             raise ValueError("Invalid move: position already occupied.")
 
         if point >= 302:
@@ -198,78 +636,220 @@ class Board:
         if turn_check and player != self.current_player:
             raise ValueError("Invalid move: not the player's turn.")
 
-        # Save zobrist hash before the move for rollback on suicide
-        prev_zobrist = self.zobrist_hash
+        self._sync()
+        self._last_move = None
+
+        # Classify the neighbouring groups; an opponent group whose only
+        # liberty is this point is captured by the move.
+        friends: set[int] = set()
+        enemies: set[int] = set()
+        liberties: set[int] = set()
+        for neighbor in self.neighbors[point]:
+            gid = self._group_of[neighbor]
+            if gid == -1:
+                liberties.add(neighbor)
+            elif self._stones[neighbor] == player:
+                friends.add(gid)
+            else:
+                enemies.add(gid)
+        captured = [gid for gid in enemies if len(self._group_libs[gid]) == 1]
+
+        if (
+            not liberties
+            and not captured
+            and all(len(self._group_libs[gid]) == 1 for gid in friends)
+        ):
+            self._add_suicide(player, point)
+            raise ValueError("Invalid move: suicide is not allowed.")
+
+        new_hash = self.zobrist_hash
+        new_hash ^= ZOBRIST_BLACK[point] if player == BLACK else ZOBRIST_WHITE[point]
+        opponent_keys = ZOBRIST_WHITE if player == BLACK else ZOBRIST_BLACK
+        for gid in captured:
+            for stone in self._group_stones[gid]:
+                new_hash ^= opponent_keys[stone]
+        if new_hash in self.history_hashes:
+            raise ValueError("Invalid move: superko violation.")
+
+        record = MoveRecord(point, player, self.zobrist_hash, self.latest_player)
 
         # Start a new capture list for this move
         self.latest_removes.append([])
 
-        self.board[point] = player
+        self._set_point(point, player)
         if player == BLACK:
             self.zobrist_hash ^= ZOBRIST_BLACK[point]
         else:
             self.zobrist_hash ^= ZOBRIST_WHITE[point]
 
-        for neighbor in self.neighbors[point]:
-            if self.board[neighbor] == -player:  # Opponent's stone
-                if not self.has_liberty(neighbor, -player):
-                    self.remove_stone(neighbor)
-
-        if not self.has_liberty(point):
-            self.board[point] = 0
-            self.zobrist_hash = prev_zobrist
-            if player == BLACK:
-                self.black_suicides.add(point)
-            else:
-                self.white_suicides.add(point)
-            raise ValueError("Invalid move: suicide is not allowed.")
-
-        if self.zobrist_hash in self.history_hashes:
-            # Undo the move: restore board and zobrist hash
-            self.board[point] = 0
-            for removed in self.latest_removes[-1]:
-                self.board[removed] = -player
-            self.zobrist_hash = prev_zobrist
-            raise ValueError("Invalid move: superko violation.")
+        # Merge the stone and its friendly neighbours into the largest group
+        group_libs = liberties
+        if friends:
+            gid = max(friends, key=lambda g: len(self._group_stones[g]))
+            friends.discard(gid)
+            members = self._group_stones[gid]
+            record.base_len = len(members)
+            record.liberties[gid] = self._group_libs[gid]
+            group_libs |= self._group_libs[gid]
+        else:
+            gid = point
+            members = self._group_stones[gid] = []
+        for other in friends:
+            stones = self._group_stones.pop(other)
+            for stone in stones:
+                self._group_of[stone] = gid
+            members.extend(stones)
+            record.merged.append((other, len(stones)))
+            record.liberties[other] = self._group_libs.pop(other)
+            group_libs |= record.liberties[other]
+        members.append(point)
+        self._group_of[point] = gid
+        group_libs.discard(point)
+        self._group_libs[gid] = group_libs
+        record.gid = gid
+
+        for enemy in enemies:
+            self._group_libs[enemy].discard(point)
+        for enemy in captured:
+            enemies.discard(enemy)
+            record.captured.append((enemy, self._group_stones[enemy]))
+            self._remove_group(enemy, record)
+        record.enemies = list(enemies)
 
         self.history_hashes.add(self.zobrist_hash)
         self.turns[self.counter] = encoder[point]
-        self.notify_observers(
-            "add_stone", point=point, player=player, score=self.score()
-        )
+        self._last_move = record
+        if self.notification_enabled and self._observers:
+            score = self.score()
+            if self.latest_removes[-1]:
+                self._notify_captures(list(self.latest_removes[-1]), score)
+            self.notify_observers("add_stone", point=point, player=player, score=score)
         self.latest_player = player
 
-    def get_empties(self, player: int) -> list[int]:
-        empty_points = set([ix for ix, point in enumerate(self.board) if point == 0])
+    def push_move(self, point: int, player: int) -> None:
+        """Play a move that can later be taken back with ``pop_move``.
+
+        Meant for search: the move is checked like ``play(..., turn_check=False)``
+        but observers are not notified. Raises ValueError for an illegal move
+        and leaves the position unchanged.
+        """
+        enabled = self.notification_enabled
+        self.notification_enabled = False
+        try:
+            self.play(point, player, turn_check=False)
+        finally:
+            self.notification_enabled = enabled
+        if self._last_move is None:
+            raise ValueError("Invalid move: not the player's turn.")
+        self._undo.append(self._last_move)
+        self._last_move = None
+
+    def pop_move(self) -> None:
+        """Take back the last move made with ``push_move``.
+
+        Restores the stones, group index, score counters, hash, history and
+        suicide caches in time proportional to what the move changed.
+        """
+        record = self._undo.pop()
+        point, player = record.point, record.player
+
+        # Put the captured groups back; their only liberty was this point
+        for gid, members in reversed(record.captured):
+            for stone in members:
+                self._set_point(stone, -player)
+                self._group_of[stone] = gid
+            for stone in members:
+                for neighbor in self.neighbors[stone]:
+                    group = self._group_of[neighbor]
+                    if group != -1 and group != gid:
+                        self._group_libs[group].discard(stone)
+            self._group_stones[gid] = members
+            self._group_libs[gid] = {point}
+        for enemy in record.enemies:
+            self._group_libs[enemy].add(point)
+
+        # Lift the stone and split the groups it had joined
+        self._set_point(point, 0)
+        self._group_of[point] = -1
+        members = self._group_stones[record.gid]
+        if record.base_len < 0:
+            del self._group_stones[record.gid]
+            del self._group_libs[record.gid]
+        else:
+            offset = record.base_len
+            for other, size in record.merged:
+                stones = members[offset : offset + size]
+                for stone in stones:
+                    self._group_of[stone] = other
+                self._group_stones[other] = stones
+                offset += size
+            del members[record.base_len :]
+            self._group_libs.update(record.liberties)
+
+        for side, stone, added in reversed(record.suicides):
+            suicides = self.black_suicides if side == BLACK else self.white_suicides
+            if added:
+                suicides.discard(stone)
+            else:
+                suicides.add(stone)
+
+        self.history_hashes.discard(self.zobrist_hash)
+        self.zobrist_hash = record.zobrist_hash
+        self.latest_player = record.latest_player
+        self.turns.popitem()
+        self.latest_removes.pop()
+
+    def _suicides_of(self, player: int) -> _SuicideSet:
         if player == BLACK:
-            for point in self.black_suicides:
-                empty_points.discard(point)
+            return self._black_suicides
         if player == WHITE:
-            for point in self.white_suicides:
-                empty_points.discard(point)
-        return list(empty_points)
+            return self._white_suicides
+        return _SuicideSet()
 
-    def score(self):
-        total_black_area, total_white_area, total_unclaimed_area = 0, 0, 0
-        for piece in polysmalls:
-            black_area, white_area, unclaimed_area = calculate_area(
-                self.board, piece, polysmall_area
-            )
-            total_black_area += black_area
-            total_white_area += white_area
-            total_unclaimed_area += unclaimed_area
-        for piece in polylarges:
-            black_area, white_area, unclaimed_area = calculate_area(
-                self.board, piece, polylarge_area
-            )
-            total_black_area += black_area
-            total_white_area += white_area
-            total_unclaimed_area += unclaimed_area
+    def get_empties(self, player: int) -> list[int]:
+        """Empty points that are not known suicides for ``player``, ascending.
+
+        The order is part of the contract: ``rank_moves`` breaks ties by
+        candidate order, so it must not depend on the order moves were
+        played and taken back in.
+        """
+        return iter_points(self.legal_mask(player))
+
+    def legal_mask(self, player: int) -> int:
+        """Bitmask form of ``get_empties``: bit ``p`` set for each candidate.
+
+        Both masks it combines are kept up to date move by move, so this is
+        a single bitwise operation.
+        """
+        self._sync()
+        return self._empty_mask & ~self._suicides_of(player).mask
+
+    def sample_empties(self, player: int, k: int) -> list[int]:
+        """Draw ``k`` distinct points of ``get_empties(player)`` at random.
 
+        Costs O(k + number of suicides) instead of listing every empty point.
+        Raises ValueError, like ``random.sample``, if there are fewer than
+        ``k`` candidates.
+        """
+        self._sync()
+        suicides = self._suicides_of(player)
+        empties = self._empty_points
+        if not suicides:
+            return sample(empties, k)
+        drawn = sample(empties, min(len(empties), k + len(suicides)))
+        picked = [p for p in drawn if p not in suicides][:k]
+        if len(picked) < k:
+            raise ValueError("Sample larger than the number of empty points")
+        return picked
+
+    def score(self):
+        self._sync()
+        small, large = self._area_units
+        scale = _FACE_UNITS * total_area
         return (
-            total_black_area / total_area,
-            total_white_area / total_area,
-            total_unclaimed_area / total_area,
+            (small[0] * polysmall_area + large[0] * polylarge_area) / scale,
+            (small[1] * polysmall_area + large[1] * polylarge_area) / scale,
+            (small[2] * polysmall_area + large[2] * polylarge_area) / scale,
         )
 
     def final_score(self) -> tuple[float, float]:
@@ -283,7 +863,7 @@ class Board:
     def is_game_over(self) -> bool:
         if self.consecutive_passes >= 2:
             return True
-        return len(self.get_empties(self.current_player)) == 0
+        return not self.legal_mask(self.current_player)
 
     def to_dict(self) -> dict:
         """Serialize board state to a JSON-compatible dict."""
@@ -322,18 +902,18 @@ class Board:
     def result(self):
         return {}
 
-    def genmove(self, player):
+    def genmove(self, player, time_ms: float | None = None):
         if self.simulator is None:
             self.simulator = SimulatedBoard()
         self.simulator.redirect(self)
-        return self.simulator.genmove(player)
+        return self.simulator.genmove(player, time_ms=time_ms)
 
-    def rank_moves(self, player: int) -> list[int]:
+    def rank_moves(self, player: int, time_ms: float | None = None) -> list[int]:
         """Return all candidate moves sorted by score (best first)."""
         if self.simulator is None:
             self.simulator = SimulatedBoard()
         self.simulator.redirect(self)
-        return self.simulator.rank_moves(player)
+        return self.simulator.rank_moves(player, time_ms=time_ms)
 
 
 class SimulatedBoard(Board):
@@ -341,78 +921,156 @@ class SimulatedBoard(Board):
         super().__init__()
 
     def redirect(self, board: Board) -> None:
-        self.board = board.board.copy()
+        self.board = board.board
         self.current_player = board.current_player
         self.latest_removes = board.latest_removes.copy()
         self.black_suicides = board.black_suicides.copy()
         self.white_suicides = board.white_suicides.copy()
-        self.orginal_counter = board.counter
         self.turns = board.turns.copy()
         self.zobrist_hash = board.zobrist_hash
         self.history_hashes = set()  # don't enforce superko in simulation
+        self.rank_workers = board.rank_workers
+        self.rank_min_candidates = board.rank_min_candidates
 
-    def genmove(self, player):
-        ranked = self.rank_moves(player)
+    def genmove(self, player, time_ms: float | None = None):
+        ranked = self.rank_moves(player, time_ms=time_ms)
         return ranked[0] if ranked else None
 
-    def rank_moves(self, player: int) -> list[int]:
-        """Return all candidate moves sorted by heuristic score (best first)."""
+    def rank_moves(self, player: int, time_ms: float | None = None) -> list[int]:
+        """Return all candidate moves sorted by heuristic score (best first).
+
+        With ``time_ms``, the search is anytime: after the plain ranking, the
+        moves are re-ranked with deeper and wider reply sampling (best moves
+        of the previous ranking first) until the wall-clock budget runs out,
+        and the last complete ranking is returned. The plain ranking always
+        completes, so a move is returned even if the budget is too small.
+        """
+        ranked = self._rank(player, self.get_empties(player))
+        assert ranked is not None  # no deadline for the plain ranking
+        if time_ms is None:
+            return ranked
+        deadline = time.perf_counter() + time_ms / 1000
+        for max_depth, trail in _search_schedule():
+            # Fewer replies than trail would make every move look illegal
+            if trail >= len(ranked) or time.perf_counter() >= deadline:
+                break
+            deeper = self._rank(player, ranked, max_depth, trail, deadline)
+            if deeper is None:
+                break
+            ranked = deeper
+        return ranked
+
+    def _rank(
+        self,
+        player: int,
+        candidates: list[int],
+        max_depth: int = 1,
+        trail: int = 2,
+        deadline: float | None = None,
+    ) -> list[int] | None:
+        """Rank ``candidates``, or return None if ``deadline`` passes first."""
         scored: list[tuple[float, float, int]] = []
 
-        for point in self.get_empties(player):
-            simulated_score, gain = self.simulate_score(0, point, player)
+        potentials = calculate_potentials(self.board, candidates, self.counter)
+        parallel = (
+            deadline is None
+            and self.rank_workers > 1
+            and len(candidates) >= self.rank_min_candidates
+        )
+        if parallel:
+            results = self._simulate_parallel(candidates, player, max_depth, trail)
+        else:
+            results = []
+            for point in candidates:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return None
+                results.append(self.simulate_score(0, point, player, max_depth, trail))
+        for point, potential, (simulated_score, gain) in zip(
+            candidates, potentials.tolist(), results
+        ):
             simulated_score = simulated_score + 2 * gain
-            potential = calculate_potential(self.board, point, self.counter)
             scored.append((simulated_score, potential, point))
 
         # Sort by score descending, then potential ascending
         scored.sort(key=lambda x: (-x[0], x[1]))
         return [point for _, _, point in scored]
 
-    def simulate_score(self, depth, point, player):
-        if depth == 1:
+    def _simulate_parallel(
+        self, candidates: list[int], player: int, max_depth: int = 1, trail: int = 2
+    ) -> list[tuple[float, float]]:
+        """Run simulate_score for ``candidates`` across the rank process pool.
+
+        The candidates are split into one contiguous shard per worker; each
+        shard gets its own seed drawn from ``random`` so results are
+        reproducible for a seeded parent. Falls back to serial evaluation if
+        the pool has died.
+        """
+        workers = self.rank_workers
+        size = -(-len(candidates) // workers)
+        shards = [candidates[i : i + size] for i in range(0, len(candidates), size)]
+        seeds = [random.getrandbits(64) for _ in shards]
+        data = self.to_dict()
+        pool = _get_rank_pool(workers)
+        try:
+            chunks = pool.map(
+                _simulate_shard,
+                [data] * len(shards),
+                shards,
+                [player] * len(shards),
+                seeds,
+                [max_depth] * len(shards),
+                [trail] * len(shards),
+            )
+            return [result for chunk in chunks for result in chunk]
+        except BrokenProcessPool:
+            _discard_rank_pool(workers, pool)
+            return [
+                self.simulate_score(0, point, player, max_depth, trail)
+                for point in candidates
+            ]
+
+    def simulate_score(self, depth, point, player, max_depth=1, trail=2):
+        """Score ``point`` for ``player`` against ``trail`` sampled replies.
+
+        Replies are played out recursively down to ``max_depth`` plies; at the
+        default depth of 1 the replies are sampled but not played.
+        """
+        if depth == max_depth:
             return 0, 0
 
-        trail = 2
-        self.latest_removes.append([])
-        black_area_ratio, white_area_ratio, unclaimed_area_ratio = 0, 0, 0
-        mean_rival_area_ratio, gain, mean_rival_gain = 0, 0, 0
         try:
-            # 假设在 point 落子，计算得分，需要考虑复原棋盘的状态
-            self.play(point, player, turn_check=False)  # 模拟落子
+            # 假设在 point 落子，计算得分，之后用 pop_move 复原棋盘
+            self.push_move(point, player)  # 模拟落子
+        except ValueError:
+            # Move is illegal (suicide, superko, etc.) — skip this point
+            return -math.inf, 0
+
+        try:
             black_area_ratio, white_area_ratio, unclaimed_area_ratio = (
                 self.score()
             )  # 计算得分
+            gain = len(self.latest_removes[-1]) / len(self.board)
 
-            empty_points = sample(self.get_empties(-player), trail)
-            total_rival_area_ratio, total_rival_gain = 0, 0
+            empty_points = self.sample_empties(-player, trail)
+            total_rival_area_ratio, total_rival_gain, replies = 0, 0, 0
             for rival_point in empty_points:
                 rival_area_ratio, rival_gain = self.simulate_score(
-                    depth + 1, rival_point, -player
+                    depth + 1, rival_point, -player, max_depth, trail
                 )  # 递归计算对手的得分
+                if rival_area_ratio == -math.inf:
+                    continue  # illegal reply, the rival would not play it
                 total_rival_area_ratio += rival_area_ratio
                 total_rival_gain += rival_gain
-            mean_rival_area_ratio = total_rival_area_ratio / trail
-            mean_rival_gain = total_rival_gain / trail
+                replies += 1
+            mean_rival_area_ratio = total_rival_area_ratio / max(replies, 1)
+            mean_rival_gain = total_rival_gain / max(replies, 1)
         except ValueError:
-            # Move is illegal (suicide, superko, etc.) — skip this point
-            self.latest_removes.pop()
+            # Not enough replies left to sample
             return -math.inf, 0
-
-        self.board[point] = 0  # 恢复棋盘状态
-        gain = 0
-        if self.latest_removes and len(self.latest_removes) > 0:
-            for removed in self.latest_removes[-1]:
-                self.board[removed] = -self.current_player
-            gain = len(self.latest_removes[-1]) / len(self.board)
-            self.latest_removes.pop()
-
-        if self.counter > self.orginal_counter:
-            self.turns.pop(self.counter - 1)
+        finally:
+            self.pop_move()  # 恢复棋盘状态
 
         if player == BLACK:
-            # print(black_area_ratio, mean_rival_area_ratio, gain, mean_rival_gain)
             return black_area_ratio - mean_rival_area_ratio, gain - mean_rival_gain
         else:
-            # print(white_area_ratio, mean_rival_area_ratio, gain, mean_rival_gain)
             return white_area_ratio - mean_rival_area_ratio, gain - mean_rival_gain
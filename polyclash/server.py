@@ -1,5 +1,7 @@
+import math
 import os
 import secrets
+import time
 from threading import Thread
 from typing import Any, Optional
 
@@ -37,6 +39,8 @@ boards: dict[str, Board] = {}
 # Team mode: user auth store and room limit
 _user_store: Optional[Any] = None
 MAX_ROOMS: int = int(os.environ.get("POLYCLASH_MAX_ROOMS", "8"))  # 0 = unlimited
+# Longest thinking time a genmove request may ask for, in milliseconds
+MAX_GENMOVE_TIME_MS: float = float(os.environ.get("POLYCLASH_AI_MAX_TIME_MS", "10000"))
 
 
 def _persist_board(game_id: str) -> None:
@@ -70,7 +74,14 @@ _hrm_player: Any = None
 try:
     from polyclash.ai.bridge import HRMPlayer
 
-    _hrm_player = HRMPlayer()
+    # One player serves every room; concurrent genmove requests share its
+    # network through dynamic batches
+    _hrm_player = HRMPlayer(
+        max_batch_size=int(os.environ.get("POLYCLASH_AI_MAX_BATCH", "8")),
+        max_wait_us=int(os.environ.get("POLYCLASH_AI_MAX_WAIT_US", "1000")),
+        backend=os.environ.get("POLYCLASH_AI_BACKEND", "eager"),
+        backend_path=os.environ.get("POLYCLASH_AI_BACKEND_PATH"),
+    )
     logger.info("Server: HRM AI engine loaded")
 except Exception as e:
     logger.info(f"Server: HRM AI unavailable ({e}), using heuristic fallback")
@@ -579,9 +590,27 @@ def state(game_id=None, role=None, token=None):
     return result, 200
 
 
+def _time_budget(time_ms) -> Optional[float]:
+    """Validate a client's ``time_ms`` and clamp it to MAX_GENMOVE_TIME_MS.
+
+    Raises ValueError unless it is a finite, positive number.
+    """
+    if time_ms is None:
+        return None
+    if isinstance(time_ms, bool) or not isinstance(time_ms, (int, float, str)):
+        raise ValueError("time_ms must be a number")
+    try:
+        budget = float(time_ms)
+    except ValueError:
+        raise ValueError("time_ms must be a number") from None
+    if not math.isfinite(budget) or budget <= 0:
+        raise ValueError("time_ms must be a positive, finite number")
+    return min(budget, MAX_GENMOVE_TIME_MS)
+
+
 @app.route("/sphgo/genmove", methods=["POST"])
 @api_call
-def genmove(game_id=None, role=None, token=None):
+def genmove(game_id=None, role=None, token=None, time_ms=None):
     board = boards[game_id]
     player_color = BLACK if role == "black" else WHITE
 
@@ -591,16 +620,26 @@ def genmove(game_id=None, role=None, token=None):
     if (steps % 2 == 0 and role != "black") or (steps % 2 == 1 and role != "white"):
         return {"message": "Not your turn"}, 400
 
+    try:
+        budget = _time_budget(time_ms)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+
     # Try HRM first, fall back to heuristic
     point = None
+    started = time.perf_counter()
     if _hrm_player is not None:
         try:
-            point = _hrm_player.genmove(board, player_color)
+            point = _hrm_player.genmove(board, player_color, time_ms=budget)
         except Exception as e:
             logger.warning(f"HRM genmove failed: {e}, falling back to heuristic")
 
     if point is None:
-        ranked = board.rank_moves(player_color)
+        # The fallback gets what the HRM search left of the budget
+        if budget is not None:
+            elapsed = (time.perf_counter() - started) * 1000.0
+            budget = max(budget - elapsed, 0.0)
+        ranked = board.rank_moves(player_color, time_ms=budget)
         point = ranked[0] if ranked else None
 
     if point is None:
@@ -1,5 +1,7 @@
 """Tests for Board serialization and storage persistence (Phase 3)."""
 
+import time
+
 import numpy as np
 import pytest
 
@@ -296,3 +298,98 @@ class TestServerBoardRestore:
         snapshot = server.storage.load_board(game_id)
         assert snapshot is not None
         assert snapshot["current_player"] == WHITE  # switched after move
+
+    def test_genmove_with_time_budget(self):
+        res = self.client.post("/sphgo/new", json={"token": TEST_TOKEN})
+        game_data = res.get_json()
+        res = self.client.post(
+            "/sphgo/join",
+            json={"token": game_data["black_key"], "role": "black"},
+        )
+        black_token = res.get_json()["token"]
+        self.client.post(
+            "/sphgo/join",
+            json={"token": game_data["white_key"], "role": "white"},
+        )
+
+        res = self.client.post(
+            "/sphgo/genmove", json={"token": black_token, "time_ms": 20}
+        )
+
+        assert res.status_code == 200
+        assert res.get_json()["point"] is not None
+
+    def test_genmove_rejects_bad_time_budget(self):
+        res = self.client.post("/sphgo/new", json={"token": TEST_TOKEN})
+        game_data = res.get_json()
+        res = self.client.post(
+            "/sphgo/join",
+            json={"token": game_data["black_key"], "role": "black"},
+        )
+        black_token = res.get_json()["token"]
+
+        for time_ms in ("abc", "nan", "inf", 1e400, -5, 0, True, [20]):
+            res = self.client.post(
+                "/sphgo/genmove", json={"token": black_token, "time_ms": time_ms}
+            )
+            assert res.status_code == 400, time_ms
+            assert "time_ms" in res.get_json()["message"]
+
+    def test_genmove_clamps_time_budget(self, monkeypatch):
+        res = self.client.post("/sphgo/new", json={"token": TEST_TOKEN})
+        game_data = res.get_json()
+        res = self.client.post(
+            "/sphgo/join",
+            json={"token": game_data["black_key"], "role": "black"},
+        )
+        black_token = res.get_json()["token"]
+        budgets = []
+
+        def rank_moves(board, player, time_ms=None):
+            budgets.append(time_ms)
+            return [0]
+
+        monkeypatch.setattr(server, "_hrm_player", None)
+        monkeypatch.setattr(server, "MAX_GENMOVE_TIME_MS", 50.0)
+        monkeypatch.setattr(Board, "rank_moves", rank_moves)
+        res = self.client.post(
+            "/sphgo/genmove", json={"token": black_token, "time_ms": 1e12}
+        )
+
+        assert res.status_code == 200
+        assert len(budgets) == 1 and 45.0 < budgets[0] <= 50.0
+
+    def test_genmove_fallback_gets_the_rest_of_the_budget(self, monkeypatch):
+        res = self.client.post("/sphgo/new", json={"token": TEST_TOKEN})
+        game_data = res.get_json()
+        res = self.client.post(
+            "/sphgo/join",
+            json={"token": game_data["black_key"], "role": "black"},
+        )
+        black_token = res.get_json()["token"]
+
+        class FailingPlayer:
+            def genmove(self, board, player, time_ms=None):
+                time.sleep(time_ms * 0.8 / 1000)
+                raise RuntimeError("search failed")
+
+        budgets = []
+        rank_moves = Board.rank_moves
+
+        def recorded(board, player, time_ms=None):
+            budgets.append(time_ms)
+            return rank_moves(board, player, time_ms=time_ms)
+
+        monkeypatch.setattr(server, "_hrm_player", FailingPlayer())
+        monkeypatch.setattr(server, "MAX_GENMOVE_TIME_MS", 300.0)
+        monkeypatch.setattr(Board, "rank_moves", recorded)
+        start = time.perf_counter()
+        res = self.client.post(
+            "/sphgo/genmove", json={"token": black_token, "time_ms": 1e12}
+        )
+        elapsed = time.perf_counter() - start
+
+        assert res.status_code == 200
+        assert res.get_json()["point"] is not None
+        assert budgets[0] <= 300.0 * 0.2
+        assert elapsed < 0.3 + 0.15  # the cap, plus request overhead
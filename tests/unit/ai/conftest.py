@@ -0,0 +1,62 @@
+import time
+
+import numpy as np
+import pytest
+
+
+class UniformNet:
+    """Fake network: a uniform prior over the legal moves and a zero value.
+
+    ``favourite`` puts most of the prior on the first legal move instead.
+    ``calls`` counts the positions evaluated.
+    """
+
+    def __init__(self, game, favourite=False):
+        self.game = game
+        self.favourite = favourite
+        self.calls = 0
+
+    def predict(self, board, valids=None):
+        self.calls += 1
+        expected = self.game.valid_moves(board, 1).astype(np.float64)
+        # The search hands over the legal moves it computed for the node
+        assert valids is not None and np.array_equal(valids, expected)
+        if self.favourite:
+            expected[np.flatnonzero(expected)[0]] += 10.0
+        return expected / expected.sum(), 0.0
+
+
+class BatchNet(UniformNet):
+    """UniformNet with ``predict_batch``, recording the size of each batch.
+
+    Each batch takes ``delay`` seconds; batch number ``fail_at`` (counting
+    from 0) raises RuntimeError("boom") instead.
+    """
+
+    def __init__(self, game, delay=0.0, fail_at=None, **options):
+        super().__init__(game, **options)
+        self.delay = delay
+        self.fail_at = fail_at
+        self.batches = []
+
+    def predict_batch(self, boards, valids=None):
+        if self.delay:
+            time.sleep(self.delay)
+        failing = len(self.batches) == self.fail_at
+        self.batches.append(len(boards))
+        if failing:
+            raise RuntimeError("boom")
+        if valids is None:
+            valids = [None] * len(boards)
+        return [self.predict(board, mask) for board, mask in zip(boards, valids)]
+
+
+@pytest.fixture
+def make_net():
+    """Build a fake network for ``game``: a BatchNet with ``batched=True``,
+    else a UniformNet; other options go to the constructor."""
+
+    def make(game, batched=False, **options):
+        return (BatchNet if batched else UniformNet)(game, **options)
+
+    return make
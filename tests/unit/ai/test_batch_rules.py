@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from polyclash.ai.polyclash.batch_rules import NEIGHBORS, BatchRules
+from polyclash.ai.polyclash.rules import (
+    BLACK,
+    WHITE,
+    apply_move,
+    terminal_result,
+    valid_moves,
+)
+from polyclash.ai.polyclash.scoring import score_batch
+from polyclash.ai.polyclash.state import PolyclashState
+from polyclash.ai.polyclash.topology import NUM_POINTS, PASS_ACTION, neighbor_tuple
+
+
+@pytest.fixture(scope="module")
+def states():
+    rng = np.random.default_rng(0)
+    result = []
+    for _ in range(24):
+        state = PolyclashState.initial()
+        player = BLACK
+        for action in rng.integers(0, NUM_POINTS, size=rng.integers(0, 400)):
+            nxt = apply_move(state, player, int(action))
+            if nxt is not None:
+                state, player = nxt, -player
+        result.append(state)
+    return result
+
+
+class TestBatchRules:
+    def test_neighbor_table(self):
+        for p in range(NUM_POINTS):
+            row = [nb for nb in NEIGHBORS[p] if nb < NUM_POINTS]
+            assert sorted(row) == sorted(neighbor_tuple[p])
+
+    def test_label_groups_matches_state(self, states):
+        stones = np.stack([s.stones for s in states])
+        labels, liberties = BatchRules.label_groups(stones)
+        for b, state in enumerate(states):
+            expected_labels, expected_liberties = state.groups()
+            expected_labels = np.where(expected_labels < 0, NUM_POINTS, expected_labels)
+            assert np.array_equal(labels[b], expected_labels)
+            assert np.array_equal(liberties[b], expected_liberties)
+
+    def test_valid_moves_batch(self, states):
+        stones = np.stack([s.stones for s in states])
+        players = np.array([BLACK, WHITE] * (len(states) // 2))
+        valids = BatchRules.valid_moves_batch(stones, players)
+        for b, state in enumerate(states):
+            assert np.array_equal(valids[b], valid_moves(state, players[b]))
+
+    def test_apply_moves_matches_apply_move(self, states):
+        rng = np.random.default_rng(1)
+        stones = np.stack([s.stones for s in states])
+        players = rng.choice([BLACK, WHITE], size=len(states))
+        # Mostly legal moves, some random ones (occupied, suicide, pass)
+        valids = BatchRules.valid_moves_batch(stones, players)
+        actions = np.array(
+            [
+                rng.choice(np.flatnonzero(v)) if i % 3 else rng.integers(0, 303)
+                for i, v in enumerate(valids)
+            ]
+        )
+
+        new_stones, legal = BatchRules.apply_moves(stones, players, actions)
+
+        for b, state in enumerate(states):
+            fresh = PolyclashState(state.stones.copy())
+            expected = apply_move(fresh, int(players[b]), int(actions[b]))
+            assert legal[b] == (expected is not None)
+            target = expected.stones if expected is not None else state.stones
+            assert np.array_equal(new_stones[b], target)
+
+    def test_apply_moves_capture(self):
+        stones = np.zeros((2, NUM_POINTS), dtype=np.int8)
+        surround = sorted(neighbor_tuple[0])
+        stones[:, 0] = WHITE
+        stones[:, surround[:-1]] = BLACK
+
+        new_stones, legal = BatchRules.apply_moves(
+            stones, np.array([BLACK, WHITE]), np.array([surround[-1], PASS_ACTION])
+        )
+
+        assert legal.tolist() == [True, True]
+        assert new_stones[0, 0] == 0
+        assert new_stones[0, surround[-1]] == BLACK
+        assert np.array_equal(new_stones[1], stones[1])
+
+    def test_score_and_terminal(self, states):
+        stones = np.stack([s.stones for s in states])
+        passes = np.array([2, 0] * (len(states) // 2))
+
+        assert np.allclose(BatchRules.score_batch(stones), score_batch(stones))
+        results = BatchRules.terminal_batch(stones, passes)
+        for b, state in enumerate(states):
+            ended = PolyclashState(state.stones.copy(), consecutive_passes=passes[b])
+            assert results[b] == terminal_result(ended)
@@ -0,0 +1,54 @@
+import numpy as np
+
+from polyclash.ai.polyclash.bitboard import Bitboard, iter_points
+from polyclash.ai.polyclash.game_adapter import PolyclashGame
+from polyclash.ai.polyclash.rules import BLACK, WHITE, apply_move
+from polyclash.ai.polyclash.state import PolyclashState
+from polyclash.ai.polyclash.topology import NUM_POINTS
+
+
+def _random_state(seed, moves=200):
+    rng = np.random.default_rng(seed)
+    state = PolyclashState.initial()
+    player = BLACK
+    for action in rng.integers(0, NUM_POINTS, size=moves):
+        nxt = apply_move(state, player, int(action))
+        if nxt is not None:
+            state, player = nxt, -player
+    return state
+
+
+def test_iter_points():
+    assert iter_points(0) == []
+    assert iter_points((1 << 301) | (1 << 7) | 1) == [0, 7, 301]
+
+
+class TestBitboard:
+    def test_round_trips(self):
+        state = _random_state(0)
+        bb = Bitboard.from_stones(state.stones)
+        assert np.array_equal(bb.to_stones(), state.stones)
+        assert iter_points(bb.black) == np.flatnonzero(state.stones == BLACK).tolist()
+        assert iter_points(bb.white) == np.flatnonzero(state.stones == WHITE).tolist()
+        data = bb.to_bytes()
+        assert len(data) == 76
+        assert Bitboard.from_bytes(data) == bb
+
+    def test_state_conversions(self):
+        state = _random_state(2)
+        assert PolyclashState.from_bitboard(state.bitboard()).stones.tolist() == (
+            state.stones.tolist()
+        )
+        assert state.representation()[:76] == state.bitboard().to_bytes()
+
+    def test_packed_game_boards(self):
+        game = PolyclashGame()
+        state = _random_state(3)
+        packed = game.pack_board(state)
+        assert len(packed[0]) == 76
+
+        board = game.unpack_board(packed)
+        assert np.array_equal(board.stones, state.stones)
+        assert board.history_hashes is state.history_hashes
+        assert game.representation(board) == game.representation(state)
+        assert board.move_count == state.move_count
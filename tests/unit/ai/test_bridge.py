@@ -0,0 +1,149 @@
+import threading
+import time
+from functools import partial
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from polyclash.ai.bridge import HRMPlayer, board_to_state
+from polyclash.ai.polyclash.rules import BLACK, WHITE
+from polyclash.game.board import Board
+
+
+@pytest.fixture
+def player_factory(make_net):
+    def make(**kwargs):
+        with patch("polyclash.ai.bridge.NNetWrapper", make_net):
+            return HRMPlayer(auto_download=False, **kwargs)
+
+    return make
+
+
+def _play(board, point, player):
+    board.play(point, player)
+    board.switch_player()
+
+
+class TestTreeReuse:
+    def test_subtree_is_reused(self, player_factory):
+        player = player_factory(num_mcts_sims=700)
+        board = Board()
+        _play(board, player.genmove(board, BLACK), BLACK)
+
+        # Reply with the opponent move the first search explored most
+        tree = player.mcts.tree
+        key, perm = player.mcts._key(board_to_state(board), WHITE)
+        edges = tree.edges(tree.index[key])
+        reply = tree.actions[edges][np.argmax(tree.visits[edges])]
+        _play(board, int(perm[reply]), WHITE)
+
+        player.genmove(board, BLACK)
+
+        # A fresh root spends its first simulation on its own expansion
+        assert player.mcts.tree.node_visits[0] == 700
+        assert len(player._trees) == 1
+
+    def test_reuse_as_white_without_symmetry_keys(self, player_factory):
+        player = player_factory(num_mcts_sims=700, symmetry_keys=False)
+        board = Board()
+        _play(board, 5, BLACK)
+        _play(board, player.genmove(board, WHITE), WHITE)
+
+        tree = player.mcts.tree
+        key, _ = player.mcts._key(board_to_state(board), BLACK)
+        edges = tree.edges(tree.index[key])
+        reply = tree.actions[edges][np.argmax(tree.visits[edges])]
+        _play(board, int(reply), BLACK)
+
+        player.genmove(board, WHITE)
+
+        assert player.mcts.tree.node_visits[0] == 700
+
+    def test_unknown_position_starts_fresh(self, player_factory):
+        player = player_factory(num_mcts_sims=10)
+        player.genmove(Board(), BLACK)
+        board = Board()
+        _play(board, 0, BLACK)
+        _play(board, 1, WHITE)
+        _play(board, 2, BLACK)
+
+        player.genmove(board, WHITE)
+
+        assert len(player._trees) == 2
+        assert player.mcts.tree.node_visits[0] == 9
+
+    def test_reuse_disabled(self, player_factory):
+        player = player_factory(num_mcts_sims=10, tree_cache_size=0)
+        player.genmove(Board(), BLACK)
+        assert player._trees == []
+
+
+class TestSearchBudget:
+    def test_needs_a_limit(self, player_factory):
+        with pytest.raises(ValueError):
+            player_factory(num_mcts_sims=None)
+
+    def test_time_budget(self, player_factory):
+        player = player_factory(
+            num_mcts_sims=None, time_ms=30.0, early_stop=False, tree_cache_size=0
+        )
+        player.genmove(Board(), BLACK)
+        first = player.mcts.tree.node_visits[0]
+
+        # An explicit budget replaces the allocated one
+        player.genmove(Board(), WHITE, time_ms=1.0)
+        assert 0 < player.mcts.tree.node_visits[0] < first
+
+    def test_node_budget(self, player_factory):
+        player = player_factory(num_mcts_sims=1000, max_nodes=20, early_stop=False)
+        player.genmove(Board(), BLACK)
+        assert len(player.mcts.tree) == 20
+
+
+class TestConcurrentRooms:
+    def test_rooms_share_network_batches(self, make_net):
+        with patch("polyclash.ai.bridge.NNetWrapper", partial(make_net, batched=True)):
+            player = HRMPlayer(
+                auto_download=False,
+                num_mcts_sims=30,
+                max_batch_size=2,
+                max_wait_us=20_000,
+            )
+        boards = []
+        for point in (3, 150):
+            board = Board()
+            _play(board, point, BLACK)
+            boards.append(board)
+        moves = {}
+
+        def room(i):
+            moves[i] = player.genmove(boards[i], WHITE)
+
+        threads = [threading.Thread(target=room, args=(i,)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        player.close()
+
+        assert set(moves) == {0, 1}
+        assert max(player.nnet.batches) == 2
+        assert len(player._trees) == len(player._idle) == 2
+
+    def test_lone_room_does_not_wait_for_batches(self, make_net):
+        with patch("polyclash.ai.bridge.NNetWrapper", partial(make_net, batched=True)):
+            player = HRMPlayer(
+                auto_download=False,
+                num_mcts_sims=10,
+                max_batch_size=8,
+                max_wait_us=1_000_000,
+            )
+
+        start = time.perf_counter()
+        player.genmove(Board(), BLACK)
+        player.close()
+
+        # Ten evaluations that each waited out max_wait_us would take 10 s
+        assert time.perf_counter() - start < 3.0
+        assert player.evaluator._clients == 0
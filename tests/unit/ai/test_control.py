@@ -0,0 +1,104 @@
+import pytest
+
+from polyclash.ai.core.control import SearchControl, allocate_time
+from polyclash.ai.core.mcts import MCTS
+from polyclash.ai.core.tree import SearchTree
+from polyclash.ai.core.utils import dotdict
+from polyclash.ai.polyclash.game_adapter import PolyclashGame
+
+
+def _tree(visits):
+    tree = SearchTree()
+    root = tree.add_node(b"r", None, None, range(len(visits)), [0.5] * len(visits))
+    edges = tree.edges(root)
+    tree.visits[edges] = visits
+    return tree, root
+
+
+class TestSearchControl:
+    def test_needs_a_limit(self):
+        with pytest.raises(ValueError):
+            SearchControl()
+
+    def test_sim_and_node_limits(self):
+        tree, root = _tree([1, 1])
+        control = SearchControl(max_sims=3, early_stop=False)
+        control.start()
+        control.sims = 2
+        assert not control.should_stop(tree, root)
+        control.sims = 3
+        assert control.should_stop(tree, root)
+
+        control = SearchControl(max_nodes=1, early_stop=False)
+        control.start()
+        assert control.should_stop(tree, root)
+
+    def test_time_limit(self):
+        tree, root = _tree([1, 1])
+        control = SearchControl(time_ms=0.0, early_stop=False)
+        control.start()
+        assert control.should_stop(tree, root)
+
+    def test_early_stop_when_lead_is_safe(self):
+        tree, root = _tree([10, 4, 0])
+        control = SearchControl(max_sims=20)
+        control.start()
+        control.sims = 14
+        assert not control.should_stop(tree, root)  # 6 sims left, lead 6
+        control.sims = 15
+        assert control.should_stop(tree, root)
+
+    def test_stop_overrides_the_limits(self):
+        tree, root = _tree([1, 1])
+        control = SearchControl(max_sims=100, early_stop=False)
+        control.start()
+        control.stop()
+        assert control.should_stop(tree, root)
+        control.start()
+        assert not control.should_stop(tree, root)
+
+    def test_stops_without_a_choice(self):
+        control = SearchControl(max_sims=100)
+        control.start()
+        assert control.should_stop(*_tree([0]))
+        assert control.should_stop(*_tree([]))
+
+
+def test_allocate_time():
+    assert allocate_time(100.0, 0, 302) == pytest.approx(50.0)
+    assert allocate_time(100.0, 121, 302) == pytest.approx(150.0, rel=1e-3)
+    assert allocate_time(100.0, 290, 302) == pytest.approx(50.0)
+
+
+class TestControlledSearch:
+    @pytest.fixture
+    def game(self):
+        return PolyclashGame(sym_samples=0)
+
+    @pytest.mark.parametrize("batch_size", [1, 8])
+    def test_node_budget(self, game, batch_size, make_net):
+        args = dotdict({"numMCTSSims": 1000, "cpuct": 1.0, "evalBatchSize": batch_size})
+        mcts = MCTS(game, make_net(game), args)
+        control = SearchControl(max_nodes=30, early_stop=False)
+
+        mcts.action_prob(game.init_board(), control=control)
+
+        assert 30 <= len(mcts.tree) < 30 + batch_size
+        assert mcts.tree.node_visits[0] == control.sims - 1
+
+    def test_early_stop_saves_simulations(self, game, make_net):
+        mcts = MCTS(game, make_net(game, favourite=True), dotdict({"cpuct": 1.0}))
+        control = SearchControl(max_sims=400)
+
+        probs = mcts.action_prob(game.init_board(), temp=0, control=control)
+
+        counts = mcts.tree.action_visits(0, game.action_size())
+        best, second = sorted(counts)[-1], sorted(counts)[-2]
+        assert control.sims < 400
+        assert best - second > 400 - control.sims
+        assert probs[int(counts.argmax())] == 1
+
+    def test_no_simulations(self, game, make_net):
+        mcts = MCTS(game, make_net(game), dotdict({"cpuct": 1.0}))
+        probs = mcts.action_prob(game.init_board(), num_sims=0)
+        assert len(mcts.tree) == 0 and len(probs) == game.action_size()
@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+from polyclash.ai.core.evaluator import BatchedEvaluator
+
+
+class EchoNet:
+    def __init__(self):
+        self.batches = []
+
+    def predict_batch(self, boards, valids=None):
+        self.batches.append(len(boards))
+        return [(board, -board) for board in boards]
+
+
+class TestBatchedEvaluator:
+    def test_requests_are_batched(self):
+        net = EchoNet()
+        evaluator = BatchedEvaluator(net, max_batch_size=4, max_wait_us=200_000)
+
+        assert evaluator.predict_batch([1, 2, 3, 4, 5]) == [
+            (1, -1),
+            (2, -2),
+            (3, -3),
+            (4, -4),
+            (5, -5),
+        ]
+        assert net.batches[0] == 4 and sum(net.batches) == 5
+        evaluator.close()
+
+    def test_concurrent_callers(self):
+        net = EchoNet()
+        evaluator = BatchedEvaluator(net, max_batch_size=8, max_wait_us=50_000)
+        results = {}
+
+        def call(i):
+            results[i] = evaluator.predict(i)
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        evaluator.close()
+
+        assert results == {i: (i, -i) for i in range(8)}
+        assert len(net.batches) < 8
+
+    def test_declared_clients_cut_the_wait(self):
+        net = EchoNet()
+        evaluator = BatchedEvaluator(net, max_batch_size=8, max_wait_us=5_000_000)
+
+        start = time.perf_counter()
+        with evaluator.clients(1):
+            assert evaluator.predict(1) == (1, -1)
+        assert time.perf_counter() - start < 2.0
+
+        # Two declared threads: the batch goes as soon as both are in it
+        barrier = threading.Barrier(2)
+        start = time.perf_counter()
+        with evaluator.clients(2):
+
+            def call(i):
+                barrier.wait()
+                evaluator.predict(i)
+
+            threads = [threading.Thread(target=call, args=(i,)) for i in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert time.perf_counter() - start < 2.0
+        assert net.batches == [1, 2]
+        assert evaluator._clients == 0
+        evaluator.close()
+
+    def test_masks_are_passed_along(self):
+        class MaskNet:
+            def predict_batch(self, boards, valids=None):
+                return list(zip(boards, valids))
+
+        evaluator = BatchedEvaluator(MaskNet(), max_batch_size=4, max_wait_us=0)
+        assert evaluator.predict(1, "m") == (1, "m")
+        assert evaluator.predict_batch([2, 3]) == [(2, None), (3, None)]
+        evaluator.close()
+
+    def test_falls_back_to_predict(self):
+        class Net:
+            def predict(self, board, valids=None):
+                return board * 2
+
+        evaluator = BatchedEvaluator(Net(), max_wait_us=0)
+        assert evaluator.predict(3) == 6
+        evaluator.close()
+
+    def test_errors_reach_the_caller(self):
+        class Broken:
+            def predict_batch(self, boards, valids=None):
+                raise RuntimeError("boom")
+
+        evaluator = BatchedEvaluator(Broken(), max_wait_us=0)
+        with pytest.raises(RuntimeError, match="boom"):
+            evaluator.predict(1)
+        evaluator.close()
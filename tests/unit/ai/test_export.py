@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from polyclash.ai.polyclash.game_adapter import PolyclashGame
+
+torch = pytest.importorskip("torch")
+
+from polyclash.ai.nn.export import (  # noqa: E402
+    check_accuracy,
+    export_model,
+    sample_positions,
+    save_model,
+)
+from polyclash.ai.nn.nnet import NNetWrapper  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def game():
+    return PolyclashGame(sym_samples=0)
+
+
+@pytest.fixture(scope="module")
+def eager(game):
+    torch.manual_seed(0)
+    nnet = NNetWrapper(game)
+    nnet.device = torch.device("cpu")
+    nnet.torch_model.to(nnet.device)
+    return nnet
+
+
+@pytest.fixture(scope="module")
+def positions(game):
+    return sample_positions(game, 12, seed=3)
+
+
+def _copy(game, eager, backend, path=None):
+    nnet = NNetWrapper(game)
+    nnet.device = torch.device("cpu")
+    nnet.torch_model.load_state_dict(eager.torch_model.state_dict())
+    nnet.torch_model.to(nnet.device)
+    nnet.use_backend(backend, path)
+    return nnet
+
+
+def test_sample_positions_are_seeded(game):
+    first = sample_positions(game, 5, seed=7)
+    again = sample_positions(game, 5, seed=7)
+    assert [p.stones.tobytes() for p in first] == [p.stones.tobytes() for p in again]
+    assert len({p.stones.tobytes() for p in first}) > 1
+
+
+def test_torchscript_matches_eager(game, eager, positions, tmp_path):
+    path = str(tmp_path / "model.pt")
+    save_model(export_model(eager), path)
+    exported = _copy(game, eager, "torchscript", path)
+
+    report = check_accuracy(eager, exported, positions)
+
+    assert exported.backend == "torchscript"
+    assert report.positions == len(positions)
+    assert report.max_policy_diff < 1e-5
+    assert report.max_value_diff < 1e-5
+    assert report.top1_agreement == 1.0
+
+
+def test_int8_stays_close(game, eager, positions):
+    exported = _copy(game, eager, "torchscript-int8")
+
+    report = check_accuracy(eager, exported, positions)
+
+    assert report.max_policy_diff < 0.05
+    assert report.max_value_diff < 0.1
+    assert report.mean_kl < 0.01
+
+
+def test_exported_policy_is_masked(game, eager, positions):
+    exported = _copy(game, eager, "torchscript")
+    board = positions[-1]
+
+    ((pi, _),) = exported.predict_batch([board])
+
+    valids = game.valid_moves(board, 1)
+    assert pi.sum() == pytest.approx(1.0)
+    assert np.all(pi[valids == 0] == 0)
+
+
+def test_backend_switch(game, eager):
+    nnet = _copy(game, eager, "torchscript")
+    nnet.use_backend("eager")
+    assert nnet.backend == "eager" and nnet.exported is None
+
+    with pytest.raises(ValueError):
+        nnet.use_backend("onnx")
@@ -0,0 +1,50 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from polyclash.ai.nn.graph_layers import (  # noqa: E402
+    GraphConvBlock,
+    GraphEncoder,
+    normalized_adjacency,
+)
+from polyclash.ai.polyclash.topology import NUM_POINTS, edge_index  # noqa: E402
+
+EDGES = torch.as_tensor(edge_index)
+
+
+def scatter_mean_block(block, x, edges, num_nodes):
+    """Reference: gather, scatter-add and divide by the in-degree."""
+    src, dst = edges
+    B, N, D = x.shape
+    msgs = block.linear_msg(x[:, src])
+    agg = torch.zeros(B, N, D)
+    agg.scatter_add_(1, dst.unsqueeze(0).unsqueeze(-1).expand(B, -1, D), msgs)
+    deg = torch.zeros(N).scatter_add_(0, dst, torch.ones(dst.shape[0]))
+    agg = agg / deg.clamp(min=1.0).unsqueeze(0).unsqueeze(-1)
+    out = torch.nn.functional.gelu(block.linear_upd(torch.cat([agg, x], dim=-1)))
+    return block.norm(x + out)
+
+
+class TestGraphLayers:
+    def test_adjacency_rows_average_neighbours(self):
+        edges = torch.tensor([[1, 2, 2, 0], [0, 0, 0, 1]])
+        adjacency = normalized_adjacency(edges, 3)
+        expected = torch.tensor([[0, 1 / 3, 2 / 3], [1, 0, 0], [0, 0, 0]])
+        assert torch.allclose(adjacency, expected)
+
+    def test_block_matches_scatter_mean(self):
+        torch.manual_seed(0)
+        block = GraphConvBlock(16)
+        x = torch.randn(3, NUM_POINTS, 16)
+        with torch.no_grad():
+            expected = scatter_mean_block(block, x, EDGES, NUM_POINTS)
+            out = block(x, normalized_adjacency(EDGES, NUM_POINTS))
+        assert torch.allclose(out, expected, atol=1e-5)
+
+    def test_encoder_keeps_adjacency_out_of_state_dict(self):
+        encoder = GraphEncoder(8, num_layers=1, edge_index=EDGES, num_nodes=NUM_POINTS)
+        assert encoder._adjacency(EDGES.clone(), NUM_POINTS) is encoder.adjacency
+        assert "adjacency" not in encoder.state_dict()
+
+        other = torch.tensor([[1], [0]])
+        assert encoder._adjacency(other, 2).tolist() == [[0.0, 1.0], [0.0, 0.0]]
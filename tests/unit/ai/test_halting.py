@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+from polyclash.ai.polyclash.game_adapter import PolyclashGame
+from polyclash.ai.polyclash.rules import BLACK, apply_move
+
+torch = pytest.importorskip("torch")
+
+from polyclash.ai.nn.hrm import HierarchicalReasoningModelHalting  # noqa: E402
+from polyclash.ai.nn.nnet import NNetWrapper  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def nnet():
+    # The shipped model configuration
+    torch.manual_seed(0)
+    nnet = NNetWrapper(PolyclashGame(sym_samples=0))
+    nnet.torch_model.eval()
+    return nnet
+
+
+@pytest.fixture(scope="module")
+def full_steps(nnet):
+    backbone = nnet.torch_model.backbone
+    return backbone.H_cycles * backbone.L_cycles
+
+
+@pytest.fixture(scope="module")
+def stones(nnet):
+    rng = np.random.default_rng(0)
+    boards = rng.choice([-1, 0, 0, 1], size=(6, 302))
+    return torch.as_tensor(boards, dtype=torch.long, device=nnet.device)
+
+
+def _run(nnet, stones, halting=None):
+    with torch.no_grad():
+        return nnet.torch_model(
+            stones,
+            nnet._edge_index_t,
+            nnet._node_type_t,
+            nnet._coords_t,
+            nnet._area_weight_t,
+            halting=halting,
+        )
+
+
+class TestHalting:
+    def test_no_halting_matches_full_forward(self, nnet, stones, full_steps):
+        logits, v = _run(nnet, stones)
+        h_logits, h_v, steps = _run(
+            nnet, stones, HierarchicalReasoningModelHalting(threshold=0.0)
+        )
+
+        assert steps.tolist() == [full_steps] * len(stones)
+        assert torch.allclose(logits, h_logits, atol=1e-5)
+        assert torch.allclose(v, h_v, atol=1e-5)
+
+    def test_step_limits(self, nnet, stones, full_steps):
+        assert full_steps > 1  # so there is a step to skip
+
+        logits, _ = _run(nnet, stones)
+        h_logits, _, steps = _run(
+            nnet, stones, HierarchicalReasoningModelHalting(threshold=np.inf)
+        )
+        assert steps.tolist() == [1] * len(stones)
+        assert not torch.allclose(logits, h_logits, atol=1e-5)
+
+        *_, steps = _run(
+            nnet, stones, HierarchicalReasoningModelHalting(1, 1, threshold=0.0)
+        )
+        assert steps.tolist() == [1] * len(stones)
+
+    def test_halted_samples_leave_the_batch(self, nnet, stones):
+        # Bisect for a threshold that halts some samples but not all
+        low, high = 0.0, 1.0
+        for _ in range(30):
+            halting = HierarchicalReasoningModelHalting(threshold=(low + high) / 2)
+            logits, v, steps = _run(nnet, stones, halting)
+            halted = int((steps == 1).sum())
+            if halted == 0:
+                low = halting.threshold
+            elif halted == len(stones):
+                high = halting.threshold
+            else:
+                break
+        else:
+            pytest.fail("no threshold halts the samples at different steps")
+
+        for i in range(len(stones)):
+            one_logits, one_v, one_steps = _run(nnet, stones[i : i + 1], halting)
+            assert one_steps.item() == steps[i].item()
+            assert torch.allclose(one_logits[0], logits[i], atol=1e-4)
+            assert torch.allclose(one_v[0], v[i], atol=1e-4)
+
+    def test_inference_only(self, nnet, stones):
+        nnet.torch_model.train()
+        try:
+            with pytest.raises(ValueError):
+                _run(nnet, stones, HierarchicalReasoningModelHalting())
+        finally:
+            nnet.torch_model.eval()
+
+
+def test_nnet_reports_steps(nnet, full_steps):
+    board = apply_move(nnet.game.init_board(), BLACK, 7)
+    expected_pi, _ = nnet.predict(board)
+
+    nnet.use_halting(np.inf)
+    try:
+        pi, _ = nnet.predict_batch([board, board])[0]
+        assert nnet.mean_steps() == 1.0
+        assert nnet.halted_positions == 2
+        assert pi[7] == 0 and pi.sum() == pytest.approx(1.0)
+
+        nnet.use_halting(0.0)
+        pi, _ = nnet.predict(board)
+        assert nnet.mean_steps() == full_steps
+        assert np.allclose(pi, expected_pi, atol=1e-6)
+    finally:
+        nnet.use_halting(None)
+    assert nnet.halting is None
@@ -0,0 +1,71 @@
+import random
+
+import numpy as np
+
+from polyclash.ai.polyclash.history import EMPTY_HISTORY, SEGMENT, HashHistory
+from polyclash.ai.polyclash.rules import BLACK, apply_move
+from polyclash.ai.polyclash.state import PolyclashState
+from polyclash.ai.polyclash.topology import NUM_POINTS
+
+
+class TestHashHistory:
+    def test_push_is_persistent(self):
+        parent = EMPTY_HISTORY.push(1).push(2)
+        left = parent.push(3)
+        right = parent.push(4)
+
+        assert set(parent) == {1, 2}
+        assert set(left) == {1, 2, 3}
+        assert set(right) == {1, 2, 4}
+        assert 3 not in right and 4 not in left
+        assert len(EMPTY_HISTORY) == 0
+
+    def test_siblings_share_the_merged_base(self):
+        parent = EMPTY_HISTORY
+        for value in range(1, SEGMENT + 1):
+            parent = parent.push(value)
+        children = [parent.push(1000 + i) for i in range(3)]
+
+        assert len({id(child._base) for child in children}) == 1
+        assert children[0]._base == frozenset(range(1, SEGMENT + 1))
+        assert all(1000 + i in child for i, child in enumerate(children))
+        assert 1001 not in children[0]
+
+    def test_membership_matches_set(self):
+        rnd = random.Random(0)
+        values = [rnd.getrandbits(64) for _ in range(2000)]
+        history = EMPTY_HISTORY
+        for value in values[:1000]:
+            history = history.push(value)
+
+        assert len(history) == 1000
+        assert all(value in history for value in values[:1000])
+        assert not any(value in history for value in values[1000:])
+        assert "1" not in history
+
+    def test_set_interface(self):
+        history = HashHistory.of([5, 6, 5])
+
+        assert history == frozenset({5, 6})
+        assert len(history) == 2
+        assert history | {7} == {5, 6, 7}
+        assert hash(history) == hash(HashHistory.of([6, 5]))
+        assert HashHistory.of(history) is history
+
+
+class TestStateHistory:
+    def test_frozenset_is_converted(self):
+        state = PolyclashState(
+            np.zeros(NUM_POINTS, dtype=np.int8), history_hashes=frozenset({1, 2})
+        )
+
+        assert isinstance(state.history_hashes, HashHistory)
+        assert state.history_hashes == {1, 2}
+
+    def test_child_shares_parent_history(self):
+        state = apply_move(PolyclashState.initial(), BLACK, 0)
+        child = apply_move(state, -BLACK, 1)
+
+        assert child.history_hashes._parent is state.history_hashes
+        assert child.zobrist_hash in child.history_hashes
+        assert child.zobrist_hash not in state.history_hashes
@@ -0,0 +1,272 @@
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from polyclash.ai.core.evaluator import BatchedEvaluator
+from polyclash.ai.core.mcts import MCTS, ParallelMCTS
+from polyclash.ai.core.tree import SearchTree
+from polyclash.ai.core.utils import dotdict
+from polyclash.ai.polyclash.game_adapter import PolyclashGame
+from polyclash.ai.polyclash.state import PolyclashState
+from polyclash.ai.polyclash.topology import ACTION_SIZE, PASS_ACTION
+
+
+class TestSearchTree:
+    def test_add_node_and_edges(self):
+        tree = SearchTree(node_capacity=1, prior_capacity=2, edge_capacity=2)
+        root = tree.add_node(b"a", None, None, [3, 5, 7], [0.2, 0.5, 0.3])
+        leaf = tree.add_node(b"b", None, None, terminal=-1.0)
+
+        assert (root, leaf) == (0, 1)
+        assert len(tree) == 2 and b"b" in tree
+        edges = tree.edges(root)
+        assert tree.actions[edges].tolist() == [3, 5, 7]
+        assert tree.edges(leaf).start == tree.edges(leaf).stop
+        assert tree.children[tree.edges(root)].tolist() == [-1, -1, -1]
+
+    def test_edges_are_allocated_on_first_use(self):
+        tree = SearchTree()
+        root = tree.add_node(b"a", None, None, [3, 5, 7], [0.2, 0.5, 0.3])
+        tree.add_node(b"b", None, None, [1, 2], [0.5, 0.5])
+        assert (tree.num_priors, tree.num_edges) == (5, 0)
+
+        tree.select(root, cpuct=1.0)
+        assert tree.edges(root) == slice(0, 3)
+        assert (tree.num_priors, tree.num_edges) == (5, 3)
+
+    def test_select_prefers_prior_then_value(self):
+        tree = SearchTree()
+        root = tree.add_node(b"a", None, None, [0, 1], [0.4, 0.6])
+
+        first = tree.select(root, cpuct=1.0)
+        assert tree.actions[first] == 1
+
+        tree.backup(root, first, -1.0)
+        assert tree.actions[tree.select(root, cpuct=1.0)] == 0
+
+    def test_select_ties_go_to_lowest_action(self):
+        tree = SearchTree()
+        root = tree.add_node(b"a", None, None, [4, 9], [0.5, 0.5])
+        assert tree.actions[tree.select(root, cpuct=1.0)] == 4
+        assert tree.select(tree.add_node(b"b", None, None), cpuct=1.0) == -1
+
+    def test_action_visits(self):
+        tree = SearchTree()
+        root = tree.add_node(b"a", None, None, [2, 8], [0.5, 0.5])
+        edge = tree.edges(root).start + 1
+        tree.backup(root, edge, 0.5)
+        tree.backup(root, edge, 0.5)
+
+        counts = tree.action_visits(root, 10)
+        assert counts[8] == 2 and counts.sum() == 2
+        assert tree.node_visits[root] == 2
+
+    def test_backup_walk_alternates_sign(self):
+        tree = SearchTree()
+        root = tree.add_node(b"r", None, None, [0, 1], [0.5, 0.5])
+        child = tree.add_node(b"c", None, None, [0], [1.0])
+        edges = [tree.edges(root).start, tree.edges(child).start]
+
+        tree.backup_walk([root, child], edges, 0.5)
+
+        assert tree.value_sums[edges].tolist() == [-0.5, 0.5]
+        assert tree.visits[edges].tolist() == [1, 1]
+        assert tree.node_visits[[root, child]].tolist() == [1, 1]
+
+    def test_virtual_loss_round_trip(self):
+        tree = SearchTree()
+        root = tree.add_node(b"r", None, None, [0, 1], [0.5, 0.5])
+        child = tree.add_node(b"c", None, None, [0], [1.0])
+        edges = [tree.edges(root).start, tree.edges(child).start]
+
+        tree.add_virtual_loss([root, child], edges, 1.0)
+        assert tree.visits[edges].tolist() == [1, 1]
+        assert tree.value_sums[edges].tolist() == [-1.0, -1.0]
+        tree.backup_path([root, child], edges, 0.5, 1.0)
+        assert tree.value_sums[edges].tolist() == [-0.5, 0.5]
+
+        tree.add_virtual_loss([root], edges[:1], 1.0)
+        tree.revert_virtual_loss([root], edges[:1], 1.0)
+        assert tree.visits[edges].tolist() == [1, 1]
+        assert tree.node_visits[[root, child]].tolist() == [1, 1]
+
+    def test_subtree(self):
+        tree = SearchTree()
+        root = tree.add_node(b"r", "R", None, [0, 1], [0.5, 0.5])
+        left = tree.add_node(b"a", "A", None, [2], [1.0])
+        right = tree.add_node(b"b", "B", None, [3, 4], [0.5, 0.5])
+        leaf = tree.add_node(b"c", "C", None, terminal=1.0)
+        tree.children[tree.edges(root)] = [left, right]
+        tree.children[tree.edges(right).start + 1] = leaf
+        tree.backup(right, tree.edges(right).start + 1, 1.0)
+
+        sub = tree.subtree(right)
+
+        assert sub.keys == [b"b", b"c"] and sub.states == ["B", "C"]
+        assert sub.index == {b"b": 0, b"c": 1}
+        assert sub.actions[sub.edges(0)].tolist() == [3, 4]
+        assert sub.children[sub.edges(0)].tolist() == [-1, 1]
+        assert sub.visits[sub.edges(0)].tolist() == [0, 1]
+        assert sub.node_visits[0] == 1 and sub.terminal[1] == 1.0
+        assert sub.num_edges == 2
+
+
+class TestMCTS:
+    @pytest.fixture
+    def game(self):
+        return PolyclashGame(sym_samples=0)
+
+    def test_one_evaluation_per_node(self, game, make_net):
+        net = make_net(game)
+        mcts = MCTS(game, net, dotdict({"numMCTSSims": 50, "cpuct": 1.0}))
+
+        probs = mcts.action_prob(game.init_board(), temp=1)
+
+        assert sum(probs) == pytest.approx(1.0)
+        assert net.calls == len(mcts.tree) == 50
+        root = mcts.tree.index[game.representation(game.init_board())]
+        assert mcts.tree.node_visits[root] == 49
+
+    def test_memory_per_node(self, game, make_net):
+        rng = np.random.default_rng(0)
+        board, player = game.init_board(), 1
+        for _ in range(60):
+            moves = np.flatnonzero(game.valid_moves(board, player)[:PASS_ACTION])
+            board, player = game.next_state(board, player, int(rng.choice(moves)))
+        mcts = MCTS(game, make_net(game), dotdict({"numMCTSSims": 400, "cpuct": 1.0}))
+
+        tracemalloc.start()
+        try:
+            mcts.action_prob(board, player=player)
+            used, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # The per-(state, action) dicts took 4,810 bytes per node here
+        assert used / len(mcts.tree) < 4810
+
+    def test_terminal_root(self, game, make_net):
+        board = PolyclashState.initial().with_stones(
+            PolyclashState.initial().stones, consecutive_passes=2
+        )
+        mcts = MCTS(game, make_net(game), dotdict({"numMCTSSims": 5, "cpuct": 1.0}))
+
+        probs = mcts.action_prob(board, temp=0)
+
+        assert len(probs) == ACTION_SIZE and sum(probs) == 1
+        assert mcts.search(board) == -game.game_ended(board, 1)
+
+    def test_reset(self, game, make_net):
+        mcts = MCTS(game, make_net(game), dotdict({"numMCTSSims": 3, "cpuct": 1.0}))
+        mcts.action_prob(game.init_board())
+        mcts.reset()
+        assert len(mcts.tree) == 0
+
+    def test_reroot(self, game, make_net):
+        mcts = MCTS(game, make_net(game), dotdict({"numMCTSSims": 700, "cpuct": 1.0}))
+        root = game.init_board()
+        mcts.action_prob(root)
+        child, player = game.next_state(root, 1, 0)
+        key = game.representation(child) + b"\xff"
+        visits = mcts.tree.node_visits[mcts.tree.index[key]]
+
+        assert mcts.reroot(child) is None  # the child has -1 to move
+        assert mcts.reroot(child, player) == visits > 0
+        assert mcts.tree.keys[0] == key
+        assert len(mcts.tree) == visits + 1
+        assert mcts.reroot(root) is None
+
+    @pytest.mark.parametrize("batch_size", [1, 8])
+    def test_player_sign_matches_canonical_board(self, game, batch_size, make_net):
+        state, player = game.next_state(game.init_board(), 1, 7)
+        args = dotdict({"numMCTSSims": 60, "cpuct": 1.0, "evalBatchSize": batch_size})
+
+        direct = MCTS(game, make_net(game), args)
+        probs = direct.action_prob(state, player=player)
+        flipped = MCTS(game, make_net(game), args)
+        expected = flipped.action_prob(game.canonical_form(state, player))
+
+        assert probs == expected
+        root = game.unpack_board(direct.tree.states[0])
+        assert game.representation(root) == game.representation(state)
+        assert direct.reroot(state, player) == 59
+
+    @pytest.mark.parametrize("batch_size", [4, 16])
+    def test_batched_search(self, game, batch_size, make_net):
+        net = make_net(game, batched=True)
+        args = dotdict({"numMCTSSims": 120, "cpuct": 1.0, "evalBatchSize": batch_size})
+        mcts = MCTS(game, net, args)
+
+        probs = mcts.action_prob(game.init_board(), temp=1)
+
+        tree = mcts.tree
+        assert sum(probs) == pytest.approx(1.0)
+        assert max(net.batches) <= batch_size
+        assert tree.node_visits[0] == 119
+        # All virtual losses were replaced by the (zero) network values
+        assert not tree.value_sums[: tree.num_edges].any()
+        for node in range(len(tree)):
+            assert tree.visits[tree.edges(node)].sum() == tree.node_visits[node]
+
+    def test_batched_search_without_predict_batch(self, game, make_net):
+        args = dotdict({"numMCTSSims": 20, "cpuct": 1.0, "evalBatchSize": 8})
+        mcts = MCTS(game, make_net(game), args)
+        mcts.action_prob(game.init_board())
+        assert mcts.tree.node_visits[0] == 19
+
+    def test_pass_edge_exists(self, game, make_net):
+        mcts = MCTS(game, make_net(game), dotdict({"numMCTSSims": 1, "cpuct": 1.0}))
+        mcts.action_prob(game.init_board())
+        assert mcts.tree.actions[mcts.tree.edges(0)][-1] == PASS_ACTION
+
+
+class TestParallelMCTS:
+    @pytest.mark.parametrize("num_threads", [1, 4])
+    def test_shared_tree(self, num_threads, make_net):
+        game = PolyclashGame(sym_samples=0)
+        net = make_net(game, batched=True)
+        args = dotdict({"numMCTSSims": 150, "cpuct": 1.0, "numThreads": num_threads})
+        mcts = ParallelMCTS(game, net, args)
+
+        probs = mcts.action_prob(game.init_board(), temp=1)
+        probs = mcts.action_prob(game.init_board(), temp=1)
+
+        tree = mcts.tree
+        assert sum(probs) == pytest.approx(1.0)
+        assert tree.node_visits[0] == 299
+        assert not tree.value_sums[: tree.num_edges].any()
+        for node in range(len(tree)):
+            assert tree.visits[tree.edges(node)].sum() == tree.node_visits[node]
+        mcts.evaluator.close()
+
+    def test_evaluation_error_propagates(self, make_net):
+        game = PolyclashGame(sym_samples=0)
+
+        args = dotdict({"numMCTSSims": 10, "cpuct": 1.0, "numThreads": 2})
+        mcts = ParallelMCTS(game, make_net(game, batched=True, fail_at=0), args)
+        with pytest.raises(RuntimeError, match="boom"):
+            mcts.action_prob(game.init_board())
+        assert not mcts.tree.value_sums[: mcts.tree.num_edges].any()
+        mcts.evaluator.close()
+
+    def test_one_failing_worker_stops_the_others(self, make_net):
+        game = PolyclashGame(sym_samples=0)
+
+        net = make_net(game, batched=True, delay=0.002, fail_at=3)
+        args = dotdict({"numMCTSSims": 2000, "cpuct": 1.0, "numThreads": 4})
+        mcts = ParallelMCTS(game, net, args, BatchedEvaluator(net, max_batch_size=1))
+        with pytest.raises(RuntimeError, match="boom"):
+            mcts.action_prob(game.init_board())
+
+        # Every worker has returned: the tree no longer changes
+        tree = mcts.tree
+        size, visits = len(tree), tree.node_visits[: len(tree)].copy()
+        time.sleep(0.05)
+        assert len(tree) == size
+        assert np.array_equal(tree.node_visits[: len(tree)], visits)
+        assert len(net.batches) < 100
+        for node in range(len(tree)):
+            assert tree.visits[tree.edges(node)].sum() == tree.node_visits[node]
+        mcts.evaluator.close()
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from polyclash.ai.polyclash.game_adapter import PolyclashGame
+from polyclash.ai.polyclash.rules import BLACK, apply_move
+
+torch = pytest.importorskip("torch")
+
+from polyclash.ai.nn.nnet import NNetWrapper  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def nnet():
+    torch.manual_seed(0)
+    return NNetWrapper(PolyclashGame(sym_samples=0))
+
+
+class TestPredictBatch:
+    def test_matches_predict(self, nnet):
+        empty = nnet.game.init_board()
+        boards = [empty, apply_move(empty, BLACK, 7), apply_move(empty, BLACK, 100)]
+
+        batch = nnet.predict_batch(boards)
+
+        assert len(batch) == 3
+        for board, (pi, v) in zip(boards, batch):
+            expected_pi, expected_v = nnet.predict(board)
+            assert np.allclose(pi, expected_pi, atol=1e-6)
+            assert v == pytest.approx(expected_v, abs=1e-5)
+            assert pi.sum() == pytest.approx(1.0)
+        assert batch[1][0][7] == 0
+
+    def test_masked_softmax_in_torch(self, nnet):
+        board = apply_move(nnet.game.init_board(), BLACK, 7)
+        stones = torch.tensor(board.stones, dtype=torch.long).unsqueeze(0)
+        with torch.no_grad():
+            logits, _ = nnet.torch_model(
+                stones,
+                nnet._edge_index_t,
+                nnet._node_type_t,
+                nnet._coords_t,
+                nnet._area_weight_t,
+            )
+        logits = logits[0].double().numpy()
+        valids = nnet.game.valid_moves(board, 1)
+        expected = np.exp(logits - logits.max()) * valids
+
+        ((pi, _),) = nnet.predict_batch([board])
+
+        assert pi.dtype == np.float64
+        assert np.allclose(pi, expected / expected.sum(), atol=1e-9)
+
+    def test_reuses_given_valids(self, nnet):
+        board = nnet.game.init_board()
+        only_pass = np.zeros(nnet.action_size_val, dtype=np.int32)
+        only_pass[-1] = 1
+        nothing = np.zeros(nnet.action_size_val, dtype=np.int32)
+
+        (pi, _), (pi_all, _), (pi_none, _) = nnet.predict_batch(
+            [board, board, board], [only_pass, None, nothing]
+        )
+
+        assert pi[-1] == pytest.approx(1.0)
+        assert np.count_nonzero(pi_all) == nnet.action_size_val
+        assert np.allclose(pi_none, 1.0 / nnet.action_size_val)
+
+    def test_empty_batch(self, nnet):
+        assert nnet.predict_batch([]) == []
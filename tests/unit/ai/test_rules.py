@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from polyclash.ai.polyclash.rules import (
+    BLACK,
+    PASS_ACTION,
+    WHITE,
+    _has_liberty,
+    apply_move,
+    find_group,
+    valid_moves,
+)
+from polyclash.ai.polyclash.state import PolyclashState
+from polyclash.ai.polyclash.topology import NUM_POINTS, neighbor_tuple
+
+
+def _random_state(seed, moves=250):
+    rng = np.random.default_rng(seed)
+    state = PolyclashState.initial()
+    player = BLACK
+    for action in rng.integers(0, NUM_POINTS, size=moves):
+        nxt = apply_move(state, player, int(action))
+        if nxt is not None:
+            state, player = nxt, -player
+    return state
+
+
+def _reference_valid(stones, player):
+    """Legality by simulating each placement with flood fills."""
+    valids = np.zeros(NUM_POINTS + 1, dtype=np.int32)
+    for point in range(NUM_POINTS):
+        if stones[point] != 0:
+            continue
+        sim = np.array(stones, dtype=np.int8)
+        sim[point] = player
+        captures = any(
+            sim[nb] == -player and not _has_liberty(sim, nb)
+            for nb in neighbor_tuple[point]
+        )
+        valids[point] = captures or _has_liberty(sim, point)
+    valids[PASS_ACTION] = 1
+    return valids
+
+
+class TestGroupIndex:
+    def test_groups_match_find_group(self):
+        state = _random_state(0)
+        labels, liberties = state.groups()
+        for p in range(NUM_POINTS):
+            group, libs = find_group(state.stones, p)
+            if not group:
+                assert labels[p] == -1
+                assert liberties[p] == 0
+                continue
+            assert labels[p] == min(group)
+            assert liberties[p] == len(libs)
+
+    def test_cached_and_shared_by_flip(self):
+        state = _random_state(1)
+        assert state.cached_groups() is None
+        groups = state.groups()
+        assert state.groups() is groups
+        assert state.flip().cached_groups() is groups
+
+
+class TestValidMoves:
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_matches_flood_fill(self, seed):
+        state = _random_state(seed)
+        for player in (BLACK, WHITE):
+            expected = _reference_valid(state.stones, player)
+            assert np.array_equal(valid_moves(state, player), expected)
+
+    def test_suicide_and_capture(self):
+        stones = np.zeros(NUM_POINTS, dtype=np.int8)
+        surround = sorted(neighbor_tuple[0])
+        stones[surround] = BLACK
+        eye = PolyclashState(stones.copy())
+        # WHITE playing into a single-point eye is suicide
+        assert valid_moves(eye, WHITE)[0] == 0
+        assert valid_moves(eye, BLACK)[0] == 1
+
+        stones[surround[-1]] = 0
+        stones[0] = WHITE
+        atari = PolyclashState(stones.copy())
+        # BLACK takes the last liberty of the WHITE stone and captures
+        assert valid_moves(atari, BLACK)[surround[-1]] == 1
+
+
+class TestApplyMove:
+    @pytest.mark.parametrize("seed", [3, 4])
+    def test_group_index_agrees_with_flood_fill(self, seed):
+        """apply_move gives the same result with and without cached groups."""
+        state = _random_state(seed)
+        for player in (BLACK, WHITE):
+            for action in range(NUM_POINTS):
+                fresh = PolyclashState(
+                    state.stones.copy(),
+                    zobrist_hash=state.zobrist_hash,
+                    history_hashes=state.history_hashes,
+                )
+                state.groups()
+                indexed = apply_move(state, player, action)
+                plain = apply_move(fresh, player, action)
+                assert (indexed is None) == (plain is None)
+                if indexed is not None and plain is not None:
+                    assert np.array_equal(indexed.stones, plain.stones)
+                    assert indexed.zobrist_hash == plain.zobrist_hash
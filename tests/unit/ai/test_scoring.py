@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from polyclash.ai.polyclash.scoring import FACE_INCIDENCE, NUM_FACES, score_batch
+from polyclash.ai.polyclash.state import PolyclashState
+from polyclash.ai.polyclash.topology import NUM_POINTS
+from polyclash.game.board import Board
+
+
+class TestFaceIncidence:
+    def test_shape_and_degree(self):
+        """Every face has four vertices and every point lies on some face."""
+        assert FACE_INCIDENCE.shape == (NUM_FACES, NUM_POINTS)
+        assert np.all(FACE_INCIDENCE.sum(axis=1) == 4)
+        assert np.all(FACE_INCIDENCE.sum(axis=0) > 0)
+
+
+class TestScoreBatch:
+    def test_empty_board(self):
+        ratios = score_batch(np.zeros((2, NUM_POINTS), dtype=np.int8))
+        assert ratios.shape == (2, 3)
+        assert np.allclose(ratios, [[0.0, 0.0, 1.0], [0.0, 0.0, 1.0]])
+
+    def test_single_position(self):
+        stones = np.ones(NUM_POINTS, dtype=np.int8)
+        assert np.allclose(score_batch(stones), [1.0, 0.0, 0.0])
+
+    def test_matches_board_score(self):
+        """Batch scoring agrees with Board.score on random positions."""
+        rng = np.random.default_rng(0)
+        stones = rng.integers(-1, 2, size=(8, NUM_POINTS)).astype(np.int8)
+        ratios = score_batch(stones)
+        for row, expected in zip(stones, ratios):
+            board = Board()
+            board.board = row.astype(np.float64)
+            assert board.score() == pytest.approx(tuple(expected))
+            assert expected.sum() == pytest.approx(1.0)
+
+    def test_rules_score_routes_through_batch(self):
+        from polyclash.ai.polyclash.rules import score
+
+        stones = np.zeros(NUM_POINTS, dtype=np.int8)
+        stones[:10] = -1
+        state = PolyclashState(stones)
+        assert score(state) == pytest.approx(tuple(score_batch(stones)))
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from polyclash.ai.core.mcts import MCTS
+from polyclash.ai.core.utils import dotdict
+from polyclash.ai.polyclash.bitboard import MASK_BYTES, Bitboard
+from polyclash.ai.polyclash.game_adapter import PolyclashGame
+from polyclash.ai.polyclash.rules import (
+    BLACK,
+    ZOBRIST_BLACK,
+    ZOBRIST_WHITE,
+    apply_move,
+    valid_moves,
+)
+from polyclash.ai.polyclash.state import PolyclashState
+from polyclash.ai.polyclash.symmetry import (
+    ACTION_PERMS,
+    INVERSE_ACTION_PERMS,
+    NUM_SYMMETRIES,
+    canonical_index,
+    canonical_key,
+    canonicalize,
+    policy_from_canonical,
+    policy_to_canonical,
+)
+from polyclash.ai.polyclash.topology import ACTION_SIZE, NUM_POINTS, PASS_ACTION
+
+
+def _random_state(seed, moves=60):
+    rng = np.random.default_rng(seed)
+    state = PolyclashState.initial()
+    player = BLACK
+    for action in rng.integers(0, NUM_POINTS, size=moves):
+        nxt = apply_move(state, player, int(action))
+        if nxt is not None:
+            state, player = nxt, -player
+    return state
+
+
+def _rotate(state, k):
+    """The state seen through rotation k (point i <- point perm[i])."""
+    return PolyclashState(
+        state.stones[ACTION_PERMS[k][:NUM_POINTS]],
+        consecutive_passes=state.consecutive_passes,
+        move_count=state.move_count,
+    )
+
+
+class TestCanonicalize:
+    def test_inverse_perms(self):
+        for k in range(NUM_SYMMETRIES):
+            assert np.array_equal(
+                ACTION_PERMS[k][INVERSE_ACTION_PERMS[k]], np.arange(ACTION_SIZE)
+            )
+            assert ACTION_PERMS[k][PASS_ACTION] == PASS_ACTION
+
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_rotations_share_key(self, seed):
+        state = _random_state(seed)
+        key, _ = canonical_key(state)
+        canonical, _ = canonicalize(state)
+
+        for k in (1, 17, 59):
+            rotated = _rotate(state, k)
+            assert canonical_key(rotated)[0] == key
+            assert np.array_equal(canonicalize(rotated)[0].stones, canonical.stones)
+
+    def test_canonical_state(self):
+        state = _random_state(3)
+        canonical, k = canonicalize(state)
+
+        assert k == canonical_index(state.stones)
+        assert np.array_equal(canonical.stones, state.stones[ACTION_PERMS[k][:-1]])
+        # The hash is the one the rules engine builds for these stones
+        expected = 0
+        for point in np.flatnonzero(canonical.stones):
+            keys = ZOBRIST_BLACK if canonical.stones[point] == BLACK else ZOBRIST_WHITE
+            expected ^= keys[point]
+        assert canonical.zobrist_hash == expected
+
+    def test_policy_round_trip(self):
+        state = _random_state(4)
+        canonical, k = canonicalize(state)
+        valids = valid_moves(state, BLACK)
+
+        mapped = policy_to_canonical(valids, k)
+        assert np.array_equal(mapped, valid_moves(canonical, BLACK))
+        assert np.array_equal(policy_from_canonical(mapped, k), valids)
+
+    def test_empty_board_is_its_own_representative(self):
+        state = PolyclashState.initial()
+        assert canonicalize(state) == (state, 0)
+
+
+class TestSymmetricMCTS:
+    def test_first_moves_share_nodes(self, make_net):
+        game = PolyclashGame(sym_samples=0)
+
+        def first_move_nodes(symmetry_keys):
+            args = dotdict(
+                {"numMCTSSims": 320, "cpuct": 1.0, "symmetryKeys": symmetry_keys}
+            )
+            mcts = MCTS(game, make_net(game), args)
+            probs = mcts.action_prob(game.init_board(), temp=1)
+            assert len(probs) == ACTION_SIZE
+            assert sum(probs) == pytest.approx(1.0)
+            return sum(
+                np.count_nonzero(Bitboard.from_bytes(s[: 2 * MASK_BYTES]).to_stones())
+                == 1
+                for s in mcts.tree.keys
+            )
+
+        # The 302 first moves fall into 7 rotation orbits
+        assert first_move_nodes(False) == NUM_POINTS
+        assert first_move_nodes(True) == 7
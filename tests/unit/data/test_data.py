@@ -6,9 +6,12 @@ from polyclash.data.data import (
     cities,
     city_manager,
     decoder,
+    distances,
     encoder,
+    geodesic_distances,
     get_areas,
     indexer,
+    inverse_distances,
     neighbors,
     pentagon2faces,
     pentagons,
@@ -238,3 +241,25 @@ class TestAreaCalculations:
         assert np.isclose(polysmall_area, triangle_area, rtol=1e-10)
         assert np.isclose(polylarge_area, pentagon_area, rtol=1e-10)
         assert np.isclose(total_area, total_area_calc, rtol=1e-10)
+
+
+class TestDistanceTables:
+    def test_distances_match_cities(self):
+        """The distance table matches a direct norm of the city coordinates."""
+        for i, j in [(0, 1), (5, 200), (301, 0)]:
+            assert np.isclose(distances[i, j], np.linalg.norm(cities[i] - cities[j]))
+        assert np.allclose(distances, distances.T)
+        assert np.all(np.diag(distances) == 0)
+
+    def test_inverse_distances(self):
+        assert np.all(np.diag(inverse_distances) == 0)
+        off_diagonal = ~np.eye(len(cities), dtype=bool)
+        assert np.allclose(inverse_distances[off_diagonal], 1 / distances[off_diagonal])
+
+    def test_geodesic_distances(self):
+        """Geodesic distances are symmetric great-circle angles."""
+        assert np.allclose(geodesic_distances, geodesic_distances.T)
+        assert np.allclose(np.diag(geodesic_distances), 0)
+        assert geodesic_distances.max() <= np.pi
+        assert geodesic_distances[0, 1] < geodesic_distances[0, 150]
+        assert not geodesic_distances.flags.writeable
@@ -1,8 +1,51 @@
+import random
+
 import pytest
 
 from polyclash.game.board import BLACK, WHITE, Board
 
 
+def _random_moves(board, seed, attempts):
+    """Play ``attempts`` random points for alternating sides on ``board``.
+
+    Illegal points are skipped. Yields the side to move after every move
+    that was played.
+    """
+    rnd = random.Random(seed)
+    player = BLACK
+    for _ in range(attempts):
+        try:
+            board.play(rnd.randrange(302), player, turn_check=False)
+        except ValueError:
+            continue
+        player = -player
+        yield player
+
+
+@pytest.fixture
+def random_moves():
+    """The ``_random_moves`` generator, for tests that check every move."""
+    return _random_moves
+
+
+@pytest.fixture
+def random_game():
+    """Factory for a board after a seeded game of random moves.
+
+    The board has notifications disabled and ``current_player`` set to the
+    side to move.
+    """
+
+    def play(seed=0, attempts=400):
+        board = Board()
+        board.disable_notification()
+        for player in _random_moves(board, seed, attempts):
+            board.current_player = player
+        return board
+
+    return play
+
+
 @pytest.fixture
 def board_with_stones():
     """Fixture for a board with some stones placed."""
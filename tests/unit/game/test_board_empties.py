@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from polyclash.ai.polyclash.bitboard import iter_points
+from polyclash.game.board import BLACK, WHITE, Board
+
+
+def _reference_empties(board, player):
+    suicides = board.black_suicides if player == BLACK else board.white_suicides
+    return [p for p in range(302) if board.board[p] == 0 and p not in suicides]
+
+
+class TestBoardEmpties:
+    """Tests for the incrementally maintained empty points."""
+
+    @pytest.mark.parametrize("seed", [0, 1])
+    def test_matches_full_scan(self, seed, random_moves):
+        """Empties stay in step with the board through play, capture and undo."""
+        rnd = random.Random(seed)
+        board = Board()
+        board.disable_notification()
+        for player in random_moves(board, seed, 400):
+            try:
+                board.push_move(rnd.randrange(302), player)
+                board.pop_move()
+            except ValueError:
+                pass
+            for side in (BLACK, WHITE):
+                expected = _reference_empties(board, side)
+                assert board.get_empties(side) == expected
+                assert iter_points(board.legal_mask(side)) == expected
+        assert sum(len(r) for r in board.latest_removes) > 0
+
+    def test_reset_restores_all_points(self):
+        board = Board()
+        board.play(0, BLACK)
+        board.reset()
+
+        assert board.get_empties(BLACK) == list(range(302))
+
+    def test_sample_empties(self):
+        board = Board()
+        board.board[:300] = BLACK
+        board.white_suicides.add(300)
+
+        assert board.sample_empties(WHITE, 1) == [301]
+        assert sorted(board.sample_empties(BLACK, 2)) == [300, 301]
+        with pytest.raises(ValueError):
+            board.sample_empties(WHITE, 2)
+
+    def test_is_game_over_ignores_occupied_suicides(self):
+        """A suicide point that is now occupied does not keep the game going."""
+        board = Board()
+        board.board[:301] = WHITE
+        board.black_suicides.update({0, 301})
+
+        assert board.is_game_over()
+
+    def test_suicide_edits_reach_the_mask(self):
+        """Edits to the suicide sets, in place or by assignment, are masked out."""
+        board = Board()
+        board.black_suicides.add(5)
+        board.black_suicides |= {7, 9}
+        board.black_suicides.remove(9)
+        board.white_suicides = {3}
+
+        assert board.legal_mask(BLACK) == board._empty_mask & ~((1 << 5) | (1 << 7))
+        assert board.get_empties(WHITE) == [p for p in range(302) if p != 3]
+        assert board.black_suicides == {5, 7}
@@ -108,11 +108,11 @@ class TestBoardRemoveStone:
             ), f"Position {pos} should be in latest_removes"
 
     def test_remove_with_observer(self):
-        """Test that removing stones notifies observers."""
+        """Test that removing stones notifies per-stone observers."""
         board = Board()
         # Create a mock observer
         mock_observer = Mock()
-        board.register_observer(mock_observer)
+        board.register_observer(mock_observer, per_stone=True)
 
         board.board[10] = BLACK
         board.remove_stone(10)
@@ -10,6 +10,7 @@ from polyclash.game.board import (
     calculate_area,
     calculate_distance,
     calculate_potential,
+    calculate_potentials,
 )
 
 
@@ -167,3 +168,20 @@ class TestHelperFunctions:
 
         # Should return a number based on the distances
         assert isinstance(potential, float)
+
+    def test_calculate_potentials_matches_loop(self):
+        """The vectorized potentials equal a per-stone sum of inverse distances."""
+        rng = np.random.default_rng(0)
+        board = rng.choice([BLACK, 0, WHITE], size=302).astype(float)
+        points = [0, 17, 150, 301]
+        counter = 40
+
+        potentials = calculate_potentials(board, points, counter)
+
+        for point, potential in zip(points, potentials):
+            expected = 0.0
+            for i, stone in enumerate(board):
+                distance = calculate_distance(point, i)
+                if stone != 0 and distance > 0:
+                    expected += (1 / distance) * np.tanh(0.5 - counter / 302)
+            assert np.isclose(potential, expected)
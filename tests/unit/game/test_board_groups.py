@@ -0,0 +1,123 @@
+import copy
+import pickle
+
+import numpy as np
+import pytest
+
+from polyclash.data.data import neighbors
+from polyclash.game.board import BLACK, WHITE, ZOBRIST_BLACK, ZOBRIST_WHITE, Board
+
+
+def _snapshot(board):
+    """Group index as a comparable structure, independent of group ids."""
+    return sorted(
+        (tuple(sorted(board._group_stones[gid])), tuple(sorted(board._group_libs[gid])))
+        for gid in board._group_stones
+    )
+
+
+class TestBoardGroupIndex:
+    """Tests for the incremental group and liberty index."""
+
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_index_matches_rebuild(self, seed, random_game):
+        """The incrementally maintained index equals one built from scratch."""
+        board = random_game(seed)
+        assert sum(len(r) for r in board.latest_removes) > 0
+        incremental = _snapshot(board)
+        board._rebuild()
+        assert incremental == _snapshot(board)
+
+    def test_direct_board_write_is_picked_up(self):
+        """Writing to board.board directly resyncs the index on the next play."""
+        board = Board()
+        board.board[0] = WHITE
+        for n in neighbors[0]:
+            board.board[n] = BLACK
+        # Reopen a single liberty for the white stone, then fill it
+        last = sorted(neighbors[0])[-1]
+        board.board[last] = 0
+
+        board.play(last, BLACK, turn_check=False)
+
+        assert board.board[0] == 0
+        assert board.latest_removes[-1] == [0]
+
+    def test_rebuilds_only_after_direct_writes(self, monkeypatch):
+        """play/score keep the index themselves; only outside writes rebuild."""
+        board = Board()
+        rebuilds = []
+        rebuild = board._rebuild
+        monkeypatch.setattr(board, "_rebuild", lambda: rebuilds.append(rebuild()))
+
+        board.play(0, BLACK)
+        board.score()
+        board.get_empties(WHITE)
+        assert rebuilds == []
+
+        point = sorted(neighbors[0])[0]
+        board.board[point : point + 1][0] = WHITE  # through a view
+        board.score()
+        assert len(rebuilds) == 1
+        assert board._group_of[point] == point
+
+        board.board = np.zeros(302)
+        assert board.get_empties(BLACK) == list(range(302))
+        assert len(rebuilds) == 2
+
+    def test_capture_restores_liberties(self):
+        """Capturing a group gives the surrounding groups their liberty back."""
+        board = Board()
+        board.board[0] = WHITE
+        surround = sorted(neighbors[0])
+        for n in surround[:-1]:
+            board.board[n] = BLACK
+
+        board.play(surround[-1], BLACK, turn_check=False)
+
+        for n in surround:
+            assert 0 in board._group_libs[board._group_of[n]]
+
+    def test_superko_leaves_board_untouched(self):
+        """A superko rejection does not change the position or the hash."""
+        board = Board()
+        board.board[0] = WHITE
+        surround = sorted(neighbors[0])
+        for n in surround[:-1]:
+            board.board[n] = BLACK
+        before = board.board.copy()
+        zobrist = board.zobrist_hash
+        # The capturing move would recreate a position seen before
+        board.history_hashes.add(
+            zobrist ^ ZOBRIST_BLACK[surround[-1]] ^ ZOBRIST_WHITE[0]
+        )
+
+        with pytest.raises(ValueError, match="superko violation"):
+            board.play(surround[-1], BLACK, turn_check=False)
+
+        assert np.array_equal(board.board, before)
+        assert board.zobrist_hash == zobrist
+        assert board.latest_removes[-1] == []
+
+    @pytest.mark.parametrize(
+        "clone", [copy.deepcopy, lambda board: pickle.loads(pickle.dumps(board))]
+    )
+    def test_copies_keep_one_stone_array(self, clone, random_game):
+        """A copied or unpickled board plays on, and sees direct writes, alone."""
+        board = random_game(0, 60)
+        original = board.board.copy()
+        point = board.get_empties(board.current_player)[0]
+
+        copied = clone(board)
+        copied.play(point, copied.current_player, turn_check=False)
+
+        assert copied.board[point] == board.current_player
+        assert np.array_equal(board.board, original)
+        assert not copied._dirty
+        incremental = _snapshot(copied)
+        copied._rebuild()
+        assert incremental == _snapshot(copied)
+
+        copied.board[point] = 0
+        assert copied._dirty
+        assert copied.get_empties(BLACK) == clone(copied).get_empties(BLACK)
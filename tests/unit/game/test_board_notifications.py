@@ -0,0 +1,81 @@
+from unittest.mock import Mock, call
+
+from polyclash.data.data import neighbors
+from polyclash.game.board import BLACK, WHITE, Board
+
+
+def _capture_setup():
+    """White group of two stones with a single liberty left at ``last``."""
+    board = Board()
+    group = [0, sorted(neighbors[0])[0]]
+    for pos in group:
+        board.board[pos] = WHITE
+    boundary = sorted(set().union(*(neighbors[p] for p in group)) - set(group))
+    for pos in boundary[:-1]:
+        board.board[pos] = BLACK
+    return board, group, boundary[-1]
+
+
+class TestBoardNotifications:
+    """Tests for batched and per-stone observer notifications."""
+
+    def test_capture_is_coalesced(self):
+        """A capturing play sends one captures event and one add_stone event."""
+        board, group, last = _capture_setup()
+        observer = Mock()
+        board.register_observer(observer)
+
+        board.play(last, BLACK, turn_check=False)
+
+        score = board.score()
+        assert observer.handle_notification.call_args_list == [
+            call("captures", points=group, score=score),
+            call("add_stone", point=last, player=BLACK, score=score),
+        ]
+
+    def test_quiet_play_sends_only_add_stone(self):
+        board = Board()
+        observer = Mock()
+        board.register_observer(observer)
+
+        board.play(0, BLACK)
+
+        observer.handle_notification.assert_called_once_with(
+            "add_stone", point=0, player=BLACK, score=board.score()
+        )
+
+    def test_per_stone_opt_in(self):
+        """Per-stone observers get a remove_stone event for each captured stone."""
+        board, group, last = _capture_setup()
+        observer = Mock()
+        board.register_observer(observer, per_stone=True)
+
+        board.play(last, BLACK, turn_check=False)
+
+        messages = [c.args[0] for c in observer.handle_notification.call_args_list]
+        assert messages == ["remove_stone"] * len(group) + ["add_stone"]
+        points = [
+            c.kwargs["point"] for c in observer.handle_notification.call_args_list
+        ]
+        assert points[:-1] == group
+
+    def test_unregister_clears_opt_in(self):
+        board, _, last = _capture_setup()
+        observer = Mock()
+        board.register_observer(observer, per_stone=True)
+        board.unregister_observer(observer)
+
+        board.play(last, BLACK, turn_check=False)
+
+        observer.handle_notification.assert_not_called()
+
+    def test_remove_stone_batched(self):
+        board, group, _ = _capture_setup()
+        observer = Mock()
+        board.register_observer(observer)
+
+        board.remove_stone(group[1])
+
+        observer.handle_notification.assert_called_once_with(
+            "captures", points=[group[1], group[0]], score=board.score()
+        )
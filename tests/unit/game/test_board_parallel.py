@@ -0,0 +1,105 @@
+import random
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from polyclash.game.board import BLACK, shutdown_rank_pools
+
+
+@pytest.fixture
+def midgame_board(random_game):
+    return random_game(0, 60)
+
+
+@pytest.fixture(autouse=True)
+def _shutdown_pools():
+    yield
+    shutdown_rank_pools()
+
+
+class TestParallelRankMoves:
+    """Tests for the opt-in process-pool rank_moves."""
+
+    def test_ranks_every_candidate(self, midgame_board):
+        midgame_board.rank_workers = 2
+        midgame_board.rank_min_candidates = 1
+        player = midgame_board.current_player
+
+        ranked = midgame_board.rank_moves(player)
+
+        assert sorted(ranked) == midgame_board.get_empties(player)
+
+    def test_workers_are_spawned(self):
+        from polyclash.game import board as board_module
+
+        pool = board_module._get_rank_pool(2)
+
+        assert pool._mp_context.get_start_method() == "spawn"
+
+    def test_reproducible_with_seed(self, midgame_board):
+        midgame_board.rank_workers = 2
+        midgame_board.rank_min_candidates = 1
+
+        player = midgame_board.current_player
+
+        random.seed(7)
+        first = midgame_board.rank_moves(player)
+        random.seed(7)
+        second = midgame_board.rank_moves(player)
+
+        assert first == second
+
+    def test_below_threshold_stays_serial(self, midgame_board, monkeypatch):
+        from polyclash.game import board as board_module
+
+        def fail(workers):
+            raise AssertionError("pool should not be used")
+
+        monkeypatch.setattr(board_module, "_get_rank_pool", fail)
+        midgame_board.rank_workers = 2
+        midgame_board.rank_min_candidates = 1000
+
+        assert midgame_board.rank_moves(BLACK)
+
+    def test_concurrent_requests_share_one_pool(self):
+        from polyclash.game import board as board_module
+
+        pools = []
+        threads = [
+            threading.Thread(
+                target=lambda: pools.append(board_module._get_rank_pool(2))
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(pool) for pool in pools}) == 1
+        assert list(board_module._rank_pools.values()) == [pools[0]]
+
+    def test_broken_pool_is_shut_down(self, midgame_board, monkeypatch):
+        from polyclash.game import board as board_module
+
+        class BrokenPool:
+            shutdowns = []
+
+            def map(self, *args):
+                raise BrokenProcessPool("worker died")
+
+            def shutdown(self, wait=True, cancel_futures=False):
+                self.shutdowns.append((wait, cancel_futures))
+
+        broken = BrokenPool()
+        monkeypatch.setitem(board_module._rank_pools, 2, broken)
+        midgame_board.rank_workers = 2
+        midgame_board.rank_min_candidates = 1
+        player = midgame_board.current_player
+
+        ranked = midgame_board.rank_moves(player)
+
+        assert sorted(ranked) == midgame_board.get_empties(player)
+        assert BrokenPool.shutdowns == [(False, True)]
+        assert 2 not in board_module._rank_pools
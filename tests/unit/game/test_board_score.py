@@ -0,0 +1,52 @@
+import pytest
+
+from polyclash.data.data import (
+    polylarge_area,
+    polylarges,
+    polysmall_area,
+    polysmalls,
+    total_area,
+)
+from polyclash.game.board import BLACK, WHITE, Board, calculate_area
+
+
+def _full_score(boarddata):
+    """Reference score computed face by face with calculate_area."""
+    totals = [0.0, 0.0, 0.0]
+    for faces, area in ((polysmalls, polysmall_area), (polylarges, polylarge_area)):
+        for piece in faces:
+            for k, value in enumerate(calculate_area(boarddata, piece, area)):
+                totals[k] += value
+    return tuple(value / total_area for value in totals)
+
+
+class TestBoardIncrementalScore:
+    """Tests for the incrementally maintained area score."""
+
+    @pytest.mark.parametrize("seed", [0, 1])
+    def test_matches_full_recompute(self, seed, random_moves):
+        """The running score equals a full recompute after every move."""
+        board = Board()
+        board.disable_notification()
+        for _ in random_moves(board, seed, 300):
+            assert board.score() == pytest.approx(_full_score(board.board))
+
+    def test_direct_board_write_is_picked_up(self):
+        """Writing to board.board directly is reflected by score()."""
+        board = Board()
+        for pos in polysmalls[0]:
+            board.board[pos] = WHITE
+
+        assert board.score() == pytest.approx(_full_score(board.board))
+        assert board.score()[1] > 0
+
+    def test_capture_updates_score(self):
+        """Removing a group gives its area back."""
+        board = Board()
+        board.play(0, BLACK)
+        board.remove_stone(0)
+
+        black, white, unclaimed = board.score()
+        assert black == 0
+        assert white == 0
+        assert unclaimed == pytest.approx(1.0)
@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from polyclash.game.board import BLACK, Board, SimulatedBoard
+
+
+@pytest.fixture
+def midgame_board(random_game):
+    return random_game(0, 60)
+
+
+class TestAnytimeSearch:
+    """Tests for the time-budgeted heuristic search."""
+
+    def test_returns_full_ranking(self, midgame_board):
+        board = midgame_board
+
+        player = board.current_player
+
+        ranked = board.rank_moves(player, time_ms=50)
+
+        assert sorted(ranked) == board.get_empties(player)
+
+    def test_tiny_budget_still_returns_a_move(self, midgame_board):
+        board = midgame_board
+
+        player = board.current_player
+
+        assert board.genmove(player, time_ms=0) in board.get_empties(player)
+
+    def test_respects_budget(self, midgame_board):
+        """The search stops within one candidate evaluation of the deadline."""
+        board = midgame_board
+        player = board.current_player
+        board.rank_moves(player)  # warm up the simulator
+        start = time.perf_counter()
+        plain = board.rank_moves(player)
+        plain_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        board.rank_moves(player, time_ms=100)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        assert plain
+        assert elapsed_ms < 100 + plain_ms + 50
+
+    def test_few_empties_keep_plain_ranking(self):
+        """Trails wider than the number of empty points are skipped."""
+        board = Board()
+        board.board[:299] = BLACK
+        board.board[0] = 0
+        board.board[1] = 0
+        board.turns.update((i, ()) for i in range(2))
+
+        ranked = board.rank_moves(BLACK, time_ms=50)
+
+        assert sorted(ranked) == board.get_empties(BLACK)
+
+    def test_deeper_search_leaves_board_unchanged(self, midgame_board):
+        board = midgame_board
+        simulator = SimulatedBoard()
+        simulator.redirect(board)
+        before = simulator.board.copy()
+
+        player = board.current_player
+        point = simulator.get_empties(player)[0]
+
+        score, _ = simulator.simulate_score(0, point, player, 3, 4)
+
+        assert score > -1
+        assert (simulator.board == before).all()
+        assert simulator.counter == board.counter
@@ -0,0 +1,116 @@
+import random
+
+import numpy as np
+import pytest
+
+from polyclash.data.data import neighbors
+from polyclash.game.board import BLACK, WHITE, Board, SimulatedBoard
+
+
+def _state(board):
+    return (
+        board.board.tolist(),
+        board.zobrist_hash,
+        sorted(board.history_hashes),
+        list(board.turns.items()),
+        [list(r) for r in board.latest_removes],
+        board.latest_player,
+        board.score(),
+        sorted(
+            (tuple(sorted(board._group_stones[gid])), tuple(sorted(libs)))
+            for gid, libs in board._group_libs.items()
+        ),
+    )
+
+
+class TestBoardPushPop:
+    """Tests for the push_move/pop_move undo stack."""
+
+    def test_push_pop_restores_position(self):
+        board = Board()
+        board.play(0, BLACK)
+        board.switch_player()
+        before = _state(board)
+
+        board.push_move(1, WHITE)
+        board.push_move(2, BLACK)
+        assert board.board[1] == WHITE and board.board[2] == BLACK
+        board.pop_move()
+        board.pop_move()
+
+        assert _state(board) == before
+
+    def test_pop_restores_captured_group(self):
+        board = Board()
+        board.board[0] = WHITE
+        surround = sorted(neighbors[0])
+        for n in surround[:-1]:
+            board.board[n] = BLACK
+        before = _state(board)
+
+        board.push_move(surround[-1], BLACK)
+        assert board.board[0] == 0
+        assert board.latest_removes[-1] == [0]
+        board.pop_move()
+
+        assert _state(board) == before
+
+    @pytest.mark.parametrize("seed", [0, 1])
+    def test_random_search_restores_position(self, seed, random_game):
+        board = random_game(seed, 500)
+        player = board.current_player
+        before = _state(board)
+
+        rnd = random.Random(seed)
+        depth = 0
+        for _ in range(20):
+            try:
+                board.push_move(rnd.randrange(302), player)
+            except ValueError:
+                continue
+            depth += 1
+            player = -player
+        for _ in range(depth):
+            board.pop_move()
+
+        assert _state(board) == before
+
+    def test_illegal_push_leaves_position(self):
+        board = Board()
+        board.play(0, BLACK)
+        before = _state(board)
+
+        with pytest.raises(ValueError, match="already occupied"):
+            board.push_move(0, WHITE)
+
+        assert _state(board) == before
+        with pytest.raises(IndexError):
+            board.pop_move()
+
+    def test_push_does_not_notify(self):
+        board = Board()
+        calls = []
+
+        class Observer:
+            def handle_notification(self, message, **kwargs):
+                calls.append(message)
+
+        board.register_observer(Observer())
+        board.push_move(0, BLACK)
+        board.pop_move()
+
+        assert calls == []
+        assert board.notification_enabled
+
+    def test_simulate_score_leaves_simulator_unchanged(self):
+        board = Board()
+        board.play(0, BLACK)
+        board.switch_player()
+        simulator = SimulatedBoard()
+        simulator.redirect(board)
+        before = simulator.board.copy()
+
+        simulator.simulate_score(0, 1, WHITE)
+
+        assert np.array_equal(simulator.board, before)
+        assert simulator.counter == board.counter